@@ -0,0 +1,148 @@
+import os
+import shutil
+from typing import Iterable, List, Optional
+
+import pandas as pd
+
+COLUMNA_PARTICION = 'anio_mes'
+PARTICION_SIN_FECHA = 'sin_fecha'
+
+FORMATOS_POR_EXTENSION = {
+    '.csv': 'csv',
+    '.parquet': 'parquet',
+    '.feather': 'feather',
+    '.arrow': 'feather'
+}
+
+COMPRESION_PREDETERMINADA = {'parquet': 'snappy', 'feather': 'lz4'}
+
+
+def _importar_pyarrow():
+    """Importar pyarrow solo cuando se usa un formato columnar"""
+    try:
+        import pyarrow as pa
+        import pyarrow.feather as feather
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("Se requiere 'pyarrow' para formatos columnares: pip install pyarrow") from e
+    return pa, pq, feather
+
+
+def detectar_formato(ruta: str) -> str:
+    """Determinar el formato de salida a partir de la extensión (directorio sin extensión = parquet)"""
+    extension = os.path.splitext(ruta.rstrip('/\\'))[1].lower()
+    if not extension:
+        return 'parquet'
+    if extension not in FORMATOS_POR_EXTENSION:
+        raise ValueError(f"Formato no soportado: '{extension}'. Use {sorted(FORMATOS_POR_EXTENSION)}")
+    return FORMATOS_POR_EXTENSION[extension]
+
+
+def _tabla_arrow(df: pd.DataFrame, particionar_por_mes: bool):
+    """Convertir a tabla Arrow con índices de diccionario uniformes entre bloques"""
+    pa, _, _ = _importar_pyarrow()
+
+    if particionar_por_mes:
+        if 'fecha' not in df.columns:
+            raise ValueError("Para particionar por mes se requiere la columna 'fecha'")
+        df = df.assign(**{COLUMNA_PARTICION: df['fecha'].dt.strftime('%Y-%m').fillna(PARTICION_SIN_FECHA)})
+
+    tabla = pa.Table.from_pandas(df, preserve_index=False)
+
+    # Las categorías de cada bloque pueden producir índices int8/int16: se fija int32
+    campos = []
+    for campo in tabla.schema:
+        if pa.types.is_dictionary(campo.type):
+            campo = campo.with_type(pa.dictionary(pa.int32(), campo.type.value_type))
+        campos.append(campo)
+    return tabla.cast(pa.schema(campos, metadata=tabla.schema.metadata))
+
+
+def escribir_columnar(df: pd.DataFrame, ruta: str, formato: str = 'parquet',
+                      particionar_por_mes: bool = False, compresion: Optional[str] = None,
+                      filas_por_grupo: int = 100000, nombre_bloque: Optional[str] = None):
+    """
+    Escribir un DataFrame en formato columnar conservando los tipos.
+
+    Con `nombre_bloque` se escribe como dataset parquet (directorio) y cada llamada
+    agrega archivos nuevos, lo que permite escribir por bloques.
+    """
+    _, pq, feather = _importar_pyarrow()
+    compresion = compresion or COMPRESION_PREDETERMINADA.get(formato)
+
+    if formato == 'feather':
+        if particionar_por_mes or nombre_bloque:
+            raise ValueError("El formato feather no admite particiones ni escritura por bloques; use parquet")
+        feather.write_feather(_tabla_arrow(df, False), ruta, compression=compresion, chunksize=filas_por_grupo)
+        return
+
+    tabla = _tabla_arrow(df, particionar_por_mes)
+
+    if particionar_por_mes or nombre_bloque:
+        pq.write_to_dataset(
+            tabla, ruta,
+            partition_cols=[COLUMNA_PARTICION] if particionar_por_mes else None,
+            basename_template=f"{nombre_bloque or 'parte'}-{{i}}.parquet",
+            existing_data_behavior='overwrite_or_ignore',
+            max_rows_per_group=filas_por_grupo,
+            compression=compresion
+        )
+    else:
+        pq.write_table(tabla, ruta, compression=compresion, row_group_size=filas_por_grupo)
+
+
+def eliminar_salida(ruta: str):
+    """Eliminar una salida previa (archivo o directorio de dataset)"""
+    if os.path.isdir(ruta):
+        shutil.rmtree(ruta)
+    elif os.path.exists(ruta):
+        os.remove(ruta)
+
+
+def leer_datos_limpios(ruta: str, columnas: Optional[List[str]] = None,
+                       meses: Optional[Iterable[str]] = None) -> pd.DataFrame:
+    """
+    Leer datos limpios cargando solo las columnas y meses ('YYYY-MM') necesarios.
+
+    En parquet particionado los meses se filtran por directorio sin leer el resto.
+    """
+    formato = 'parquet' if os.path.isdir(ruta) else detectar_formato(ruta)
+    meses = list(meses) if meses is not None else None
+
+    if formato == 'csv':
+        encabezado = pd.read_csv(ruta, nrows=0).columns
+        usecols = columnas
+        if columnas is not None and meses is not None and 'fecha' not in columnas:
+            usecols = list(columnas) + ['fecha']
+        df = pd.read_csv(ruta, usecols=usecols, parse_dates=['fecha'] if 'fecha' in encabezado else None)
+    elif formato == 'feather':
+        _, _, feather = _importar_pyarrow()
+        usecols = columnas
+        if columnas is not None and meses is not None and 'fecha' not in columnas:
+            usecols = list(columnas) + ['fecha']
+        df = feather.read_feather(ruta, columns=usecols)
+    else:
+        _importar_pyarrow()
+        particionado = os.path.isdir(ruta) and any(
+            nombre.startswith(f"{COLUMNA_PARTICION}=") for nombre in os.listdir(ruta)
+        )
+        filtros = None
+        usecols = columnas
+        if meses is not None:
+            if particionado:
+                filtros = [(COLUMNA_PARTICION, 'in', meses)]
+            elif columnas is not None and 'fecha' not in columnas:
+                usecols = list(columnas) + ['fecha']
+        df = pd.read_parquet(ruta, columns=usecols, filters=filtros)
+        if particionado:
+            if meses is not None:
+                meses = None  # ya filtrado por partición
+            if COLUMNA_PARTICION in df.columns and (columnas is None or COLUMNA_PARTICION not in columnas):
+                df = df.drop(columns=[COLUMNA_PARTICION])
+
+    if meses is not None:
+        df = df[df['fecha'].dt.strftime('%Y-%m').isin(meses)]
+        if columnas is not None:
+            df = df[columnas]
+
+    return df.reset_index(drop=True)
@@ -0,0 +1,261 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+
+import pandas as pd
+
+DIRECTORIO_BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(DIRECTORIO_BENCHMARKS))
+
+from generador_ventas import obtener_archivo  # noqa: E402
+from instrumentacion import pico_memoria_proceso  # noqa: E402
+from limpieza_automatizada import LimpiezaAutomatizada  # noqa: E402
+
+ARCHIVO_LINEA_BASE = os.path.join(DIRECTORIO_BENCHMARKS, 'linea_base.json')
+DIRECTORIO_DATOS = os.path.join(DIRECTORIO_BENCHMARKS, 'datos')
+TAMANOS_PREDETERMINADOS = [10000, 100000, 1000000]
+MB = 1024 ** 2
+
+
+def _entorno() -> Dict:
+    """Datos de la máquina para saber si una línea base es comparable"""
+    return {
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'sistema': platform.platform(),
+        'cpus': os.cpu_count()
+    }
+
+
+class MedidorEtapas:
+    """Mide el tiempo de cada etapa y, si tracemalloc está activo, su pico de memoria"""
+
+    def __init__(self):
+        self.etapas: Dict[str, Dict] = {}
+
+    def medir(self, nombre: str, funcion: Callable):
+        midiendo_memoria = tracemalloc.is_tracing()
+        if midiendo_memoria:
+            tracemalloc.reset_peak()
+            memoria_inicial = tracemalloc.get_traced_memory()[0]
+
+        inicio = time.perf_counter()
+        resultado = funcion()
+        segundos = time.perf_counter() - inicio
+
+        self.etapas[nombre] = {'segundos': segundos, 'pico_memoria_mb': None}
+        if midiendo_memoria:
+            pico = tracemalloc.get_traced_memory()[1]
+            self.etapas[nombre]['pico_memoria_mb'] = max(pico - memoria_inicial, 0) / MB
+        return resultado
+
+
+def ejecutar_pipeline(archivo: str, archivo_salida: str, lectura: str = 'plan') -> Dict:
+    """
+    Ejecutar la limpieza etapa por etapa, en el mismo orden que `_procesar_bloque`.
+
+    Con lectura='plan' la reorganización y el mapeo ocurren dentro de la lectura
+    tipada; con lectura='cruda' se mide el camino sin plan, etapa por etapa.
+    """
+    limpiador = LimpiezaAutomatizada(archivo)
+    medidor = MedidorEtapas()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        medidor.medir('deteccion', limpiador.detectar_estructura)
+
+        if lectura == 'plan':
+            df = medidor.medir('lectura', limpiador._leer_con_plan)
+        else:
+            df = medidor.medir('lectura', lambda: pd.read_csv(archivo, low_memory=False))
+            df = medidor.medir('reorganizacion', lambda: limpiador._reorganizar_datos_mal_estructurados(df))
+
+            def mapear():
+                mapeo = limpiador._mapear_columnas_automatico(df.columns.tolist())
+                return limpiador._eliminar_columnas_duplicadas(df.rename(columns=mapeo))
+            df = medidor.medir('mapeo', mapear)
+
+        filas = len(df)
+        limpiador.df = df
+        limpiador.df = medidor.medir('pais', lambda: limpiador._detectar_y_corregir_pais(limpiador.df))
+        medidor.medir('fechas', limpiador._normalizar_fechas)
+        medidor.medir('limpieza_lotes', limpiador._aplicar_limpieza_por_lotes)
+        medidor.medir('validacion', limpiador._validar_reglas)
+        medidor.medir('total_ventas', limpiador._calcular_total_ventas)
+        medidor.medir('validacion_total', lambda: limpiador._validar_reglas(sobre_total=True))
+        medidor.medir('deduplicacion', limpiador._eliminar_filas_duplicadas)
+
+        def guardar():
+            limpiador.df = limpiador._reordenar_columnas(limpiador.df)
+            limpiador.guardar_datos_limpios(archivo_salida)
+        medidor.medir('guardado', guardar)
+
+    # Throughput respecto a las filas de entrada para todas las etapas
+    for medida in medidor.etapas.values():
+        medida['filas_por_segundo'] = filas / medida['segundos'] if medida['segundos'] > 0 else None
+
+    total = sum(m['segundos'] for m in medidor.etapas.values())
+    return {
+        'filas': filas,
+        'etapas': medidor.etapas,
+        'total_segundos': total,
+        'filas_por_segundo': filas / total if total > 0 else None
+    }
+
+
+def medir_tamano(filas: int, lectura: str = 'plan', repeticiones: int = 3, diseno: str = 'desplazado',
+                 directorio_datos: str = DIRECTORIO_DATOS) -> Dict:
+    """
+    Repetir el pipeline y quedarse con el mejor tiempo de cada etapa.
+
+    tracemalloc encarece mucho la creación de objetos Python (cadenas, CSV), por
+    eso los tiempos se toman sin él y la memoria en una ejecución aparte.
+    """
+    archivo = obtener_archivo(filas, directorio_datos, diseno)
+    archivo_salida = os.path.join(directorio_datos, f"salida_{diseno}_{filas}.csv")
+
+    ejecuciones = [ejecutar_pipeline(archivo, archivo_salida, lectura) for _ in range(repeticiones)]
+
+    tracemalloc.start()
+    try:
+        memoria = ejecutar_pipeline(archivo, archivo_salida, lectura)
+    finally:
+        tracemalloc.stop()
+    os.remove(archivo_salida)
+
+    mejor = ejecuciones[0]
+    for etapa in mejor['etapas']:
+        mejor['etapas'][etapa] = dict(
+            min((e['etapas'][etapa] for e in ejecuciones), key=lambda m: m['segundos']),
+            pico_memoria_mb=memoria['etapas'][etapa]['pico_memoria_mb']
+        )
+    mejor['total_segundos'] = sum(m['segundos'] for m in mejor['etapas'].values())
+    mejor['filas_por_segundo'] = mejor['filas'] / mejor['total_segundos']
+    mejor['pico_memoria_mb'] = max(m['pico_memoria_mb'] for m in mejor['etapas'].values())
+    return mejor
+
+
+def comparar_con_linea_base(resultado: Dict, base: Dict, tolerancia_tiempo: float = 0.5,
+                            tolerancia_memoria: float = 0.25, margen_segundos: float = 0.05,
+                            margen_mb: float = 5.0) -> List[str]:
+    """
+    Listar las etapas que empeoraron respecto a la línea base.
+
+    Una etapa regresa si supera la base en más de la tolerancia relativa y además
+    en más del margen absoluto (evita falsos positivos en etapas de milisegundos).
+    Una etapa sin medida en la base también falla: hay que regenerar la línea base.
+    """
+    regresiones = []
+    for etapa, medida in resultado['etapas'].items():
+        referencia = base['etapas'].get(etapa)
+        if referencia is None:
+            regresiones.append(f"{etapa}: etapa sin línea base ({medida['segundos']:.3f}s, "
+                               f"pico {medida['pico_memoria_mb']:.1f} MB); ejecutar con --actualizar-linea-base")
+            continue
+
+        limite_tiempo = max(referencia['segundos'] * (1 + tolerancia_tiempo), referencia['segundos'] + margen_segundos)
+        if medida['segundos'] > limite_tiempo:
+            regresiones.append(f"{etapa}: {medida['segundos']:.3f}s > {limite_tiempo:.3f}s "
+                               f"(base {referencia['segundos']:.3f}s)")
+
+        limite_memoria = max(referencia['pico_memoria_mb'] * (1 + tolerancia_memoria),
+                             referencia['pico_memoria_mb'] + margen_mb)
+        if medida['pico_memoria_mb'] > limite_memoria:
+            regresiones.append(f"{etapa}: pico {medida['pico_memoria_mb']:.1f} MB > {limite_memoria:.1f} MB "
+                               f"(base {referencia['pico_memoria_mb']:.1f} MB)")
+    return regresiones
+
+
+def _clave(diseno: str, lectura: str, filas: int) -> str:
+    return f"{diseno}/{lectura}/{filas}"
+
+
+def _mostrar_resultado(clave: str, resultado: Dict):
+    print(f"\n📊 {clave}: {resultado['filas']:,} filas en {resultado['total_segundos']:.2f}s "
+          f"({resultado['filas_por_segundo']:,.0f} filas/s)")
+    for etapa, medida in resultado['etapas'].items():
+        throughput = f"{medida['filas_por_segundo']:>14,.0f} filas/s" if medida['filas_por_segundo'] else ''
+        print(f"   {etapa:<16} {medida['segundos']:>8.3f}s {throughput} {medida['pico_memoria_mb']:>9.1f} MB")
+
+
+def _leer_linea_base(ruta: str) -> Dict:
+    if not os.path.exists(ruta):
+        return {'entorno': None, 'resultados': {}}
+    with open(ruta, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _argumentos(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Benchmark por etapas de la limpieza automatizada")
+    parser.add_argument('--filas', type=int, nargs='+', default=TAMANOS_PREDETERMINADOS,
+                        help="Tamaños a medir (p. ej. 10000 100000 1000000 10000000)")
+    parser.add_argument('--lectura', choices=['plan', 'cruda'], default='plan')
+    parser.add_argument('--diseno', choices=['desplazado', 'estandar'], default='desplazado')
+    parser.add_argument('--repeticiones', type=int, default=3)
+    parser.add_argument('--tolerancia-tiempo', type=float, default=0.5)
+    parser.add_argument('--tolerancia-memoria', type=float, default=0.25)
+    parser.add_argument('--linea-base', default=ARCHIVO_LINEA_BASE)
+    parser.add_argument('--actualizar-linea-base', action='store_true',
+                        help="Guardar los resultados como nueva línea base en vez de comparar")
+    parser.add_argument('--salida-json', help="Guardar los resultados de esta ejecución")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    argumentos = _argumentos(argv)
+    linea_base = _leer_linea_base(argumentos.linea_base)
+    resultados = {}
+    regresiones = []
+
+    print("⏱️  BENCHMARK DE LIMPIEZA AUTOMATIZADA")
+    if linea_base['entorno'] and linea_base['entorno'] != _entorno() and not argumentos.actualizar_linea_base:
+        print(f"   ⚠ La línea base se midió en otro entorno: {linea_base['entorno']}")
+
+    for filas in argumentos.filas:
+        clave = _clave(argumentos.diseno, argumentos.lectura, filas)
+        resultados[clave] = medir_tamano(filas, argumentos.lectura, argumentos.repeticiones, argumentos.diseno)
+        _mostrar_resultado(clave, resultados[clave])
+
+        base = linea_base['resultados'].get(clave)
+        if base and not argumentos.actualizar_linea_base:
+            encontradas = comparar_con_linea_base(
+                resultados[clave], base, argumentos.tolerancia_tiempo, argumentos.tolerancia_memoria
+            )
+            regresiones.extend(f"{clave} {r}" for r in encontradas)
+        elif not base:
+            print("   ℹ️  Sin línea base para este tamaño")
+
+    pico = pico_memoria_proceso()
+    print(f"\n🧠 Pico de memoria del proceso (RSS): "
+          f"{f'{pico / MB:,.0f} MB' if pico is not None else 'no disponible'}")
+
+    if argumentos.salida_json:
+        with open(argumentos.salida_json, 'w', encoding='utf-8') as f:
+            json.dump({'entorno': _entorno(), 'resultados': resultados}, f, indent=2)
+
+    if argumentos.actualizar_linea_base:
+        linea_base['entorno'] = _entorno()
+        linea_base['resultados'].update(resultados)
+        with open(argumentos.linea_base, 'w', encoding='utf-8') as f:
+            json.dump(linea_base, f, indent=2)
+        print(f"💾 Línea base actualizada: {argumentos.linea_base}")
+        return 0
+
+    if regresiones:
+        print("\n❌ REGRESIONES DETECTADAS:")
+        for regresion in regresiones:
+            print(f"   - {regresion}")
+        return 1
+
+    print("\n✅ Sin regresiones respecto a la línea base")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
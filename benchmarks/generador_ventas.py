@@ -0,0 +1,128 @@
+import argparse
+import os
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+# Encabezado del diseño desplazado: los nombres no corresponden al contenido de cada
+# posición (los datos empiezan por la ciudad) y sobra una columna 'País' vacía
+ENCABEZADO_DESPLAZADO = [
+    'Fecha', 'Producto ', 'Tipo Producto', 'CANTIDAD', 'Precio_Unitario',
+    'Ciudad', 'Tipo_Venta', 'Tipo Cliente', 'Descuento', 'Costo Envío', 'País'
+]
+
+# Diseño con columnas en su sitio pero encabezados desordenados y con variantes
+ENCABEZADO_ESTANDAR = [
+    ' Fecha Venta', 'PRODUCTO', 'Categoría', 'qty', 'Precio', 'Municipio', 'canal_venta', 'shipping_cost'
+]
+
+CIUDADES = [
+    'Bogotá', 'bogota', ' MEDELLÍN ', 'Medellin', 'Cali', 'Barranquilla', 'Cartagena de Indias',
+    'Madrid', 'Valencia', 'Barcelona', 'Lima', 'Arequipa', 'Santiago', 'Córdoba', 'Buenos Aires',
+    'Ciudad de México', 'Quito', 'Nueva Ciudad', 'Nan', ''
+]
+PRODUCTOS = [
+    ('Arroz', 'Granos'), ('Frijol  rojo', 'Granos'), ('Café molido!!', 'Bebidas'), ('Té verde', 'Bebidas'),
+    ('Leche', 'Lácteos'), ('Queso campesino', 'Lácteos'), ('Pan tajado', 'Panadería'), ('Azúcar', 'Abarrotes'),
+    ('Aceite #1', 'Abarrotes'), ('Nan', 'Nan')
+]
+TIPOS_VENTA = ['Online', 'Tienda', 'tienda física', 'Distribuidor', 'Nan']
+TIPOS_CLIENTE = ['Minorista', 'Mayorista', 'Corporativo', 'minorista ', 'Nan']
+FORMATOS_FECHA = ['%Y-%m-%d', '%d/%m/%Y', '%m/%d/%Y', '%Y-%m-%d %H:%M:%S']
+
+
+def _fechas_posibles(rng: np.random.Generator, cantidad: int = 3000) -> np.ndarray:
+    """Conjunto de fechas en formatos mezclados, con valores nulos y fuera de rango"""
+    dias = pd.Timestamp('2019-06-01') + pd.to_timedelta(rng.integers(0, 365 * 7, cantidad), unit='D')
+    formatos = rng.choice(FORMATOS_FECHA, cantidad, p=[0.55, 0.2, 0.15, 0.1])
+    fechas = [dia.strftime(formato) for dia, formato in zip(dias, formatos)]
+    return np.array(fechas + ['Nan', '', 'sin fecha', '31/02/2024'], dtype=object)
+
+
+def _bloque_ventas(rng: np.random.Generator, filas: int, fechas: np.ndarray) -> pd.DataFrame:
+    """Generar un bloque de filas en el orden posicional que espera la reorganización"""
+    indices_producto = rng.integers(0, len(PRODUCTOS), filas)
+    productos = np.array([p for p, _ in PRODUCTOS], dtype=object)
+    tipos_producto = np.array([t for _, t in PRODUCTOS], dtype=object)
+
+    cantidad = rng.integers(1, 50, filas).astype(object)
+    cantidad[rng.random(filas) < 0.02] = 'Nan'
+    precio = rng.uniform(500, 250000, filas).round(2).astype(object)
+    precio[rng.random(filas) < 0.01] = ''
+    descuento = rng.choice(np.array([0, 5, 10, 15, 20, 'Nan'], dtype=object), filas)
+    costo_envio = rng.uniform(0, 30000, filas).round(2)
+
+    return pd.DataFrame({
+        'ciudad': rng.choice(np.array(CIUDADES, dtype=object), filas),
+        'fecha': rng.choice(fechas, filas),
+        'producto': productos[indices_producto],
+        'tipo_producto': tipos_producto[indices_producto],
+        'cantidad': cantidad,
+        'precio_unitario': precio,
+        'tipo_venta': rng.choice(np.array(TIPOS_VENTA, dtype=object), filas),
+        'tipo_cliente': rng.choice(np.array(TIPOS_CLIENTE, dtype=object), filas),
+        'descuento': descuento,
+        'costo_envio': costo_envio
+    })
+
+
+def generar_ventas_sinteticas(filas: int, ruta: str, diseno: str = 'desplazado',
+                              semilla: int = 0, tamano_bloque: int = 500000) -> str:
+    """
+    Escribir un CSV sintético parecido a RWventas.csv por bloques (memoria acotada).
+
+    - diseno='desplazado': 11 encabezados que no corresponden a las posiciones de los
+      datos, el caso que resuelve `_reorganizar_datos_mal_estructurados`.
+    - diseno='estandar': 8 columnas en su sitio con encabezados a mapear.
+
+    Incluye acentos, espacios y símbolos, cadenas 'Nan', vacíos y fechas en varios formatos.
+    """
+    if diseno not in ('desplazado', 'estandar'):
+        raise ValueError("diseno debe ser 'desplazado' o 'estandar'")
+
+    rng = np.random.default_rng(semilla)
+    fechas = _fechas_posibles(rng)
+    temporal = f"{ruta}.tmp"
+
+    with open(temporal, 'w', encoding='utf-8', newline='') as f:
+        encabezado = ENCABEZADO_DESPLAZADO if diseno == 'desplazado' else ENCABEZADO_ESTANDAR
+        f.write(','.join(encabezado) + '\n')
+
+        for inicio in range(0, filas, tamano_bloque):
+            bloque = _bloque_ventas(rng, min(tamano_bloque, filas - inicio), fechas)
+            if diseno == 'desplazado':
+                bloque['pais'] = ''
+            else:
+                bloque = bloque[['fecha', 'producto', 'tipo_producto', 'cantidad', 'precio_unitario',
+                                 'ciudad', 'tipo_venta', 'costo_envio']]
+            bloque.to_csv(f, index=False, header=False)
+
+    os.replace(temporal, ruta)
+    return ruta
+
+
+def obtener_archivo(filas: int, directorio: str, diseno: str = 'desplazado', semilla: int = 0,
+                    regenerar: bool = False) -> str:
+    """Ruta del CSV sintético para un tamaño, generándolo solo si no existe"""
+    os.makedirs(directorio, exist_ok=True)
+    ruta = os.path.join(directorio, f"ventas_{diseno}_{filas}_s{semilla}.csv")
+    if regenerar or not os.path.exists(ruta):
+        print(f"🏭 Generando {filas:,} filas sintéticas ({diseno}) en {ruta}...")
+        generar_ventas_sinteticas(filas, ruta, diseno, semilla)
+    return ruta
+
+
+def _argumentos(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(description="Generador de CSV sintéticos de ventas")
+    parser.add_argument('filas', type=int)
+    parser.add_argument('salida')
+    parser.add_argument('--diseno', choices=['desplazado', 'estandar'], default='desplazado')
+    parser.add_argument('--semilla', type=int, default=0)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    argumentos = _argumentos()
+    generar_ventas_sinteticas(argumentos.filas, argumentos.salida, argumentos.diseno, argumentos.semilla)
+    print(f"✅ {argumentos.filas:,} filas escritas en {argumentos.salida}")
@@ -0,0 +1,288 @@
+import hashlib
+import importlib.util
+import io
+import json
+import os
+import shutil
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from limpieza_automatizada import LimpiezaAutomatizada
+
+# Módulos cuyo código determina el resultado limpio
+MODULOS_LIMPIEZA = [
+    'limpieza_automatizada', 'deduplicacion', 'huellas', 'inferencia_tipos', 'normalizacion_fechas',
+    'normalizacion_texto', 'reglas_validacion', 'representacion_compacta', 'resolucion_geografica'
+]
+
+# Secciones de la configuración que no cambian el resultado limpio (consola, eventos,
+# perfiles, caché de textos): no forman parte de la huella
+SECCIONES_SIN_EFECTO = ['instrumentacion', 'archivo_cache_texto']
+
+
+def huella_codigo() -> str:
+    """Huella del código de limpieza: un cambio en estos módulos invalida las entradas anteriores"""
+    resumen = hashlib.sha256()
+    for modulo in MODULOS_LIMPIEZA:
+        with open(importlib.util.find_spec(modulo).origin, 'rb') as f:
+            resumen.update(f.read())
+    return resumen.hexdigest()
+
+
+def huella_configuracion(config_limpieza: Dict) -> str:
+    """Huella estable de la configuración de limpieza y del código que la aplica"""
+    relevante = {k: v for k, v in config_limpieza.items() if k not in SECCIONES_SIN_EFECTO}
+    texto = json.dumps(relevante, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256((texto + huella_codigo()).encode('utf-8')).hexdigest()
+
+
+def _huellas_contenido(ruta: str, cortes: List[int], tamano_bloque: int = 1 << 20) -> Tuple[str, Dict[int, str]]:
+    """Calcular en una sola lectura la huella completa y la de cada prefijo indicado"""
+    resumen = hashlib.sha256()
+    pendientes = sorted(set(cortes))
+    prefijos = {}
+    leidos = 0
+
+    with open(ruta, 'rb') as f:
+        while True:
+            limite = tamano_bloque
+            if pendientes:
+                limite = min(limite, pendientes[0] - leidos)
+            bloque = f.read(limite) if limite > 0 else b''
+            if limite > 0 and not bloque:
+                break
+            resumen.update(bloque)
+            leidos += len(bloque)
+            while pendientes and pendientes[0] == leidos:
+                prefijos[pendientes.pop(0)] = resumen.copy().hexdigest()
+
+    return resumen.hexdigest(), prefijos
+
+
+def _concatenar_segmentos(segmentos: List[pd.DataFrame]) -> pd.DataFrame:
+    """Concatenar segmentos conservando las columnas categóricas"""
+    if len(segmentos) == 1:
+        return segmentos[0]
+
+    segmentos = [s.copy() for s in segmentos]
+    for columna in segmentos[0].columns:
+        if all(isinstance(s[columna].dtype, pd.CategoricalDtype) for s in segmentos):
+            categorias = union_categoricals([s[columna] for s in segmentos]).categories
+            for s in segmentos:
+                s[columna] = s[columna].cat.set_categories(categorias)
+
+    return pd.concat(segmentos, ignore_index=True)
+
+
+class CacheLimpieza:
+    """
+    Caché en disco de resultados de limpieza direccionada por contenido.
+
+    Cada entrada se identifica por la huella de la configuración y del contenido
+    del CSV, y guarda la estructura detectada, el mapeo de columnas y el resultado
+    limpio en segmentos. Si el archivo solo creció por el final, se limpia
+    únicamente la cola nueva y se agrega como segmento. Con la deduplicación activa
+    cada segmento guarda también las huellas de sus filas, calculadas antes de
+    compactar, para reconocer en la cola las filas repetidas. Las entradas menos
+    usadas se eliminan cuando se supera `tamano_maximo` bytes.
+    """
+
+    def __init__(self, directorio: str = '.cache_limpieza', tamano_maximo: int = 2 * 1024 ** 3):
+        self.directorio = directorio
+        self.tamano_maximo = tamano_maximo
+        os.makedirs(directorio, exist_ok=True)
+        self.archivo_indice = os.path.join(directorio, 'indice.json')
+
+    # ------------------------------------------------------------------ índice
+    def _leer_json(self, ruta: str) -> Dict:
+        if not os.path.exists(ruta):
+            return {}
+        with open(ruta, encoding='utf-8') as f:
+            return json.load(f)
+
+    def _escribir_json(self, ruta: str, datos: Dict):
+        temporal = f"{ruta}.tmp"
+        with open(temporal, 'w', encoding='utf-8') as f:
+            json.dump(datos, f, ensure_ascii=False, default=str)
+        os.replace(temporal, ruta)
+
+    def _entradas(self) -> Dict[str, Dict]:
+        """Leer los manifiestos de todas las entradas"""
+        entradas = {}
+        for nombre in os.listdir(self.directorio):
+            manifiesto = os.path.join(self.directorio, nombre, 'manifiesto.json')
+            if os.path.exists(manifiesto):
+                entradas[nombre] = self._leer_json(manifiesto)
+        return entradas
+
+    def _huella_archivo(self, ruta: str, cortes: List[int]) -> Tuple[str, Dict[int, str]]:
+        """Huella del archivo reutilizando la última si tamaño y mtime no cambiaron"""
+        estado = os.stat(ruta)
+        indice = self._leer_json(self.archivo_indice)
+        conocido = indice.get(os.path.abspath(ruta))
+
+        if conocido and conocido['tamano'] == estado.st_size and conocido['mtime_ns'] == estado.st_mtime_ns:
+            return conocido['sha256'], {}
+
+        sha256, prefijos = _huellas_contenido(ruta, cortes)
+        indice[os.path.abspath(ruta)] = {'tamano': estado.st_size, 'mtime_ns': estado.st_mtime_ns, 'sha256': sha256}
+        self._escribir_json(self.archivo_indice, indice)
+        return sha256, prefijos
+
+    # --------------------------------------------------------------- segmentos
+    def _guardar_segmento(self, directorio_entrada: str, df: pd.DataFrame, indice: int,
+                          huellas: Optional[np.ndarray] = None) -> Dict:
+        segmento = {'archivo': f"segmento_{indice:05d}.pkl"}
+        df.to_pickle(os.path.join(directorio_entrada, segmento['archivo']))
+        if huellas is not None:
+            segmento['huellas'] = f"segmento_{indice:05d}.huellas.npy"
+            np.save(os.path.join(directorio_entrada, segmento['huellas']), huellas)
+        return segmento
+
+    def _cargar_huellas(self, directorio_entrada: str, manifiesto: Dict) -> Optional[np.ndarray]:
+        """Huellas de las filas ya limpias de todos los segmentos (None si no se guardaron)"""
+        huellas = [np.load(os.path.join(directorio_entrada, s['huellas']))
+                   for s in manifiesto['segmentos'] if s.get('huellas')]
+        return np.concatenate(huellas) if huellas else None
+
+    def _cargar_resultado(self, directorio_entrada: str, manifiesto: Dict) -> pd.DataFrame:
+        segmentos = [pd.read_pickle(os.path.join(directorio_entrada, s['archivo'])) for s in manifiesto['segmentos']]
+        return _concatenar_segmentos(segmentos)
+
+    def _tamano_entrada(self, directorio_entrada: str) -> int:
+        return sum(os.path.getsize(os.path.join(directorio_entrada, n)) for n in os.listdir(directorio_entrada))
+
+    def _desalojar(self, conservar: str, limpiador: LimpiezaAutomatizada):
+        """Eliminar las entradas menos usadas hasta respetar el tamaño máximo"""
+        entradas = self._entradas()
+        tamanos = {n: self._tamano_entrada(os.path.join(self.directorio, n)) for n in entradas}
+        total = sum(tamanos.values())
+
+        for nombre in sorted(entradas, key=lambda n: entradas[n].get('ultimo_uso', 0)):
+            if total <= self.tamano_maximo:
+                break
+            if nombre == conservar:
+                continue
+            shutil.rmtree(os.path.join(self.directorio, nombre), ignore_errors=True)
+            total -= tamanos[nombre]
+            limpiador._imprimir(f"   🗑️  Entrada de caché desalojada: {nombre}")
+
+    # --------------------------------------------------------------- limpieza
+    def _limpiar_cola(self, limpiador: LimpiezaAutomatizada, inicio: int, mapeo: Optional[Dict],
+                      plan_ingesta: Optional[Dict] = None,
+                      huellas_previas: Optional[np.ndarray] = None) -> Tuple[pd.DataFrame, np.ndarray, Dict]:
+        """Limpiar solo los bytes agregados al final del archivo; devuelve la cola, sus huellas y estadísticas"""
+        with open(limpiador.archivo_csv, 'rb') as f:
+            encabezado = f.readline()
+            f.seek(inicio)
+            cola = f.read()
+
+        fuente = io.BytesIO(encabezado + cola)
+        if plan_ingesta:
+            limpiador.plan_ingesta = plan_ingesta
+            df = limpiador._leer_con_plan(fuente, mapeo)
+        else:
+            df = pd.read_csv(fuente, low_memory=False)
+        registros_originales = len(df)
+
+        limpiador._liberar_deduplicador()
+        # La cuarentena de la cola se anexa a la de la limpieza anterior
+        limpiador._cuarentena_escrita = True
+        try:
+            # Las filas de la cola repetidas en los segmentos ya limpios también son duplicados
+            deduplicador = limpiador._obtener_deduplicador()
+            if deduplicador is not None and huellas_previas is not None:
+                deduplicador.registrar_huellas(huellas_previas)
+            df = limpiador._procesar_bloque(df, mapeo, desde_plan=plan_ingesta is not None)
+            huellas = limpiador._huellas_bloque
+        finally:
+            limpiador._liberar_deduplicador()
+        df = limpiador._eliminar_columnas_duplicadas(df)
+        df, reporte_memoria = limpiador._compactar_memoria(df)
+        estadisticas = limpiador._estadisticas_bloque(df, registros_originales)
+        if reporte_memoria:
+            estadisticas['memoria'] = reporte_memoria
+        return df, huellas, estadisticas
+
+    def limpiar(self, limpiador: LimpiezaAutomatizada) -> pd.DataFrame:
+        """Devolver el resultado limpio desde la caché o limpiar y almacenarlo"""
+        archivo = limpiador.archivo_csv
+        huella_config = huella_configuracion(limpiador.config_limpieza)
+        tamano_actual = os.path.getsize(archivo)
+
+        candidatas = {
+            nombre: m for nombre, m in self._entradas().items()
+            if m['huella_configuracion'] == huella_config and m['tamano'] <= tamano_actual
+        }
+        sha256, prefijos = self._huella_archivo(archivo, [m['tamano'] for m in candidatas.values()])
+        nombre_entrada = f"{huella_config[:16]}_{sha256[:16]}"
+        directorio_entrada = os.path.join(self.directorio, nombre_entrada)
+
+        # 1. ACIERTO EXACTO: mismo contenido y misma configuración
+        if nombre_entrada in candidatas:
+            manifiesto = candidatas[nombre_entrada]
+            limpiador._imprimir(f"⚡ Resultado recuperado de caché ({manifiesto['estadisticas']['registros_finales']:,} registros)")
+            limpiador.df = self._cargar_resultado(directorio_entrada, manifiesto)
+            limpiador.estadisticas_limpieza = manifiesto['estadisticas']
+            manifiesto['ultimo_uso'] = time.time()
+            self._escribir_json(os.path.join(directorio_entrada, 'manifiesto.json'), manifiesto)
+            return limpiador.df
+
+        # 2. ACIERTO PARCIAL: el archivo cacheado es un prefijo del actual (se agregaron filas)
+        cortes = [m['tamano'] for m in candidatas.values() if m['tamano'] < tamano_actual]
+        if cortes and not prefijos:
+            _, prefijos = _huellas_contenido(archivo, cortes)
+        previa = None
+        for nombre, manifiesto in sorted(candidatas.items(), key=lambda item: -item[1]['tamano']):
+            if prefijos.get(manifiesto['tamano']) == manifiesto['sha256'] and manifiesto.get('termina_en_linea'):
+                previa = (nombre, manifiesto)
+                break
+
+        if previa is not None:
+            nombre_previo, manifiesto = previa
+            limpiador._imprimir(f"♻️  Archivo ampliado: se limpian solo {tamano_actual - manifiesto['tamano']:,} bytes nuevos")
+            os.replace(os.path.join(self.directorio, nombre_previo), directorio_entrada)
+
+            df_previo = self._cargar_resultado(directorio_entrada, manifiesto)
+            df_cola, huellas_cola, estadisticas_cola = self._limpiar_cola(
+                limpiador, manifiesto['tamano'], manifiesto['mapeo'], manifiesto['estructura'].get('plan_ingesta'),
+                self._cargar_huellas(directorio_entrada, manifiesto)
+            )
+            segmento = self._guardar_segmento(directorio_entrada, df_cola, len(manifiesto['segmentos']), huellas_cola)
+            segmento.update({'inicio': manifiesto['tamano'], 'fin': tamano_actual})
+            manifiesto['segmentos'].append(segmento)
+            manifiesto['estadisticas'] = LimpiezaAutomatizada._combinar_estadisticas(
+                manifiesto['estadisticas'], estadisticas_cola
+            )
+            limpiador.df = _concatenar_segmentos([df_previo, df_cola])
+        else:
+            # 3. FALLO: limpieza completa
+            estructura = limpiador.detectar_estructura()
+            mapeo = estructura.get('mapeo_propuesto')
+            df = limpiador.aplicar_limpieza(mapeo)
+            if df.empty:
+                return df
+
+            os.makedirs(directorio_entrada, exist_ok=True)
+            manifiesto = {
+                'huella_configuracion': huella_config,
+                'estructura': estructura,
+                'mapeo': mapeo,
+                'segmentos': [dict(self._guardar_segmento(directorio_entrada, df, 0, limpiador.huellas_resultado),
+                                   inicio=0, fin=tamano_actual)],
+                'estadisticas': limpiador.estadisticas_limpieza
+            }
+
+        with open(archivo, 'rb') as f:
+            f.seek(max(tamano_actual - 1, 0))
+            manifiesto['termina_en_linea'] = f.read(1) == b'\n'
+        manifiesto.update({'archivo_origen': os.path.abspath(archivo), 'tamano': tamano_actual,
+                           'sha256': sha256, 'ultimo_uso': time.time()})
+        limpiador.estadisticas_limpieza = manifiesto['estadisticas']
+        self._escribir_json(os.path.join(directorio_entrada, 'manifiesto.json'), manifiesto)
+        self._desalojar(conservar=nombre_entrada, limpiador=limpiador)
+        return limpiador.df
@@ -0,0 +1,382 @@
+import argparse
+import copy
+import io
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError as TiempoAgotado
+from typing import Dict, Optional
+
+import pandas as pd
+
+from deduplicacion import DeduplicadorFilas
+from limpieza_automatizada import LimpiezaAutomatizada
+from limpieza_paralela import _calcular_particiones, _leer_encabezado
+from modelo_estrella import huella_archivo
+
+# Marca de fin de la cola entre la extracción y la carga
+FIN = object()
+# Intervalo con el que las esperas bloqueantes revisan la cancelación
+INTERVALO_CANCELACION = 0.1
+
+
+def _limpiar_bloque(tarea: Dict) -> Dict:
+    """Limpiar un bloque de bytes del CSV (se ejecuta en un proceso del pool)"""
+    inicio = time.perf_counter()
+    limpiador = LimpiezaAutomatizada(tarea['archivo'], tarea['config_limpieza'])
+    instrumentador = limpiador.instrumentador
+    instrumentador.silencioso = True
+    # La cuarentena vuelve con el resultado: la escribe el proceso principal en orden
+    limpiador.cuarentena_en_archivo = False
+
+    with instrumentador.con_contexto(archivo=tarea['archivo'], bloque=tarea['indice'] + 1):
+        with instrumentador.etapa('lectura') as etapa:
+            fuente = io.BytesIO(tarea['encabezado'] + tarea['contenido'])
+            if tarea['plan_ingesta']:
+                limpiador.plan_ingesta = tarea['plan_ingesta']
+                df = limpiador._leer_con_plan(fuente, tarea['mapeo'], motor='c')
+            else:
+                df = pd.read_csv(fuente, low_memory=False)
+            etapa.salida(df)
+        registros_originales = len(df)
+        try:
+            df = limpiador._procesar_bloque(df, tarea['mapeo'], desde_plan=limpiador.plan_ingesta is not None)
+            df = limpiador._eliminar_columnas_duplicadas(df)
+            huellas = limpiador._huellas_bloque
+        finally:
+            limpiador._liberar_deduplicador()
+
+    instrumentador.cerrar()
+    return {
+        'df': df,
+        'huellas': huellas,
+        'cuarentena': limpiador.cuarentena,
+        'estadisticas': limpiador._estadisticas_bloque(df, registros_originales),
+        'segundos': time.perf_counter() - inicio
+    }
+
+
+# ------------------------------------------------------------------- destinos
+class DestinoCSV:
+    """Escribe los bloques limpios en un CSV; el archivo final aparece solo si todo terminó bien"""
+
+    def __init__(self, archivo_salida: str):
+        self.archivo_salida = archivo_salida
+        self._temporal = f"{archivo_salida}.parcial"
+        self._columnas = None
+        self._formato_fecha = None
+
+    def abrir(self, limpiador: LimpiezaAutomatizada):
+        self._formato_fecha = limpiador.config_limpieza['reglas_limpieza']['fecha'].get('formato_salida')
+        self._columnas = None
+
+    def escribir(self, df: pd.DataFrame):
+        anexar = self._columnas is not None
+        if anexar:
+            df = df.reindex(columns=self._columnas)
+        else:
+            self._columnas = df.columns.tolist()
+        df.to_csv(self._temporal, index=False, encoding='utf-8', mode='a' if anexar else 'w',
+                  header=not anexar, date_format=self._formato_fecha)
+
+    def cerrar(self, exito: bool):
+        if exito and os.path.exists(self._temporal):
+            os.replace(self._temporal, self.archivo_salida)
+        elif os.path.exists(self._temporal):
+            os.remove(self._temporal)
+
+
+class DestinoModeloEstrella:
+    """
+    Anexa cada bloque limpio al modelo estrella en PostgreSQL (una transacción por bloque).
+
+    Todos los bloques se filtran con la marca de agua previa al archivo, de modo que
+    el orden de las fechas entre bloques no descarta filas. Cada bloque persiste solo
+    los mapas de claves y las filas del archivo ya cargadas; la marca de agua y la
+    huella (modo 'archivo') se fijan al terminar sin errores. Si la ejecución falla,
+    la siguiente con el mismo archivo y configuración salta las filas ya cargadas y
+    carga el resto.
+    """
+
+    def __init__(self, constructor, cargador, cubo=None, huella: Optional[str] = None):
+        self.constructor = constructor
+        self.cargador = cargador
+        self.cubo = cubo
+        self.huella = huella
+        self._archivo = None
+        self._sin_instrumentador = []
+        self._marca_agua = None
+        self._omitir = False
+        self._diferir_previo = False
+        self._filas_cargadas = 0
+        self._filas_entregadas = 0
+
+    def abrir(self, limpiador: LimpiezaAutomatizada):
+        # Sin instrumentador propio, los componentes siguen el modo silencioso de la canalización
+        self._sin_instrumentador = [componente for componente in (self.constructor, self.cargador, self.cubo)
+                                    if componente is not None and componente.instrumentador is None]
+        for componente in self._sin_instrumentador:
+            componente.instrumentador = limpiador.instrumentador
+        self._diferir_previo = self.cargador.diferir_analisis
+        self.cargador.diferir_analisis = True
+        self._omitir = (self.constructor.modo_incremental == 'archivo'
+                        and self.huella in self.constructor.huellas_procesadas)
+        if self._omitir:
+            limpiador._imprimir(f"   ℹ️  Archivo ya procesado ({self.huella[:12]}...), no se carga")
+            return
+
+        self._archivo = self.huella or huella_archivo(limpiador.archivo_csv)
+        avance = self.constructor.iniciar_archivo(self._archivo)
+        # NaT: sin marca previa, ningún bloque se filtra por la marca de los anteriores
+        marca = avance['marca_previa']
+        self._marca_agua = pd.Timestamp(marca) if marca is not None else pd.NaT
+        self._filas_cargadas = avance['filas']
+        self._filas_entregadas = 0
+
+    def escribir(self, df: pd.DataFrame):
+        if self._omitir:
+            return
+        inicio = self._filas_entregadas
+        self._filas_entregadas += len(df)
+        if inicio < self._filas_cargadas:
+            # Filas ya cargadas por la ejecución interrumpida
+            df = df.iloc[self._filas_cargadas - inicio:]
+        if not len(df):
+            return
+        self.constructor.cargar_incremental(df, self.cargador, cubo=self.cubo, marca_agua=self._marca_agua,
+                                            archivo=self._archivo, filas_archivo=self._filas_entregadas)
+
+    def cerrar(self, exito: bool):
+        # Los bloques ya confirmados se analizan aunque la canalización haya fallado
+        self.cargador.diferir_analisis = self._diferir_previo
+        self.cargador.analizar_pendientes()
+        if exito and not self._omitir:
+            self.constructor.terminar_archivo(self._archivo, self.huella)
+        for componente in self._sin_instrumentador:
+            componente.instrumentador = None
+        self._sin_instrumentador = []
+
+
+# ---------------------------------------------------------------- canalización
+class CanalizacionETL:
+    """
+    Extracción, limpieza y carga solapadas por bloques.
+
+    - Un hilo lee el CSV en bloques de bytes alineados a fin de línea y los envía
+      al pool de procesos, que limpia varios bloques a la vez (trabajo de CPU).
+    - Otro hilo recibe los bloques limpios en el orden del archivo, quita los
+      duplicados entre bloques, escribe la cuarentena y entrega cada bloque al
+      destino (CSV o PostgreSQL) mientras se leen y limpian los siguientes.
+
+    La cola entre ambos hilos está acotada a `bloques_en_vuelo`: si la limpieza o
+    la carga se atrasan, la lectura espera, y la memoria depende de ese número y no
+    del tamaño del archivo. Con las etapas solapadas el tiempo total tiende al de
+    la etapa más lenta. Un error en cualquier etapa cancela las demás y se relanza
+    en `ejecutar()`; `cancelar()` detiene la ejecución desde otro hilo.
+    """
+
+    def __init__(self, config_limpieza: Dict = None, num_workers: Optional[int] = None,
+                 tamano_bloque: int = 16 * 1024 * 1024, bloques_en_vuelo: Optional[int] = None):
+        self.config_limpieza = config_limpieza
+        self.num_workers = num_workers or os.cpu_count() or 1
+        self.tamano_bloque = tamano_bloque
+        self.bloques_en_vuelo = bloques_en_vuelo or self.num_workers + 1
+        self.metricas: Dict[str, float] = {}
+        self._cancelado = threading.Event()
+        self._error: Optional[BaseException] = None
+        self._candado = threading.Lock()
+
+    def cancelar(self):
+        """Pedir la detención de todas las etapas (seguro desde cualquier hilo)"""
+        self._cancelado.set()
+
+    def _fallar(self, error: BaseException):
+        """Registrar el primer error de una etapa y cancelar las demás"""
+        with self._candado:
+            if self._error is None:
+                self._error = error
+        self.cancelar()
+
+    # ------------------------------------------------- esperas cancelables
+    def _poner(self, cola: queue.Queue, elemento) -> bool:
+        while not self._cancelado.is_set():
+            try:
+                cola.put(elemento, timeout=INTERVALO_CANCELACION)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _tomar(self, cola: queue.Queue):
+        while not self._cancelado.is_set():
+            try:
+                return cola.get(timeout=INTERVALO_CANCELACION)
+            except queue.Empty:
+                continue
+        return FIN
+
+    def _esperar(self, futuro: Future) -> Optional[Dict]:
+        while not self._cancelado.is_set():
+            try:
+                return futuro.result(timeout=INTERVALO_CANCELACION)
+            except TiempoAgotado:
+                continue
+        futuro.cancel()
+        return None
+
+    # ------------------------------------------------------------- etapas
+    def _extraer(self, pool: ProcessPoolExecutor, cola: queue.Queue, archivo: str, estructura: Dict,
+                 config_workers: Dict):
+        """Hilo de lectura: bloques de bytes al pool y sus futuros, en orden, a la cola"""
+        try:
+            encabezado = _leer_encabezado(archivo)
+            with open(archivo, 'rb') as f:
+                for indice, (inicio, fin) in enumerate(_calcular_particiones(archivo, self.tamano_bloque)):
+                    if self._cancelado.is_set():
+                        return
+                    comienzo = time.perf_counter()
+                    f.seek(inicio)
+                    contenido = f.read(fin - inicio)
+                    self.metricas['segundos_extraccion'] += time.perf_counter() - comienzo
+
+                    futuro = pool.submit(_limpiar_bloque, {
+                        'archivo': archivo,
+                        'indice': indice,
+                        'encabezado': encabezado,
+                        'contenido': contenido,
+                        'mapeo': estructura.get('mapeo_propuesto'),
+                        'plan_ingesta': estructura.get('plan_ingesta'),
+                        'config_limpieza': config_workers
+                    })
+                    if not self._poner(cola, futuro):
+                        futuro.cancel()
+                        return
+            self._poner(cola, FIN)
+        except BaseException as e:
+            self._fallar(e)
+
+    def _cargar(self, cola: queue.Queue, limpiador: LimpiezaAutomatizada,
+                deduplicador: Optional[DeduplicadorFilas], destino):
+        """Hilo de carga: bloques limpios en orden → duplicados, cuarentena y destino"""
+        try:
+            numero_bloque = 0
+            while True:
+                futuro = self._tomar(cola)
+                if futuro is FIN:
+                    return
+                resultado = self._esperar(futuro)
+                if resultado is None:
+                    return
+                numero_bloque += 1
+                self.metricas['segundos_limpieza'] += resultado['segundos']
+
+                comienzo = time.perf_counter()
+                df, estadisticas = resultado['df'], resultado['estadisticas']
+                if deduplicador is not None and resultado['huellas'] is not None:
+                    # Duplicados entre bloques: cada proceso solo vio su propio bloque
+                    conservar = deduplicador.mascara_nuevas(resultado['huellas'])
+                    if not conservar.all():
+                        estadisticas = LimpiezaAutomatizada._descontar_duplicados(estadisticas, df[~conservar])
+                        df = df[conservar]
+                if resultado['cuarentena'] is not None and len(resultado['cuarentena']):
+                    limpiador._escribir_cuarentena(resultado['cuarentena'])
+
+                destino.escribir(df)
+                limpiador.estadisticas_limpieza = LimpiezaAutomatizada._combinar_estadisticas(
+                    limpiador.estadisticas_limpieza, estadisticas
+                )
+                self.metricas['segundos_carga'] += time.perf_counter() - comienzo
+                limpiador._imprimir(f"   📦 Bloque {numero_bloque}: {len(df):,} filas cargadas")
+        except BaseException as e:
+            self._fallar(e)
+
+    # ---------------------------------------------------------- ejecución
+    def ejecutar(self, archivo_csv: str, destino) -> Dict:
+        """Limpiar y cargar un CSV con las etapas solapadas; devuelve estadísticas y métricas"""
+        self._cancelado.clear()
+        self._error = None
+        self.metricas = {'segundos_extraccion': 0.0, 'segundos_limpieza': 0.0, 'segundos_carga': 0.0}
+
+        limpiador = LimpiezaAutomatizada(archivo_csv, self.config_limpieza)
+        limpiador._imprimir(f"\n🚀 CANALIZACIÓN ETL: {self.num_workers} procesos de limpieza, "
+                            f"bloques de {self.tamano_bloque / 1024 ** 2:,.0f} MB")
+        estructura = limpiador.detectar_estructura()
+        limpiador._iniciar_validacion()
+        limpiador.estadisticas_limpieza = {}
+
+        # Los procesos no escriben la cuarentena: la escribe el hilo de carga en orden
+        config_workers = copy.deepcopy(limpiador.config_limpieza)
+        config_workers['reglas_limpieza']['archivo_cuarentena'] = None
+        deduplicador = DeduplicadorFilas.desde_configuracion(limpiador.config_limpieza.get('deduplicacion'))
+
+        cola = queue.Queue(maxsize=self.bloques_en_vuelo)
+        pool = ProcessPoolExecutor(max_workers=self.num_workers)
+        hilos = [
+            threading.Thread(target=self._extraer, name='extraccion', daemon=True,
+                             args=(pool, cola, archivo_csv, estructura, config_workers)),
+            threading.Thread(target=self._cargar, name='carga', daemon=True,
+                             args=(cola, limpiador, deduplicador, destino))
+        ]
+
+        inicio = time.perf_counter()
+        exito = False
+        try:
+            destino.abrir(limpiador)
+            for hilo in hilos:
+                hilo.start()
+            for hilo in hilos:
+                while hilo.is_alive():
+                    hilo.join(timeout=INTERVALO_CANCELACION)
+            exito = self._error is None and not self._cancelado.is_set()
+        except BaseException:
+            # Ctrl+C u otro error en el hilo principal: detener las etapas antes de salir
+            self.cancelar()
+            for hilo in hilos:
+                hilo.join()
+            raise
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+            if deduplicador is not None:
+                deduplicador.cerrar()
+            destino.cerrar(exito)
+            limpiador._terminar_cuarentena(exito)
+            limpiador._obtener_normalizador_texto().guardar_cache()
+            self.metricas['segundos_total'] = time.perf_counter() - inicio
+
+        if self._error is not None:
+            raise self._error
+
+        estadisticas = limpiador.estadisticas_limpieza
+        if not exito:
+            limpiador._imprimir("⏹️  Canalización cancelada: el destino conserva solo los bloques ya cargados")
+        elif estadisticas:
+            limpiador._mostrar_resumen_limpieza()
+        limpiador._imprimir(
+            f"\n⏱️  Extracción {self.metricas['segundos_extraccion']:.2f}s | "
+            f"Limpieza {self.metricas['segundos_limpieza']:.2f}s (en {self.num_workers} procesos) | "
+            f"Carga {self.metricas['segundos_carga']:.2f}s | Total {self.metricas['segundos_total']:.2f}s"
+        )
+        return {'estadisticas_limpieza': estadisticas, 'metricas': dict(self.metricas), 'cancelada': not exito}
+
+
+def limpiar_y_cargar(archivo_csv: str, destino, num_workers: Optional[int] = None,
+                     tamano_bloque: int = 16 * 1024 * 1024, config_limpieza: Dict = None) -> Dict:
+    """
+    Uso rápido: limpiar un CSV y entregarlo a un destino con las etapas solapadas
+    (DestinoCSV o DestinoModeloEstrella)
+    """
+    canalizacion = CanalizacionETL(config_limpieza, num_workers=num_workers, tamano_bloque=tamano_bloque)
+    return canalizacion.ejecutar(archivo_csv, destino)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Limpieza y carga solapadas por bloques")
+    parser.add_argument('archivo_csv')
+    parser.add_argument('archivo_salida', help="CSV limpio de salida")
+    parser.add_argument('--workers', type=int, default=None, help="Procesos de limpieza (por defecto, CPUs)")
+    parser.add_argument('--tamano-bloque-mb', type=int, default=16)
+    argumentos = parser.parse_args()
+
+    limpiar_y_cargar(argumentos.archivo_csv, DestinoCSV(argumentos.archivo_salida),
+                     num_workers=argumentos.workers, tamano_bloque=argumentos.tamano_bloque_mb * 1024 * 1024)
@@ -0,0 +1,397 @@
+import io
+import os
+import time
+from typing import Callable, Dict, Optional
+
+import pandas as pd
+
+from diseno_fisico import DisenoFisicoVentas
+from instrumentacion import Instrumentador
+
+# Definición de tablas según sql/Riwi_Ventas_Script_PostgreSQL.sql
+TABLAS_MODELO = {
+    'dim_producto': {
+        'columnas': [('producto', 'text'), ('tipo_producto', 'text'), ('id_producto', 'bigint NOT NULL')],
+        'clave_primaria': 'id_producto'
+    },
+    'dim_geografia': {
+        'columnas': [('ciudad', 'text'), ('pais', 'text'), ('id_geografia', 'bigint NOT NULL')],
+        'clave_primaria': 'id_geografia'
+    },
+    'dim_canal': {
+        'columnas': [('tipo_venta', 'text'), ('tipo_cliente', 'text'), ('id_canal', 'bigint NOT NULL')],
+        'clave_primaria': 'id_canal'
+    },
+    'fact_ventas': {
+        'columnas': [
+            ('fecha', 'timestamp without time zone'),
+            ('id_producto', 'bigint'),
+            ('id_geografia', 'bigint'),
+            ('id_canal', 'bigint'),
+            ('cantidad', 'double precision'),
+            ('precio_unitario', 'double precision'),
+            ('descuento', 'double precision'),
+            ('costo_envio', 'double precision'),
+            ('total_ventas', 'double precision')
+        ],
+        'clave_primaria': None
+    }
+}
+
+CLAVES_FORANEAS = [
+    ('fk_producto', 'id_producto', 'dim_producto'),
+    ('fk_geografia', 'id_geografia', 'dim_geografia'),
+    ('fk_canal', 'id_canal', 'dim_canal')
+]
+
+
+def _clave_primaria_sql(definicion: Dict) -> Optional[str]:
+    """Lista de columnas de la clave primaria (una columna o una tupla de columnas)"""
+    clave = definicion.get('clave_primaria')
+    if not clave:
+        return None
+    columnas = [clave] if isinstance(clave, str) else list(clave)
+    return ', '.join(f'"{c}"' for c in columnas)
+
+
+def crear_conexion_desde_entorno():
+    """Abrir una conexión psycopg2 con las variables DB_* del archivo .env"""
+    import psycopg2
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    variables = ['DB_USER', 'DB_PASSWORD', 'DB_HOST', 'DB_PORT', 'DB_NAME']
+    if not all(os.getenv(v) for v in variables if v != 'DB_PASSWORD'):
+        raise ValueError("❌ Faltan variables en el archivo .env")
+
+    return psycopg2.connect(
+        user=os.getenv('DB_USER'), password=os.getenv('DB_PASSWORD'),
+        host=os.getenv('DB_HOST'), port=os.getenv('DB_PORT'), dbname=os.getenv('DB_NAME')
+    )
+
+
+class _FlujoCSV(io.RawIOBase):
+    """Archivo de solo lectura que genera CSV por bloques de filas bajo demanda (sin archivos temporales)"""
+
+    def __init__(self, df: pd.DataFrame, filas_por_bloque: int = 50000):
+        self.df = df
+        self.filas_por_bloque = filas_por_bloque
+        self.posicion = 0
+        self.pendiente = b''
+
+    def readable(self) -> bool:
+        return True
+
+    def _siguiente_bloque(self) -> bytes:
+        bloque = self.df.iloc[self.posicion:self.posicion + self.filas_por_bloque]
+        self.posicion += self.filas_por_bloque
+        return bloque.to_csv(index=False, header=False, na_rep='',
+                             date_format='%Y-%m-%d %H:%M:%S').encode('utf-8')
+
+    def readinto(self, destino) -> int:
+        while not self.pendiente and self.posicion < len(self.df):
+            self.pendiente = self._siguiente_bloque()
+        cantidad = min(len(destino), len(self.pendiente))
+        destino[:cantidad] = self.pendiente[:cantidad]
+        self.pendiente = self.pendiente[cantidad:]
+        return cantidad
+
+
+class CargadorPostgreSQL:
+    """
+    Carga masiva del modelo estrella con COPY ... FROM STDIN.
+
+    Cada tabla se carga en una tabla de staging, se crea su clave primaria y todas
+    las tablas se intercambian con las definitivas en una sola transacción, de modo
+    que los lectores ven el modelo anterior o el nuevo, nunca una mezcla. Las
+    claves foráneas se crean al final, con todos los datos ya cargados. Con
+    wal_level=minimal el COPY a una tabla creada en la misma transacción no
+    escribe WAL.
+
+    `tablas_sin_registro=True` crea las tablas como UNLOGGED y las deja así: el
+    COPY no escribe WAL en ningún caso, pero tras una caída PostgreSQL vacía esas
+    tablas y no se replican. Úselo solo si el modelo se puede volver a cargar.
+    (Pasarlas a LOGGED después reescribiría la tabla completa en el WAL.)
+
+    Con `diseno_fisico` (DisenoFisicoVentas) fact_ventas se crea particionada por
+    mes con sus índices, y las particiones que falten se crean en cada carga.
+
+    Los mensajes de progreso pasan por `instrumentador` (sin él, por consola), de
+    modo que el modo silencioso de la limpieza también los apaga.
+    """
+
+    def __init__(self, conexion, esquema: str = 'public', filas_por_bloque: int = 50000,
+                 diseno_fisico: Optional[DisenoFisicoVentas] = None, tablas_sin_registro: bool = False,
+                 instrumentador: Optional[Instrumentador] = None):
+        # Se acepta una conexión psycopg2 o un Engine de SQLAlchemy
+        self.conexion = conexion.raw_connection() if hasattr(conexion, 'raw_connection') else conexion
+        self.esquema = esquema
+        self.filas_por_bloque = filas_por_bloque
+        self.diseno_fisico = diseno_fisico
+        self.tablas_sin_registro = tablas_sin_registro
+        self.instrumentador = instrumentador
+        self.metricas_carga: Dict[str, Dict] = {}
+        # Con anexos seguidos (p. ej. bloques de una canalización) el ANALYZE se hace una vez al final
+        self.diferir_analisis = False
+        self._particiones_pendientes: Dict[str, list] = {}
+
+    def _imprimir(self, *mensaje):
+        """Mensaje de progreso en consola (se omite con un instrumentador silencioso)"""
+        if self.instrumentador is None:
+            print(*mensaje)
+        else:
+            self.instrumentador.imprimir(*mensaje)
+
+    def _particionada(self, tabla: str) -> bool:
+        return self.diseno_fisico is not None and tabla == self.diseno_fisico.tabla
+
+    def _nombre(self, tabla: str) -> str:
+        return f'"{self.esquema}"."{tabla}"'
+
+    def _copiar(self, cursor, tabla: str, df: pd.DataFrame, columnas):
+        """Enviar el DataFrame al servidor con COPY generando el CSV en memoria por bloques"""
+        columnas_sql = ', '.join(f'"{c}"' for c in columnas)
+        # STREAMING DEL CSV EN MEMORIA DIRECTAMENTE AL SERVIDOR
+        cursor.copy_expert(
+            f"COPY {self._nombre(tabla)} ({columnas_sql}) FROM STDIN WITH (FORMAT csv)",
+            io.BufferedReader(_FlujoCSV(df[columnas], self.filas_por_bloque), buffer_size=1 << 20)
+        )
+
+    def cargar_tabla(self, tabla: str, df: pd.DataFrame, definicion: Optional[Dict] = None) -> Dict:
+        """Cargar un DataFrame en una tabla mediante staging + COPY + intercambio atómico"""
+        return self.cargar_tablas({tabla: df}, {tabla: definicion} if definicion else None)[tabla]
+
+    def cargar_tablas(self, tablas: Dict[str, pd.DataFrame], definiciones: Optional[Dict[str, Dict]] = None,
+                      claves_foraneas: bool = False) -> Dict[str, Dict]:
+        """
+        Cargar varias tablas en staging y reemplazarlas todas en una sola transacción.
+
+        Si cualquier tabla falla no se reemplaza ninguna. Con `claves_foraneas` las FK
+        de fact_ventas se crean antes del COMMIT, con las tablas nuevas.
+        """
+        definiciones = definiciones or {}
+        metricas = {}
+        try:
+            with self.conexion.cursor() as cursor:
+                for tabla, df in tablas.items():
+                    metricas[tabla] = self._preparar_staging(
+                        cursor, tabla, df, definiciones.get(tabla) or TABLAS_MODELO[tabla]
+                    )
+                # INTERCAMBIO ATÓMICO: todas las tablas cambian en la misma transacción
+                for tabla in tablas:
+                    self._intercambiar(cursor, tabla, definiciones.get(tabla) or TABLAS_MODELO[tabla])
+                if claves_foraneas:
+                    self._crear_claves_foraneas(cursor)
+            self.conexion.commit()
+        except Exception:
+            self.conexion.rollback()
+            raise
+
+        for tabla, metricas_tabla in metricas.items():
+            self.metricas_carga[tabla] = metricas_tabla
+            self._imprimir(f"   ✅ {tabla}: {metricas_tabla['filas']:,} filas en {metricas_tabla['segundos']:.2f}s "
+                           f"({metricas_tabla['filas_por_segundo']:,.0f} filas/s en COPY)")
+        return metricas
+
+    def _preparar_staging(self, cursor, tabla: str, df: pd.DataFrame, definicion: Dict) -> Dict:
+        """Crear la tabla de staging, copiar los datos y construir su clave primaria e índices"""
+        columnas = [nombre for nombre, _ in definicion['columnas']]
+        faltantes = [c for c in columnas if c not in df.columns]
+        if faltantes:
+            raise ValueError(f"Faltan columnas para '{tabla}': {faltantes}")
+
+        staging = f"{tabla}_staging"
+        definicion_sql = ', '.join(f'"{nombre}" {tipo}' for nombre, tipo in definicion['columnas'])
+        particionada = self._particionada(tabla)
+
+        self._imprimir(f"   ⬆️ Cargando {tabla} ({len(df):,} filas) con COPY...")
+        inicio = time.perf_counter()
+
+        cursor.execute(f"DROP TABLE IF EXISTS {self._nombre(staging)} CASCADE")
+        if particionada:
+            # Las tablas particionadas no pueden ser UNLOGGED
+            cursor.execute(self.diseno_fisico.sentencia_crear(self.esquema, staging, definicion_sql))
+            self.diseno_fisico.asegurar_particiones(cursor, self.esquema, staging, df)
+        elif self.tablas_sin_registro:
+            cursor.execute(f"CREATE UNLOGGED TABLE {self._nombre(staging)} ({definicion_sql})")
+        else:
+            cursor.execute(f"CREATE TABLE {self._nombre(staging)} ({definicion_sql})")
+
+        self._copiar(cursor, staging, df, columnas)
+        segundos_copy = time.perf_counter() - inicio
+
+        if particionada:
+            # Índices después del COPY: construirlos una vez es más barato que mantenerlos fila a fila
+            self.diseno_fisico.crear_indices(cursor, self.esquema, staging)
+        if definicion.get('clave_primaria'):
+            cursor.execute(
+                f'ALTER TABLE {self._nombre(staging)} ADD CONSTRAINT "{staging}_pkey" '
+                f'PRIMARY KEY ({_clave_primaria_sql(definicion)})'
+            )
+
+        segundos = time.perf_counter() - inicio
+        return {
+            'filas': len(df),
+            'segundos': segundos,
+            'segundos_copy': segundos_copy,
+            'filas_por_segundo': len(df) / segundos_copy if segundos_copy > 0 else float('inf')
+        }
+
+    def _intercambiar(self, cursor, tabla: str, definicion: Dict):
+        """Reemplazar la tabla definitiva por su staging (dentro de la transacción en curso)"""
+        staging = f"{tabla}_staging"
+        cursor.execute(f"DROP TABLE IF EXISTS {self._nombre(tabla)} CASCADE")
+        cursor.execute(f'ALTER TABLE {self._nombre(staging)} RENAME TO "{tabla}"')
+        if self._particionada(tabla):
+            self.diseno_fisico.renombrar(cursor, self.esquema, staging, tabla)
+        if definicion.get('clave_primaria'):
+            cursor.execute(
+                f'ALTER TABLE {self._nombre(tabla)} RENAME CONSTRAINT "{staging}_pkey" TO "{tabla}_pkey"'
+            )
+        cursor.execute(f"ANALYZE {self._nombre(tabla)}")
+
+    def anexar_tablas(self, tablas: Dict[str, pd.DataFrame],
+                      en_transaccion: Optional[Callable] = None) -> Dict[str, Dict]:
+        """
+        Agregar filas a las tablas del modelo con COPY en una sola transacción (cargas incrementales).
+
+        `en_transaccion(cursor)` se ejecuta tras los COPY y antes del COMMIT, de modo
+        que otras escrituras del mismo lote (p. ej. las tablas resumen) se confirman
+        o se revierten junto con los hechos.
+        """
+        self._imprimir("\n📥 Anexando filas nuevas al modelo estrella...")
+        metricas = {}
+        fact_creada = False
+        particiones_tocadas = {}
+
+        try:
+            with self.conexion.cursor() as cursor:
+                # Orden de TABLAS_MODELO: dimensiones antes que hechos por las FK
+                for tabla in [t for t in TABLAS_MODELO if t in tablas]:
+                    df = tablas[tabla]
+                    definicion = TABLAS_MODELO[tabla]
+                    columnas = [nombre for nombre, _ in definicion['columnas']]
+
+                    cursor.execute("SELECT to_regclass(%s)", (f'"{self.esquema}"."{tabla}"',))
+                    if cursor.fetchone()[0] is None:
+                        definicion_sql = ', '.join(f'"{nombre}" {tipo}' for nombre, tipo in definicion['columnas'])
+                        if definicion.get('clave_primaria'):
+                            definicion_sql += (f', CONSTRAINT "{tabla}_pkey" '
+                                               f'PRIMARY KEY ({_clave_primaria_sql(definicion)})')
+                        if self._particionada(tabla):
+                            cursor.execute(self.diseno_fisico.sentencia_crear(self.esquema, tabla, definicion_sql))
+                            self.diseno_fisico.crear_indices(cursor, self.esquema, tabla)
+                        else:
+                            cursor.execute(f"CREATE TABLE {self._nombre(tabla)} ({definicion_sql})")
+                        fact_creada = fact_creada or tabla == 'fact_ventas'
+
+                    if self._particionada(tabla) and len(df):
+                        particiones_tocadas[tabla] = self.diseno_fisico.asegurar_particiones(
+                            cursor, self.esquema, tabla, df
+                        )
+
+                    inicio = time.perf_counter()
+                    if len(df):
+                        self._copiar(cursor, tabla, df, columnas)
+                    segundos = time.perf_counter() - inicio
+                    metricas[tabla] = {
+                        'filas': len(df),
+                        'segundos': segundos,
+                        'filas_por_segundo': len(df) / segundos if segundos > 0 else 0
+                    }
+                    self._imprimir(f"   ✅ {tabla}: +{len(df):,} filas "
+                                   f"({metricas[tabla]['filas_por_segundo']:,.0f} filas/s)")
+
+                if en_transaccion is not None:
+                    en_transaccion(cursor)
+
+            self.conexion.commit()
+        except Exception:
+            self.conexion.rollback()
+            raise
+
+        if fact_creada:
+            self.crear_claves_foraneas()
+        if particiones_tocadas:
+            if self.diferir_analisis:
+                for tabla, nombres in particiones_tocadas.items():
+                    pendientes = self._particiones_pendientes.setdefault(tabla, [])
+                    pendientes.extend(n for n in nombres if n not in pendientes)
+            else:
+                self.analizar(particiones_tocadas)
+
+        self.metricas_carga.update(metricas)
+        return metricas
+
+    def analizar(self, particiones: Optional[Dict[str, list]] = None):
+        """ANALYZE de las particiones indicadas por tabla, o de todo el modelo si no se indican"""
+        try:
+            with self.conexion.cursor() as cursor:
+                if particiones is None:
+                    for tabla in TABLAS_MODELO:
+                        cursor.execute("SELECT to_regclass(%s)", (f'"{self.esquema}"."{tabla}"',))
+                        if cursor.fetchone()[0] is not None:
+                            cursor.execute(f"ANALYZE {self._nombre(tabla)}")
+                else:
+                    for tabla, nombres in particiones.items():
+                        self.diseno_fisico.analizar(cursor, self.esquema, tabla, nombres)
+                        self._imprimir(f"   📊 ANALYZE de {len(nombres)} particiones de {tabla}")
+            self.conexion.commit()
+        except Exception:
+            self.conexion.rollback()
+            raise
+
+    def analizar_pendientes(self):
+        """ANALYZE de las particiones acumuladas mientras el análisis estaba diferido"""
+        if self._particiones_pendientes:
+            particiones, self._particiones_pendientes = self._particiones_pendientes, {}
+            self.analizar(particiones)
+
+    def particionar_fact_ventas(self) -> Optional[int]:
+        """Migrar una fact_ventas existente sin particionar al diseño particionado y recrear sus FK"""
+        if self.diseno_fisico is None:
+            raise ValueError("Se requiere un diseno_fisico para particionar fact_ventas")
+        definicion = TABLAS_MODELO['fact_ventas']
+        definicion_sql = ', '.join(f'"{nombre}" {tipo}' for nombre, tipo in definicion['columnas'])
+        filas = self.diseno_fisico.migrar(self.conexion, self.esquema, definicion_sql, imprimir=self._imprimir)
+        if filas is not None:
+            self.crear_claves_foraneas()
+        return filas
+
+    def crear_claves_foraneas(self):
+        """Crear las claves foráneas de fact_ventas después de la carga"""
+        try:
+            with self.conexion.cursor() as cursor:
+                self._crear_claves_foraneas(cursor)
+            self.conexion.commit()
+        except Exception:
+            self.conexion.rollback()
+            raise
+
+    def _crear_claves_foraneas(self, cursor):
+        self._imprimir("   🔗 Estableciendo relaciones (Foreign Keys)...")
+        for restriccion, columna, dimension in CLAVES_FORANEAS:
+            cursor.execute(
+                f'ALTER TABLE {self._nombre("fact_ventas")} ADD CONSTRAINT "{restriccion}" '
+                f'FOREIGN KEY ("{columna}") REFERENCES {self._nombre(dimension)} ("{columna}")'
+            )
+
+    def cargar_modelo_estrella(self, dim_producto: pd.DataFrame, dim_geografia: pd.DataFrame,
+                               dim_canal: pd.DataFrame, fact_ventas: pd.DataFrame) -> Dict[str, Dict]:
+        """Cargar dimensiones y hechos y crear las relaciones al final"""
+        self._imprimir("\n🚀 Cargando modelo estrella en PostgreSQL con COPY...")
+        inicio = time.perf_counter()
+
+        # Un solo COMMIT: el modelo nunca queda con unas tablas nuevas y otras anteriores
+        self.cargar_tablas({
+            'dim_producto': dim_producto,
+            'dim_geografia': dim_geografia,
+            'dim_canal': dim_canal,
+            'fact_ventas': fact_ventas
+        }, claves_foraneas=True)
+
+        total_filas = sum(m['filas'] for m in self.metricas_carga.values())
+        segundos = time.perf_counter() - inicio
+        self._imprimir(f"\n🎉 Carga completada: {total_filas:,} filas en {segundos:.2f}s "
+                       f"({total_filas / segundos if segundos > 0 else 0:,.0f} filas/s)")
+        return self.metricas_carga
@@ -0,0 +1,433 @@
+import os
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from instrumentacion import Instrumentador
+from modelo_estrella import DIMENSIONES
+from representacion_compacta import restaurar_punto_fijo
+
+# Granos temporales de menor a mayor; cada uno se obtiene del anterior
+GRANOS = {
+    'dia': ('datetime64[D]', 'day'),
+    'mes': ('datetime64[M]', 'month'),
+    'anio': ('datetime64[Y]', 'year')
+}
+
+# Mismas columnas naturales que DIMENSIONES del modelo estrella
+DIMENSIONES_CUBO = ['producto', 'tipo_producto', 'ciudad', 'pais', 'tipo_venta', 'tipo_cliente']
+
+# Agregados materializados en cada grano, con la forma de las consultas del dashboard.
+# Cruzar todas las dimensiones a la vez casi no reduce filas (una celda por venta),
+# así que cada agregado guarda solo las dimensiones que una consulta necesita.
+AGREGADOS = {
+    'total': [],
+    'producto': ['producto', 'tipo_producto'],
+    'geografia': ['ciudad', 'pais'],
+    'canal': ['tipo_venta', 'tipo_cliente']
+}
+
+MEDIDAS_SUMA = ['cantidad', 'total_ventas', 'costo_envio']
+MEDIDAS_CONTEO = ['registros', 'registros_con_venta']
+MEDIDAS = MEDIDAS_SUMA + MEDIDAS_CONTEO
+
+# Los nulos de dimensión se guardan con un valor fijo para poder usarlos en la clave primaria
+VALOR_SIN_DATO = '(sin dato)'
+PREFIJO_TABLAS = 'resumen_ventas_'
+
+
+def nombre_tabla_resumen(grano: str, agregado: str) -> str:
+    return f"{PREFIJO_TABLAS}{grano}_{agregado}"
+
+
+def definicion_tabla_resumen(dimensiones: Sequence[str] = ()) -> Dict:
+    """Definición de una tabla resumen en el formato de TABLAS_MODELO"""
+    return {
+        'columnas': (
+            [('periodo', 'date NOT NULL')]
+            + [(dimension, 'text NOT NULL') for dimension in dimensiones]
+            + [(medida, 'double precision NOT NULL') for medida in MEDIDAS_SUMA]
+            + [(medida, 'bigint NOT NULL') for medida in MEDIDAS_CONTEO]
+        ),
+        'clave_primaria': ['periodo'] + list(dimensiones)
+    }
+
+
+def _dimensiones(cubo: pd.DataFrame) -> List[str]:
+    """Dimensiones de un cubo, en el orden de sus columnas"""
+    return [columna for columna in cubo.columns if columna in DIMENSIONES_CUBO]
+
+
+def _truncar(fechas, grano: str) -> np.ndarray:
+    """Inicio del día, mes o año de cada fecha"""
+    unidad = GRANOS[grano][0]
+    return np.asarray(fechas, dtype='datetime64[ns]').astype(unidad).astype('datetime64[ns]')
+
+
+def _cubo_vacio(dimensiones: Sequence[str] = ()) -> pd.DataFrame:
+    columnas = {'periodo': pd.Series(dtype='datetime64[ns]')}
+    columnas.update({dimension: pd.Series(dtype=object) for dimension in dimensiones})
+    columnas.update({medida: pd.Series(dtype='float64') for medida in MEDIDAS_SUMA})
+    columnas.update({medida: pd.Series(dtype='int64') for medida in MEDIDAS_CONTEO})
+    return pd.DataFrame(columnas)
+
+
+def _normalizar_cubo(cubo: pd.DataFrame) -> pd.DataFrame:
+    """Fijar tipos y orden de columnas para que los cubos se puedan combinar"""
+    dimensiones = _dimensiones(cubo)
+    for dimension in dimensiones:
+        valores = cubo[dimension].astype(object)
+        cubo[dimension] = valores.where(valores.notna(), VALOR_SIN_DATO).astype(str).astype(object)
+    for medida in MEDIDAS_CONTEO:
+        cubo[medida] = cubo[medida].astype('int64')
+    claves = ['periodo'] + dimensiones
+    return cubo[claves + MEDIDAS].sort_values(claves, ignore_index=True)
+
+
+def _preparar_hechos(df: pd.DataFrame, grano: str) -> pd.DataFrame:
+    """Periodo, dimensiones y medidas de las filas con fecha, listos para agrupar"""
+    if grano not in GRANOS:
+        raise ValueError(f"grano debe ser uno de {list(GRANOS)}")
+    if 'fecha' not in df.columns:
+        raise ValueError("Para agregar ventas se requiere la columna 'fecha'")
+
+    df = restaurar_punto_fijo(df)
+    fechas = pd.to_datetime(df['fecha'])
+    validas = fechas.notna().to_numpy()
+    df = df[validas]
+
+    columnas = {'periodo': _truncar(fechas[validas], grano)}
+    for dimension in DIMENSIONES_CUBO:
+        columnas[dimension] = df[dimension].to_numpy() if dimension in df.columns else np.full(len(df), None)
+    for medida in MEDIDAS_SUMA:
+        columnas[medida] = (df[medida].to_numpy(dtype='float64', na_value=np.nan)
+                            if medida in df.columns else np.full(len(df), np.nan))
+    return pd.DataFrame(columnas)
+
+
+def _agrupar(hechos: pd.DataFrame, dimensiones: Sequence[str]) -> pd.DataFrame:
+    if hechos.empty:
+        return _cubo_vacio(dimensiones)
+    agrupado = hechos.groupby(['periodo'] + list(dimensiones), observed=True, dropna=False, sort=False)
+    cubo = agrupado[MEDIDAS_SUMA].sum()
+    cubo['registros'] = agrupado.size()
+    cubo['registros_con_venta'] = agrupado['total_ventas'].count()
+    return _normalizar_cubo(cubo.reset_index())
+
+
+def agregar_hechos(df: pd.DataFrame, grano: str = 'dia', dimensiones: Sequence[str] = ()) -> pd.DataFrame:
+    """
+    Agregar filas limpias (una por venta) al grano temporal y las dimensiones indicadas.
+
+    Solo se guardan medidas aditivas (sumas y conteos) para que los cubos se puedan
+    combinar y reagregar sin volver a los hechos. Las filas sin fecha no entran en
+    ningún periodo y se omiten.
+    """
+    desconocidas = [d for d in dimensiones if d not in DIMENSIONES_CUBO]
+    if desconocidas:
+        raise ValueError(f"Dimensiones no soportadas: {desconocidas}. Use {DIMENSIONES_CUBO}")
+    return _agrupar(_preparar_hechos(df, grano), dimensiones)
+
+
+def reagregar(cubo: pd.DataFrame, grano: str) -> pd.DataFrame:
+    """Llevar un cubo a un grano más grueso (día → mes → año) sin leer los hechos"""
+    dimensiones = _dimensiones(cubo)
+    if cubo.empty:
+        return _cubo_vacio(dimensiones)
+    cubo = cubo.assign(periodo=_truncar(cubo['periodo'], grano))
+    resultado = cubo.groupby(['periodo'] + dimensiones, sort=False)[MEDIDAS].sum().reset_index()
+    return _normalizar_cubo(resultado)
+
+
+def combinar_cubos(*cubos: pd.DataFrame) -> pd.DataFrame:
+    """Sumar cubos del mismo grano y dimensiones (p. ej. el acumulado y el delta de un lote)"""
+    dimensiones = _dimensiones(cubos[0]) if cubos else []
+    cubos = [c for c in cubos if not c.empty]
+    if not cubos:
+        return _cubo_vacio(dimensiones)
+    if len(cubos) == 1:
+        return cubos[0]
+    resultado = pd.concat(cubos, ignore_index=True).groupby(['periodo'] + dimensiones, sort=False)[MEDIDAS].sum()
+    return _normalizar_cubo(resultado.reset_index())
+
+
+class CuboVentas:
+    """
+    Agregados precalculados de ventas por grano temporal y por dimensión.
+
+    Cada agregado de `agregados` (por defecto total, producto, geografía y canal)
+    se mantiene en cada grano. Así el cubo tiene unas pocas miles de filas en vez
+    de una por venta. Se guardan en parquet (`cubo_<grano>_<agregado>.parquet`) y
+    opcionalmente como tablas `resumen_ventas_<grano>_<agregado>` en PostgreSQL.
+    `actualizar()` agrega solo el lote nuevo y lo suma a lo existente. Las
+    consultas del dashboard leen el agregado más pequeño que las responde.
+    Los mensajes de progreso pasan por `instrumentador` (sin él, por consola).
+    """
+
+    def __init__(self, directorio: str = 'cubos_ventas', granos: Iterable[str] = ('dia', 'mes', 'anio'),
+                 agregados: Optional[Dict[str, Sequence[str]]] = None,
+                 instrumentador: Optional[Instrumentador] = None):
+        granos = list(granos)
+        desconocidos = [g for g in granos if g not in GRANOS]
+        if desconocidos or not granos:
+            raise ValueError(f"Granos no soportados: {desconocidos}. Use {list(GRANOS)}")
+
+        agregados = AGREGADOS if agregados is None else agregados
+        for nombre, dimensiones in agregados.items():
+            desconocidas = [d for d in dimensiones if d not in DIMENSIONES_CUBO]
+            if desconocidas:
+                raise ValueError(f"Dimensiones no soportadas en el agregado '{nombre}': {desconocidas}")
+
+        self.directorio = directorio
+        self.granos = [g for g in GRANOS if g in granos]
+        self.agregados = {nombre: list(dimensiones) for nombre, dimensiones in agregados.items()}
+        self.cubos: Dict[Tuple[str, str], pd.DataFrame] = {}
+        self.instrumentador = instrumentador
+
+    def _imprimir(self, *mensaje):
+        """Mensaje de progreso en consola (se omite con un instrumentador silencioso)"""
+        if self.instrumentador is None:
+            print(*mensaje)
+        else:
+            self.instrumentador.imprimir(*mensaje)
+
+    # ------------------------------------------------------------ almacenamiento
+    def ruta(self, grano: str, agregado: str) -> str:
+        return os.path.join(self.directorio, f"cubo_{grano}_{agregado}.parquet")
+
+    def cargar(self, grano: str, agregado: str = 'total') -> pd.DataFrame:
+        """Cubo de un grano y agregado desde memoria o disco (vacío si aún no existe)"""
+        if (grano, agregado) not in self.cubos:
+            ruta = self.ruta(grano, agregado)
+            if os.path.exists(ruta):
+                self.cubos[(grano, agregado)] = _normalizar_cubo(pd.read_parquet(ruta))
+            else:
+                self.cubos[(grano, agregado)] = _cubo_vacio(self.agregados[agregado])
+        return self.cubos[(grano, agregado)]
+
+    def _guardar(self, grano: str, agregado: str, cubo: pd.DataFrame):
+        """Escribir el cubo de forma atómica (archivo temporal + reemplazo)"""
+        os.makedirs(self.directorio, exist_ok=True)
+        temporal = f"{self.ruta(grano, agregado)}.tmp"
+        cubo.to_parquet(temporal, index=False)
+        os.replace(temporal, self.ruta(grano, agregado))
+        self.cubos[(grano, agregado)] = cubo
+
+    # ----------------------------------------------------------------- cálculo
+    def calcular_delta(self, df: pd.DataFrame) -> Dict[Tuple[str, str], pd.DataFrame]:
+        """Agregar un lote de filas limpias en todos los granos y agregados"""
+        # Los hechos se preparan una vez; cada agregado agrupa el grano fino y reagrega el resto
+        hechos = _preparar_hechos(df, self.granos[0])
+        delta = {}
+        for agregado, dimensiones in self.agregados.items():
+            fino = _agrupar(hechos, dimensiones)
+            delta[(self.granos[0], agregado)] = fino
+            for grano in self.granos[1:]:
+                delta[(grano, agregado)] = reagregar(fino, grano)
+        return delta
+
+    def construir(self, df: pd.DataFrame) -> Dict[Tuple[str, str], pd.DataFrame]:
+        """Recalcular todos los cubos desde los datos limpios completos"""
+        self._imprimir("\n🧊 Construyendo cubos de ventas...")
+        inicio = time.perf_counter()
+        cubos = self.calcular_delta(df)
+        for (grano, agregado), cubo in cubos.items():
+            self._guardar(grano, agregado, cubo)
+            self._imprimir(f"   ✅ {grano} × {agregado}: {len(cubo):,} filas agregadas")
+        self._imprimir(f"   ⏱️ {len(df):,} filas resumidas en {time.perf_counter() - inicio:.2f}s")
+        return cubos
+
+    def actualizar(self, df_nuevo: pd.DataFrame, cargador=None) -> Dict[Tuple[str, str], pd.DataFrame]:
+        """
+        Sumar un lote de filas nuevas a los cubos guardados.
+
+        Con un CargadorPostgreSQL el mismo delta se aplica primero a las tablas
+        resumen; los cubos locales se escriben solo si esa transacción se confirmó.
+        Devuelve el delta por (grano, agregado).
+        """
+        delta = self.calcular_delta(df_nuevo)
+        if cargador is not None:
+            self.publicar_delta_postgresql(cargador, delta)
+        self.sumar_delta(delta)
+        return delta
+
+    def sumar_delta(self, delta: Dict[Tuple[str, str], pd.DataFrame]):
+        """Sumar un delta ya calculado a los cubos locales y guardarlos"""
+        self._imprimir("\n🧊 Actualizando cubos de ventas...")
+        for (grano, agregado), cubo_delta in delta.items():
+            self._guardar(grano, agregado, combinar_cubos(self.cargar(grano, agregado), cubo_delta))
+            self._imprimir(f"   ➕ {grano} × {agregado}: {len(cubo_delta):,} celdas afectadas, "
+                           f"{len(self.cubos[(grano, agregado)]):,} en total")
+
+    # -------------------------------------------------------------- PostgreSQL
+    def publicar_postgresql(self, cargador) -> Dict[str, Dict]:
+        """Reemplazar las tablas resumen con los cubos locales (COPY y un solo intercambio)"""
+        tablas, definiciones = {}, {}
+        for grano in self.granos:
+            for agregado, dimensiones in self.agregados.items():
+                tabla = nombre_tabla_resumen(grano, agregado)
+                tablas[tabla] = self.cargar(grano, agregado)
+                definiciones[tabla] = definicion_tabla_resumen(dimensiones)
+        return cargador.cargar_tablas(tablas, definiciones)
+
+    def publicar_delta_postgresql(self, cargador, delta: Dict[Tuple[str, str], pd.DataFrame]):
+        """Sumar el delta a las tablas resumen en una transacción propia"""
+        try:
+            with cargador.conexion.cursor() as cursor:
+                self.fusionar_delta(cursor, cargador, delta)
+            cargador.conexion.commit()
+        except Exception:
+            cargador.conexion.rollback()
+            raise
+
+    def fusionar_delta(self, cursor, cargador, delta: Dict[Tuple[str, str], pd.DataFrame]):
+        """
+        Sumar el delta a las tablas resumen con el cursor de una transacción abierta.
+
+        El delta se copia a una tabla de staging y se fusiona con
+        INSERT ... ON CONFLICT DO UPDATE sumando las medidas. No confirma: quien
+        llama lo hace junto con los hechos del mismo lote.
+        """
+        suma_sql = ', '.join(f'"{m}" = r."{m}" + EXCLUDED."{m}"' for m in MEDIDAS)
+
+        for (grano, agregado), cubo_delta in delta.items():
+            definicion = definicion_tabla_resumen(self.agregados[agregado])
+            columnas = [nombre for nombre, _ in definicion['columnas']]
+            columnas_sql = ', '.join(f'"{c}"' for c in columnas)
+            claves_sql = ', '.join(f'"{c}"' for c in definicion['clave_primaria'])
+            definicion_sql = ', '.join(f'"{nombre}" {tipo}' for nombre, tipo in definicion['columnas'])
+
+            tabla = nombre_tabla_resumen(grano, agregado)
+            staging = f"{tabla}_delta"
+            cursor.execute(
+                f'CREATE TABLE IF NOT EXISTS {cargador._nombre(tabla)} '
+                f'({definicion_sql}, CONSTRAINT "{tabla}_pkey" PRIMARY KEY ({claves_sql}))'
+            )
+            if cubo_delta.empty:
+                continue
+
+            cursor.execute(f"DROP TABLE IF EXISTS {cargador._nombre(staging)}")
+            cursor.execute(f"CREATE UNLOGGED TABLE {cargador._nombre(staging)} ({definicion_sql})")
+            cargador._copiar(cursor, staging, cubo_delta, columnas)
+            cursor.execute(
+                f"INSERT INTO {cargador._nombre(tabla)} AS r ({columnas_sql}) "
+                f"SELECT {columnas_sql} FROM {cargador._nombre(staging)} "
+                f"ON CONFLICT ({claves_sql}) DO UPDATE SET {suma_sql}"
+            )
+            cursor.execute(f"DROP TABLE {cargador._nombre(staging)}")
+            self._imprimir(f"   ✅ {tabla}: {len(cubo_delta):,} celdas fusionadas")
+
+    def _sql_agregado(self, cargador, grano: str, dimensiones: Sequence[str], origen: Optional[str]) -> str:
+        """
+        SELECT de un agregado: desde fact_ventas y las dimensiones que necesita, o
+        reagregando la tabla `origen` de un grano más fino
+        """
+        truncado = f"date_trunc('{GRANOS[grano][1]}', {'periodo' if origen else 'f.fecha'})::date"
+        agrupacion = ', '.join(str(i) for i in range(1, len(dimensiones) + 2))
+        if origen:
+            columnas = ''.join(f', "{d}"' for d in dimensiones)
+            medidas = ''.join(f', sum("{m}")' for m in MEDIDAS)
+            return (f"SELECT {truncado}{columnas}{medidas} FROM {cargador._nombre(origen)} "
+                    f"GROUP BY {agrupacion}")
+
+        columnas = ''.join(f", COALESCE(\"{d}\", %(sin_dato)s)" for d in dimensiones)
+        uniones = ''.join(
+            f" LEFT JOIN {cargador._nombre(tabla)} USING ({clave})"
+            for tabla, (naturales, clave) in DIMENSIONES.items()
+            if any(d in naturales for d in dimensiones)
+        )
+        return (f"SELECT {truncado}{columnas}, "
+                f"COALESCE(sum(f.cantidad), 0), COALESCE(sum(f.total_ventas), 0), "
+                f"COALESCE(sum(f.costo_envio), 0), count(*), count(f.total_ventas) "
+                f"FROM {cargador._nombre('fact_ventas')} f{uniones} "
+                f"WHERE f.fecha IS NOT NULL GROUP BY {agrupacion}")
+
+    def reconstruir_en_postgresql(self, cargador):
+        """
+        Recalcular las tablas resumen dentro de PostgreSQL desde fact_ventas y sus dimensiones.
+
+        Sirve para recuperar las tablas si un delta no se pudo aplicar. El grano fino
+        de cada agregado se calcula desde los hechos y los demás desde ese grano.
+        Todas las tablas se reemplazan en una transacción, como en `cargar_tablas`.
+        """
+        try:
+            with cargador.conexion.cursor() as cursor:
+                for agregado, dimensiones in self.agregados.items():
+                    definicion = definicion_tabla_resumen(dimensiones)
+                    definicion_sql = ', '.join(f'"{nombre}" {tipo}' for nombre, tipo in definicion['columnas'])
+                    claves_sql = ', '.join(f'"{c}"' for c in definicion['clave_primaria'])
+                    origen = None
+                    for grano in self.granos:
+                        tabla = nombre_tabla_resumen(grano, agregado)
+                        staging = f"{tabla}_staging"
+                        cursor.execute(f"DROP TABLE IF EXISTS {cargador._nombre(staging)}")
+                        cursor.execute(f"CREATE TABLE {cargador._nombre(staging)} ({definicion_sql})")
+                        cursor.execute(
+                            f"INSERT INTO {cargador._nombre(staging)} "
+                            + self._sql_agregado(cargador, grano, dimensiones, origen),
+                            {'sin_dato': VALOR_SIN_DATO}
+                        )
+                        cursor.execute(
+                            f'ALTER TABLE {cargador._nombre(staging)} ADD CONSTRAINT "{staging}_pkey" '
+                            f'PRIMARY KEY ({claves_sql})'
+                        )
+                        origen = staging
+
+                for agregado in self.agregados:
+                    for grano in self.granos:
+                        tabla = nombre_tabla_resumen(grano, agregado)
+                        staging = f"{tabla}_staging"
+                        cursor.execute(f"DROP TABLE IF EXISTS {cargador._nombre(tabla)}")
+                        cursor.execute(f'ALTER TABLE {cargador._nombre(staging)} RENAME TO "{tabla}"')
+                        cursor.execute(
+                            f'ALTER TABLE {cargador._nombre(tabla)} RENAME CONSTRAINT "{staging}_pkey" TO "{tabla}_pkey"'
+                        )
+                        cursor.execute(f"ANALYZE {cargador._nombre(tabla)}")
+            cargador.conexion.commit()
+        except Exception:
+            cargador.conexion.rollback()
+            raise
+        self._imprimir(f"   ✅ Tablas resumen recalculadas en PostgreSQL: {', '.join(self.granos)} × "
+                       f"{', '.join(self.agregados)}")
+
+    # ---------------------------------------------------------------- consultas
+    def _grano_para(self, preferido: str) -> str:
+        """El grano pedido o, si no se mantiene, el más fino disponible para reagregar"""
+        if preferido in self.granos:
+            return preferido
+        if list(GRANOS).index(preferido) < list(GRANOS).index(self.granos[0]):
+            raise ValueError(f"El grano '{preferido}' es más fino que los cubos mantenidos {self.granos}")
+        return self.granos[0]
+
+    def _agregado_para(self, dimensiones: Sequence[str]) -> str:
+        """El agregado con menos dimensiones que contiene todas las pedidas"""
+        pedidas = set(dimensiones)
+        candidatos = [nombre for nombre, propias in self.agregados.items() if pedidas <= set(propias)]
+        if not candidatos:
+            raise ValueError(f"Ningún agregado contiene {sorted(pedidas)}; agregados mantenidos: {self.agregados}")
+        return min(candidatos, key=lambda nombre: len(self.agregados[nombre]))
+
+    def ventas_por_periodo(self, grano: str = 'mes', por: Optional[List[str]] = None) -> pd.DataFrame:
+        """Ventas, cantidad y número de registros por periodo (y dimensiones opcionales)"""
+        por = list(por or [])
+        cubo = self.cargar(self._grano_para(grano), self._agregado_para(por))
+        if grano != self._grano_para(grano):
+            cubo = reagregar(cubo, grano)
+        return cubo.groupby(['periodo'] + por, sort=True)[MEDIDAS].sum().reset_index()
+
+    def top_productos(self, n: int = 5, medida: str = 'total_ventas', anio: Optional[int] = None) -> pd.Series:
+        """Productos con mayor valor de la medida (en todo el histórico o en un año)"""
+        cubo = self.cargar(self._grano_para('anio'), self._agregado_para(['producto']))
+        if anio is not None:
+            cubo = cubo[cubo['periodo'].dt.year == anio]
+        cubo = cubo[cubo['producto'] != VALOR_SIN_DATO]
+        return cubo.groupby('producto')[medida].sum().nlargest(n)
+
+    def comparativa_anual(self, medida: str = 'total_ventas') -> pd.DataFrame:
+        """Valor por año y variación porcentual respecto al año anterior"""
+        anual = self.ventas_por_periodo('anio')[['periodo', medida]]
+        anual = anual.assign(anio=anual['periodo'].dt.year).set_index('anio')[[medida]]
+        anual['variacion_porcentaje'] = anual[medida].pct_change() * 100
+        return anual
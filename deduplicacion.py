@@ -0,0 +1,215 @@
+import os
+import shutil
+import tempfile
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from huellas import huellas_filas
+from representacion_compacta import restaurar_punto_fijo
+
+
+class FiltroBloom:
+    """
+    Filtro de Bloom sobre huellas de 64 bits ya mezcladas.
+
+    Las posiciones se derivan de las dos mitades de la huella (doble hashing), sin
+    volver a calcular hashes. Con 10 bits por huella (más, tras redondear a una
+    potencia de dos) y 7 posiciones la tasa de falsos positivos no supera el 1%.
+    """
+
+    def __init__(self, capacidad: int, bits_por_huella: int = 10):
+        bits = max(int(capacidad) * bits_por_huella, 64)
+        self.num_bits = 1 << int(np.ceil(np.log2(bits)))
+        self.num_posiciones = max(int(round(bits_por_huella * np.log(2))), 1)
+        self.bits = np.zeros(self.num_bits // 8, dtype=np.uint8)
+
+    def _posiciones(self, huellas: np.ndarray) -> Iterator[np.ndarray]:
+        """Bits a consultar para cada huella, una posición a la vez"""
+        h1 = huellas & np.uint64(0xFFFFFFFF)
+        h2 = (huellas >> np.uint64(32)) | np.uint64(1)
+        mascara = np.uint64(self.num_bits - 1)
+        for paso in range(self.num_posiciones):
+            yield (h1 + np.uint64(paso) * h2) & mascara
+
+    def agregar(self, huellas: np.ndarray):
+        if not len(huellas):
+            return
+        # Un byte por bit mientras se marca: asignar por índice es mucho más rápido que bitwise_or.at
+        marcas = np.unpackbits(self.bits, bitorder='little').view(bool)
+        for posiciones in self._posiciones(huellas):
+            marcas[posiciones] = True
+        self.bits = np.packbits(marcas, bitorder='little')
+
+    def contiene(self, huellas: np.ndarray) -> np.ndarray:
+        """True donde la huella puede estar; False garantiza que nunca se agregó"""
+        presentes = np.ones(len(huellas), dtype=bool)
+        for posiciones in self._posiciones(huellas):
+            bits = (self.bits[posiciones >> np.uint64(3)] >> (posiciones & np.uint64(7)).astype(np.uint8)) & 1
+            presentes &= bits.astype(bool)
+        return presentes
+
+
+class ConjuntoHuellasVistas:
+    """
+    Conjunto de huellas de 64 bits ya vistas con memoria acotada.
+
+    - Las huellas recientes se guardan exactas en memoria, en un arreglo ordenado.
+    - Al superar `max_huellas_memoria` el arreglo se vuelca a disco como una corrida
+      ordenada (.npy) y se consulta después con búsqueda binaria sobre un memmap:
+      solo se leen las páginas que toca cada búsqueda.
+    - Cada corrida conserva en memoria un filtro de Bloom (~1.25 bytes por huella
+      en vez de 8) para que solo los candidatos lleguen al disco.
+    """
+
+    def __init__(self, max_huellas_memoria: int = 4_000_000, directorio_temporal: Optional[str] = None,
+                 bits_por_huella: int = 10):
+        self.max_huellas_memoria = max_huellas_memoria
+        self.directorio_temporal = directorio_temporal
+        self.bits_por_huella = bits_por_huella
+        self._memoria = np.empty(0, dtype=np.uint64)
+        self._corridas: List[Tuple[FiltroBloom, np.ndarray]] = []
+        self._directorio: Optional[str] = None
+        self.total = 0
+
+    def contiene(self, huellas: np.ndarray) -> np.ndarray:
+        """Pertenencia exacta de cada huella (memoria y corridas en disco)"""
+        huellas = np.asarray(huellas, dtype=np.uint64)
+        vistas = self._en_ordenado(self._memoria, huellas)
+        for filtro, corrida in self._corridas:
+            pendientes = np.flatnonzero(~vistas)
+            if not len(pendientes):
+                break
+            candidatas = pendientes[filtro.contiene(huellas[pendientes])]
+            vistas[candidatas] = self._en_ordenado(corrida, huellas[candidatas])
+        return vistas
+
+    @staticmethod
+    def _en_ordenado(ordenado: np.ndarray, huellas: np.ndarray) -> np.ndarray:
+        if not len(ordenado) or not len(huellas):
+            return np.zeros(len(huellas), dtype=bool)
+        posiciones = np.searchsorted(ordenado, huellas)
+        return ordenado[np.minimum(posiciones, len(ordenado) - 1)] == huellas
+
+    def agregar(self, huellas: np.ndarray):
+        """Agregar huellas que no estaban en el conjunto (únicas entre sí)"""
+        huellas = np.sort(np.asarray(huellas, dtype=np.uint64))
+        if not len(huellas):
+            return
+        # Intercalar en el arreglo ordenado: O(memoria + nuevas), sin reordenar todo
+        self._memoria = np.insert(self._memoria, np.searchsorted(self._memoria, huellas), huellas)
+        self.total += len(huellas)
+        if len(self._memoria) >= self.max_huellas_memoria:
+            self._volcar()
+
+    def _volcar(self):
+        """Escribir las huellas en memoria como una corrida ordenada en disco"""
+        if self._directorio is None:
+            if self.directorio_temporal:
+                os.makedirs(self.directorio_temporal, exist_ok=True)
+            self._directorio = tempfile.mkdtemp(prefix='.deduplicacion_', dir=self.directorio_temporal)
+        ruta = os.path.join(self._directorio, f"corrida_{len(self._corridas):05d}.npy")
+        np.save(ruta, self._memoria)
+
+        filtro = FiltroBloom(len(self._memoria), self.bits_por_huella)
+        filtro.agregar(self._memoria)
+        self._corridas.append((filtro, np.load(ruta, mmap_mode='r')))
+        self._memoria = np.empty(0, dtype=np.uint64)
+
+    @property
+    def corridas_en_disco(self) -> int:
+        return len(self._corridas)
+
+    def cerrar(self):
+        """Liberar las corridas y borrar sus archivos temporales"""
+        self._corridas = []
+        self._memoria = np.empty(0, dtype=np.uint64)
+        if self._directorio is not None:
+            shutil.rmtree(self._directorio, ignore_errors=True)
+            self._directorio = None
+
+    def __enter__(self) -> 'ConjuntoHuellasVistas':
+        return self
+
+    def __exit__(self, *excepcion):
+        self.cerrar()
+
+
+class DeduplicadorFilas:
+    """
+    Eliminación de filas duplicadas entre bloques, particiones y archivos.
+
+    Cada fila limpia (o el subconjunto `columnas_clave`) se reduce a una huella de
+    64 bits y se conserva solo la primera aparición. Las huellas vistas viven en un
+    ConjuntoHuellasVistas, de modo que la memoria no depende del total de filas.
+    Con huellas de 64 bits la probabilidad de una colisión entre 10^8 filas
+    distintas es del orden de 10^-4.
+    """
+
+    def __init__(self, columnas_clave: Optional[Sequence[str]] = None, max_huellas_memoria: int = 4_000_000,
+                 directorio_temporal: Optional[str] = None, bits_por_huella: int = 10):
+        self.columnas_clave = list(columnas_clave) if columnas_clave else None
+        self.vistas = ConjuntoHuellasVistas(max_huellas_memoria, directorio_temporal, bits_por_huella)
+        self.eliminados = 0
+
+    @classmethod
+    def desde_configuracion(cls, config_deduplicacion: Optional[Dict] = None) -> Optional['DeduplicadorFilas']:
+        """Construir el deduplicador desde la sección 'deduplicacion' (None si está desactivada)"""
+        config = config_deduplicacion or {}
+        if not config.get('activa', False):
+            return None
+        return cls(
+            columnas_clave=config.get('columnas_clave'),
+            max_huellas_memoria=config.get('max_huellas_memoria', 4_000_000),
+            directorio_temporal=config.get('directorio_temporal'),
+            bits_por_huella=config.get('bits_por_huella', 10)
+        )
+
+    def huellas(self, df: pd.DataFrame) -> np.ndarray:
+        """Huella de cada fila sobre las columnas clave (valores decimales, no punto fijo)"""
+        if self.columnas_clave:
+            faltantes = [c for c in self.columnas_clave if c not in df.columns]
+            if faltantes:
+                raise ValueError(f"Columnas clave de deduplicación inexistentes: {faltantes}")
+            df = df[self.columnas_clave]
+        else:
+            # Fila completa en orden de nombre: la huella no depende del orden de las columnas
+            df = df[sorted(df.columns)]
+        return huellas_filas(restaurar_punto_fijo(df))
+
+    def mascara_nuevas(self, huellas: np.ndarray) -> np.ndarray:
+        """True en la primera aparición de cada huella no vista antes; registra las nuevas"""
+        unicas, primeras = np.unique(huellas, return_index=True)
+        nuevas = ~self.vistas.contiene(unicas)
+        conservar = np.zeros(len(huellas), dtype=bool)
+        conservar[primeras[nuevas]] = True
+        self.vistas.agregar(unicas[nuevas])
+        self.eliminados += int(len(huellas) - conservar.sum())
+        return conservar
+
+    def filtrar(self, df: pd.DataFrame) -> Tuple[pd.DataFrame, np.ndarray]:
+        """Quitar las filas ya vistas; devuelve el DataFrame filtrado y las huellas conservadas"""
+        huellas = self.huellas(df)
+        conservar = self.mascara_nuevas(huellas)
+        if conservar.all():
+            return df, huellas
+        return df[conservar], huellas[conservar]
+
+    def registrar(self, df: pd.DataFrame):
+        """Marcar como vistas las filas de un resultado previo (p. ej. segmentos en caché)"""
+        self.registrar_huellas(self.huellas(df))
+
+    def registrar_huellas(self, huellas: np.ndarray):
+        """Marcar como vistas huellas ya calculadas (p. ej. guardadas junto a un segmento)"""
+        huellas = np.unique(np.asarray(huellas, dtype=np.uint64))
+        self.vistas.agregar(huellas[~self.vistas.contiene(huellas)])
+
+    def cerrar(self):
+        self.vistas.cerrar()
+
+    def __enter__(self) -> 'DeduplicadorFilas':
+        return self
+
+    def __exit__(self, *excepcion):
+        self.cerrar()
@@ -0,0 +1,175 @@
+from typing import Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+
+def _nombre(esquema: str, tabla: str) -> str:
+    return f'"{esquema}"."{tabla}"'
+
+
+class DisenoFisicoVentas:
+    """
+    Diseño físico de fact_ventas en PostgreSQL: particiones mensuales e índices.
+
+    - La tabla se particiona por rango de `fecha`, una partición por mes
+      (`fact_ventas_pAAAA_MM`), más una partición DEFAULT para las filas sin fecha.
+    - Las particiones que falten se crean antes de cada COPY según los meses del lote.
+    - Índice BRIN sobre `fecha` (pequeño y suficiente para datos que llegan en orden
+      de fecha) y B-tree sobre las claves foráneas, definidos en la tabla padre para
+      que PostgreSQL los cree también en cada partición nueva.
+    - ANALYZE tras las cargas: la tabla completa después de una carga total y solo
+      las particiones tocadas después de una carga incremental (autovacuum nunca
+      analiza la tabla padre de una tabla particionada).
+    """
+
+    def __init__(self, tabla: str = 'fact_ventas', columna_particion: str = 'fecha',
+                 columnas_btree: Iterable[str] = ('id_producto', 'id_geografia', 'id_canal'),
+                 paginas_por_rango_brin: int = 32):
+        self.tabla = tabla
+        self.columna_particion = columna_particion
+        self.columnas_btree = list(columnas_btree)
+        self.paginas_por_rango_brin = paginas_por_rango_brin
+
+    # ------------------------------------------------------------------ nombres
+    @staticmethod
+    def nombre_particion(tabla: str, mes: pd.Timestamp) -> str:
+        return f"{tabla}_p{mes.year:04d}_{mes.month:02d}"
+
+    @staticmethod
+    def nombre_particion_sin_fecha(tabla: str) -> str:
+        return f"{tabla}_sin_fecha"
+
+    def _nombres_indices(self, tabla: str) -> Dict[str, str]:
+        """Nombre de cada índice de la tabla padre por columna"""
+        nombres = {self.columna_particion: f"{tabla}_{self.columna_particion}_brin"}
+        nombres.update({columna: f"{tabla}_{columna}_idx" for columna in self.columnas_btree})
+        return nombres
+
+    # --------------------------------------------------------------------- DDL
+    def sentencia_crear(self, esquema: str, tabla: str, definicion_sql: str) -> str:
+        return (f"CREATE TABLE {_nombre(esquema, tabla)} ({definicion_sql}) "
+                f'PARTITION BY RANGE ("{self.columna_particion}")')
+
+    def meses(self, datos) -> List[pd.Timestamp]:
+        """Meses distintos (primer día) de la columna de partición de un DataFrame o serie"""
+        fechas = datos[self.columna_particion] if isinstance(datos, pd.DataFrame) else datos
+        valores = pd.to_datetime(pd.Series(fechas)).dropna().to_numpy(dtype='datetime64[ns]')
+        return [pd.Timestamp(mes) for mes in np.unique(valores.astype('datetime64[M]'))]
+
+    def particiones_existentes(self, cursor, esquema: str, tabla: str) -> List[str]:
+        cursor.execute(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = to_regclass(%s) ORDER BY c.relname",
+            (_nombre(esquema, tabla),)
+        )
+        return [fila[0] for fila in cursor.fetchall()]
+
+    def asegurar_particiones(self, cursor, esquema: str, tabla: str, datos) -> List[str]:
+        """
+        Crear las particiones mensuales que falten para los datos a cargar.
+
+        Devuelve las particiones que recibirán filas (nuevas o existentes), útil
+        para analizar solo esas después de una carga incremental.
+        """
+        existentes = set(self.particiones_existentes(cursor, esquema, tabla))
+        tocadas = []
+
+        sin_fecha = self.nombre_particion_sin_fecha(tabla)
+        if sin_fecha not in existentes:
+            # El CHECK evita que crear una partición mensual nueva tenga que recorrer la DEFAULT
+            cursor.execute(
+                f'CREATE TABLE {_nombre(esquema, sin_fecha)} PARTITION OF {_nombre(esquema, tabla)} '
+                f'(CONSTRAINT "{sin_fecha}_solo_nulos" CHECK ("{self.columna_particion}" IS NULL)) DEFAULT'
+            )
+        fechas = datos[self.columna_particion] if isinstance(datos, pd.DataFrame) else pd.Series(datos)
+        if fechas.isna().any():
+            tocadas.append(sin_fecha)
+
+        for mes in self.meses(fechas):
+            particion = self.nombre_particion(tabla, mes)
+            if particion not in existentes:
+                siguiente = mes + pd.offsets.MonthBegin(1)
+                cursor.execute(
+                    f"CREATE TABLE {_nombre(esquema, particion)} PARTITION OF {_nombre(esquema, tabla)} "
+                    f"FOR VALUES FROM (%s) TO (%s)",
+                    (mes.to_pydatetime(), siguiente.to_pydatetime())
+                )
+            tocadas.append(particion)
+        return tocadas
+
+    def crear_indices(self, cursor, esquema: str, tabla: str):
+        """BRIN sobre la fecha y B-tree sobre las claves foráneas (se propagan a las particiones)"""
+        for columna, indice in self._nombres_indices(tabla).items():
+            if columna == self.columna_particion:
+                metodo = f'brin ("{columna}") WITH (pages_per_range = {int(self.paginas_por_rango_brin)})'
+            else:
+                metodo = f'btree ("{columna}")'
+            cursor.execute(f'CREATE INDEX IF NOT EXISTS "{indice}" ON {_nombre(esquema, tabla)} USING {metodo}')
+
+    def renombrar(self, cursor, esquema: str, anterior: str, nuevo: str):
+        """Ajustar nombres de particiones e índices tras renombrar la tabla padre (intercambio de staging)"""
+        for particion in self.particiones_existentes(cursor, esquema, nuevo):
+            if particion.startswith(anterior):
+                cursor.execute(
+                    f'ALTER TABLE {_nombre(esquema, particion)} RENAME TO "{nuevo}{particion[len(anterior):]}"'
+                )
+        # Las claves primarias las renombra quien las creó (cargar_tabla)
+        cursor.execute(
+            "SELECT indexname FROM pg_indexes WHERE schemaname = %s AND starts_with(indexname, %s) "
+            "AND indexname NOT LIKE '%%\\_pkey'",
+            (esquema, anterior)
+        )
+        for (indice,) in cursor.fetchall():
+            cursor.execute(f'ALTER INDEX {_nombre(esquema, indice)} RENAME TO "{nuevo}{indice[len(anterior):]}"')
+
+    def analizar(self, cursor, esquema: str, tabla: str, particiones: Optional[List[str]] = None):
+        """ANALYZE de la tabla completa o solo de las particiones indicadas"""
+        objetivos = particiones if particiones is not None else [tabla]
+        for objetivo in objetivos:
+            cursor.execute(f"ANALYZE {_nombre(esquema, objetivo)}")
+
+    def es_particionada(self, cursor, esquema: str, tabla: str) -> bool:
+        cursor.execute(
+            "SELECT relkind = 'p' FROM pg_class WHERE oid = to_regclass(%s)", (_nombre(esquema, tabla),)
+        )
+        fila = cursor.fetchone()
+        return bool(fila and fila[0])
+
+    # ---------------------------------------------------------------- migración
+    def migrar(self, conexion, esquema: str, definicion_sql: str,
+               imprimir: Callable = print) -> Optional[int]:
+        """
+        Convertir una fact_ventas existente sin particionar en particionada.
+
+        Copia las filas a la nueva tabla dentro de una transacción; las claves
+        foráneas de la tabla anterior se eliminan con ella y deben recrearse
+        (CargadorPostgreSQL.crear_claves_foraneas). Devuelve las filas migradas, o
+        None si la tabla ya estaba particionada. Los mensajes salen por `imprimir`.
+        """
+        anterior = f"{self.tabla}_sin_particionar"
+        try:
+            with conexion.cursor() as cursor:
+                if self.es_particionada(cursor, esquema, self.tabla):
+                    imprimir(f"   ℹ️  {self.tabla} ya está particionada")
+                    return None
+
+                cursor.execute(f'ALTER TABLE {_nombre(esquema, self.tabla)} RENAME TO "{anterior}"')
+                cursor.execute(self.sentencia_crear(esquema, self.tabla, definicion_sql))
+                cursor.execute(
+                    f'SELECT DISTINCT date_trunc(\'month\', "{self.columna_particion}") '
+                    f'FROM {_nombre(esquema, anterior)}'
+                )
+                self.asegurar_particiones(cursor, esquema, self.tabla, [fila[0] for fila in cursor.fetchall()])
+                cursor.execute(f"INSERT INTO {_nombre(esquema, self.tabla)} SELECT * FROM {_nombre(esquema, anterior)}")
+                filas = cursor.rowcount
+                cursor.execute(f"DROP TABLE {_nombre(esquema, anterior)}")
+                self.crear_indices(cursor, esquema, self.tabla)
+                self.analizar(cursor, esquema, self.tabla)
+            conexion.commit()
+        except Exception:
+            conexion.rollback()
+            raise
+
+        imprimir(f"   ✅ {self.tabla} migrada a particiones mensuales ({filas:,} filas)")
+        return filas
@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+
+# Huellas de 64 bits de valores y filas, estables entre bloques, particiones y procesos.
+# Las usan la deduplicación (núcleo de la limpieza) y el perfil de calidad.
+
+HUELLA_NULO = np.uint64(0x9E3779B97F4A7C15)
+SEMILLA_FILA = np.uint64(0xCBF29CE484222325)
+PRIMO_FILA = np.uint64(0x100000001B3)
+
+
+def mezclar(huellas: np.ndarray) -> np.ndarray:
+    """Finalizador de splitmix64: reparte los bits de las huellas combinadas"""
+    huellas = huellas ^ (huellas >> np.uint64(30))
+    huellas = huellas * np.uint64(0xBF58476D1CE4E5B9)
+    huellas = huellas ^ (huellas >> np.uint64(27))
+    huellas = huellas * np.uint64(0x94D049BB133111EB)
+    return huellas ^ (huellas >> np.uint64(31))
+
+
+def _canonica(serie: pd.Series) -> pd.Series:
+    """Representación estable entre bloques: los números siempre como float64"""
+    if pd.api.types.is_numeric_dtype(serie.dtype) and not pd.api.types.is_bool_dtype(serie.dtype):
+        return pd.Series(serie.to_numpy(dtype='float64', na_value=np.nan), index=serie.index)
+    return serie
+
+
+def factorizar(serie: pd.Series):
+    """Códigos por fila (-1 = nulo), valores distintos y su huella de 64 bits"""
+    codigos, unicos = pd.factorize(_canonica(serie), use_na_sentinel=True)
+    unicos = np.asarray(unicos)
+    if unicos.dtype.kind not in 'fMb':
+        unicos = unicos.astype(object)
+    return codigos, unicos, pd.util.hash_array(unicos)
+
+
+def huellas_filas(df: pd.DataFrame) -> np.ndarray:
+    """Huella de 64 bits de cada fila completa (iguales para filas iguales en cualquier bloque)"""
+    huellas = np.full(len(df), SEMILLA_FILA, dtype=np.uint64)
+    for columna in df.columns:
+        codigos, _, huellas_unicos = factorizar(df[columna])
+        huellas = (huellas * PRIMO_FILA) ^ huellas_por_fila(codigos, huellas_unicos)
+    return mezclar(huellas)
+
+
+def huellas_por_fila(codigos: np.ndarray, huellas_unicos: np.ndarray) -> np.ndarray:
+    """Huella de cada fila a partir de los códigos de `factorizar` (HUELLA_NULO para los nulos)"""
+    if not len(huellas_unicos):
+        return np.full(len(codigos), HUELLA_NULO, dtype=np.uint64)
+    return np.where(codigos >= 0, huellas_unicos[np.maximum(codigos, 0)], HUELLA_NULO)
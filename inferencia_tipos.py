@@ -0,0 +1,101 @@
+import re
+from typing import Dict, List
+
+import pandas as pd
+
+# PATRONES PRECOMPILADOS (se evalúan sobre arreglos completos, no valor a valor)
+PATRON_NUMERICO = re.compile(r'-?\d*\.?\d+')
+VALORES_BOOLEANOS = ['true', 'false', '1', '0', 'si', 'no', 'sí', 'yes', 'verdadero', 'falso']
+FORMATOS_FECHA_PREDETERMINADOS = ['%Y-%m-%d', '%d/%m/%Y', '%m/%d/%Y', '%Y-%m-%d %H:%M:%S']
+
+_EQUIVALENCIAS_FORMATO = {
+    '%Y': r'\d{4}', '%y': r'\d{2}', '%m': r'\d{1,2}', '%d': r'\d{1,2}',
+    '%H': r'\d{1,2}', '%M': r'\d{1,2}', '%S': r'\d{1,2}', '%f': r'\d{1,6}'
+}
+
+
+def formato_a_patron(formato: str) -> re.Pattern:
+    """Traducir un formato strptime a una expresión regular equivalente"""
+    partes = re.split(r'(%[a-zA-Z])', formato)
+    return re.compile(''.join(_EQUIVALENCIAS_FORMATO.get(p, re.escape(p)) for p in partes if p))
+
+
+class InferidorTipos:
+    """
+    Inferencia de tipos por lotes con puntuación de confianza.
+
+    Trabaja sobre los valores distintos de cada columna ponderados por su
+    frecuencia, de modo que muestrear más filas (o el archivo completo por
+    bloques) solo cuesta lo que cuesta contar valores. Los formatos de fecha se
+    validan una vez por columna con `pd.to_datetime(format=...)` vectorizado.
+    """
+
+    def __init__(self, formatos_fecha: List[str] = None,
+                 umbral_fecha: float = 0.5, umbral_numero: float = 0.8,
+                 umbral_booleano: float = 0.8, max_distintos: int = 100000):
+        self.formatos_fecha = formatos_fecha or FORMATOS_FECHA_PREDETERMINADOS
+        self.patrones_fecha = {formato: formato_a_patron(formato) for formato in self.formatos_fecha}
+        self.umbral_fecha = umbral_fecha
+        self.umbral_numero = umbral_numero
+        self.umbral_booleano = umbral_booleano
+        self.max_distintos = max_distintos
+        self.conteos: Dict[str, pd.Series] = {}
+
+    def acumular(self, df: pd.DataFrame):
+        """Acumular frecuencias de valores de un bloque (permite muestreo por streaming)"""
+        for columna in df.columns:
+            conteo = df[columna].dropna().astype(str).value_counts()
+            if columna in self.conteos:
+                conteo = self.conteos[columna].add(conteo, fill_value=0)
+            if len(conteo) > self.max_distintos:
+                # Conservar los valores más frecuentes para acotar la memoria
+                conteo = conteo.nlargest(self.max_distintos)
+            self.conteos[columna] = conteo
+
+    def inferir(self) -> Dict[str, Dict]:
+        """Inferir el tipo de todas las columnas acumuladas"""
+        return {columna: self._inferir_conteos(conteo) for columna, conteo in self.conteos.items()}
+
+    def inferir_serie(self, serie: pd.Series) -> Dict:
+        """Inferir el tipo de una serie individual"""
+        return self._inferir_conteos(serie.dropna().astype(str).value_counts())
+
+    def _inferir_conteos(self, conteo: pd.Series) -> Dict:
+        """Puntuar cada tipo sobre valores distintos ponderados por frecuencia"""
+        total = conteo.sum()
+        if total == 0:
+            return {'tipo': 'desconocido', 'confianza': {}, 'formatos_fecha': []}
+
+        valores = pd.Series(conteo.index, dtype=object).str.strip()
+        pesos = conteo.to_numpy()
+
+        # FECHAS: un formato por columna, validado de forma vectorizada
+        cubiertos = pd.Series(False, index=valores.index)
+        coberturas = {}
+        for formato, patron in self.patrones_fecha.items():
+            candidatos = valores.str.fullmatch(patron)
+            if not candidatos.any():
+                continue
+            validos = candidatos & pd.to_datetime(valores.where(candidatos), format=formato, errors='coerce').notna()
+            if validos.any():
+                coberturas[formato] = pesos[validos.to_numpy()].sum() / total
+                cubiertos |= validos
+
+        formatos_fecha = sorted(coberturas, key=lambda f: (-coberturas[f], self.formatos_fecha.index(f)))
+
+        confianza = {
+            'fecha': float(pesos[cubiertos.to_numpy()].sum() / total),
+            'numero': float(pesos[valores.str.fullmatch(PATRON_NUMERICO).to_numpy()].sum() / total),
+            'booleano': float(pesos[valores.str.lower().isin(VALORES_BOOLEANOS).to_numpy()].sum() / total)
+        }
+
+        if confianza['fecha'] > self.umbral_fecha:
+            tipo = 'fecha'
+        elif confianza['numero'] > self.umbral_numero:
+            tipo = 'numero'
+        elif confianza['booleano'] > self.umbral_booleano:
+            tipo = 'booleano'
+        else:
+            tipo = 'texto'
+
+        return {'tipo': tipo, 'confianza': confianza, 'formatos_fecha': formatos_fecha}
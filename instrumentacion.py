@@ -0,0 +1,242 @@
+import contextlib
+import cProfile
+import json
+import os
+import sys
+import time
+import tracemalloc
+from typing import Dict, Iterator, List, Optional
+
+import pandas as pd
+
+# `resource` solo existe en Unix; en Windows la memoria se mide con psutil si está instalado
+try:
+    import resource
+except ImportError:
+    resource = None
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+def memoria_proceso() -> Optional[int]:
+    """Memoria residente actual del proceso en bytes (None si no se puede medir)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    # Sin /proc ni psutil: el pico sirve como aproximación
+    return pico_memoria_proceso()
+
+
+def pico_memoria_proceso() -> Optional[int]:
+    """Pico de memoria residente del proceso en bytes (None si no se puede medir)"""
+    if resource is not None:
+        # ru_maxrss está en KB en Linux y en bytes en macOS
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return pico if sys.platform == 'darwin' else pico * 1024
+    if psutil is not None:
+        informacion = psutil.Process().memory_info()
+        # peak_wset es el pico en Windows
+        return getattr(informacion, 'peak_wset', informacion.rss)
+    return None
+
+
+def _dimensiones(datos) -> Dict:
+    """Filas y bytes (sin recorrer cadenas) de un DataFrame; vacío para otros objetos"""
+    if isinstance(datos, pd.DataFrame):
+        return {'filas': len(datos), 'bytes': int(datos.memory_usage(index=False, deep=False).sum())}
+    return {'filas': None, 'bytes': None}
+
+
+# ------------------------------------------------------------------ sumideros
+class SumideroMemoria:
+    """Guarda los eventos en una lista (útil en pruebas y notebooks)"""
+
+    def __init__(self):
+        self.eventos: List[Dict] = []
+
+    def registrar(self, evento: Dict):
+        self.eventos.append(evento)
+
+    def cerrar(self):
+        pass
+
+
+class SumideroJSONL:
+    """Escribe un evento JSON por línea, anexando al archivo indicado"""
+
+    def __init__(self, ruta: str):
+        directorio = os.path.dirname(ruta)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+        self.ruta = ruta
+        self._archivo = open(ruta, 'a', encoding='utf-8')
+
+    def registrar(self, evento: Dict):
+        self._archivo.write(json.dumps(evento, ensure_ascii=False, default=str) + '\n')
+        self._archivo.flush()
+
+    def cerrar(self):
+        if not self._archivo.closed:
+            self._archivo.close()
+
+
+class MedicionEtapa:
+    """Evento de una etapa en curso; la etapa informa su resultado con `salida()`"""
+
+    def __init__(self, nombre: str, entrada, contexto: Dict):
+        self.evento = {'etapa': nombre, **contexto}
+        dimensiones = _dimensiones(entrada)
+        self.evento['filas_entrada'] = dimensiones['filas']
+        self.evento['bytes_entrada'] = dimensiones['bytes']
+        self.evento['filas_salida'] = None
+        self.evento['bytes_salida'] = None
+
+    def salida(self, datos):
+        """Registrar filas y bytes del resultado de la etapa"""
+        dimensiones = _dimensiones(datos)
+        self.evento['filas_salida'] = dimensiones['filas']
+        self.evento['bytes_salida'] = dimensiones['bytes']
+
+    def agregar(self, **datos):
+        """Agregar campos propios de la etapa al evento"""
+        self.evento.update(datos)
+
+
+class Instrumentador:
+    """
+    Medición estructurada de las etapas de limpieza.
+
+    Cada etapa produce un evento con tiempo real, tiempo de CPU, filas y bytes de
+    entrada/salida y variación de memoria residente, que se envía a los sumideros
+    configurados. Opcionalmente una etapa se perfila con cProfile y tracemalloc.
+    En modo silencioso no se escribe nada en consola.
+    """
+
+    def __init__(self, sumideros: Optional[List] = None, silencioso: bool = False,
+                 etapa_perfilada: Optional[str] = None, directorio_perfiles: str = 'perfiles',
+                 lineas_asignaciones: int = 10):
+        self.sumideros = list(sumideros or [])
+        self.silencioso = silencioso
+        self.etapa_perfilada = etapa_perfilada
+        self.directorio_perfiles = directorio_perfiles
+        self.lineas_asignaciones = lineas_asignaciones
+        self.contexto: Dict = {}
+        self._ejecuciones_perfiladas = 0
+
+    @classmethod
+    def desde_configuracion(cls, config_instrumentacion: Optional[Dict] = None) -> 'Instrumentador':
+        """Construir el instrumentador a partir de la sección 'instrumentacion' de la configuración"""
+        config = config_instrumentacion or {}
+        sumideros = []
+        if config.get('archivo_eventos'):
+            sumideros.append(SumideroJSONL(config['archivo_eventos']))
+        return cls(
+            sumideros=sumideros,
+            silencioso=config.get('silencioso', False),
+            etapa_perfilada=config.get('perfilar_etapa'),
+            directorio_perfiles=config.get('directorio_perfiles', 'perfiles')
+        )
+
+    def imprimir(self, *mensaje, **opciones):
+        """print() que respeta el modo silencioso"""
+        if not self.silencioso:
+            print(*mensaje, **opciones)
+
+    @contextlib.contextmanager
+    def con_contexto(self, **datos) -> Iterator[None]:
+        """Agregar campos (archivo, bloque...) a los eventos emitidos dentro del bloque"""
+        anterior = self.contexto
+        self.contexto = {**anterior, **datos}
+        try:
+            yield
+        finally:
+            self.contexto = anterior
+
+    @contextlib.contextmanager
+    def etapa(self, nombre: str, entrada=None) -> Iterator[MedicionEtapa]:
+        """Medir una etapa; el evento se emite al salir, también si la etapa falla"""
+        medicion = MedicionEtapa(nombre, entrada, self.contexto)
+        perfilador = self._iniciar_perfil() if nombre == self.etapa_perfilada else None
+
+        memoria_inicial = memoria_proceso()
+        cpu_inicial = time.process_time()
+        inicio = time.perf_counter()
+        medicion.evento['inicio'] = time.time()
+        try:
+            yield medicion
+            medicion.evento['estado'] = 'ok'
+        except BaseException as e:
+            medicion.evento['estado'] = 'error'
+            medicion.evento['error'] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            medicion.evento['segundos'] = time.perf_counter() - inicio
+            medicion.evento['segundos_cpu'] = time.process_time() - cpu_inicial
+            memoria_final = memoria_proceso()
+            medicion.evento['delta_memoria_bytes'] = (
+                memoria_final - memoria_inicial if memoria_final is not None and memoria_inicial is not None else None
+            )
+            if perfilador is not None:
+                medicion.agregar(**self._finalizar_perfil(nombre, perfilador))
+            self.emitir(medicion.evento)
+
+    def emitir(self, evento: Dict):
+        for sumidero in self.sumideros:
+            sumidero.registrar(evento)
+
+    def cerrar(self):
+        for sumidero in self.sumideros:
+            sumidero.cerrar()
+
+    # -------------------------------------------------------------- perfilado
+    def _iniciar_perfil(self) -> Dict:
+        perfilador = {'cprofile': cProfile.Profile(), 'tracemalloc_propio': not tracemalloc.is_tracing()}
+        if perfilador['tracemalloc_propio']:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        perfilador['memoria_inicial'] = tracemalloc.get_traced_memory()[0]
+        perfilador['cprofile'].enable()
+        return perfilador
+
+    def _finalizar_perfil(self, nombre: str, perfilador: Dict) -> Dict:
+        perfilador['cprofile'].disable()
+        pico = tracemalloc.get_traced_memory()[1] - perfilador['memoria_inicial']
+        estadisticas = tracemalloc.take_snapshot().statistics('lineno')[:self.lineas_asignaciones]
+        if perfilador['tracemalloc_propio']:
+            tracemalloc.stop()
+
+        self._ejecuciones_perfiladas += 1
+        os.makedirs(self.directorio_perfiles, exist_ok=True)
+        archivo_perfil = os.path.join(self.directorio_perfiles, f"{nombre}_{self._ejecuciones_perfiladas:03d}.prof")
+        perfilador['cprofile'].dump_stats(archivo_perfil)
+
+        return {
+            'archivo_perfil': archivo_perfil,
+            'pico_tracemalloc_bytes': max(pico, 0),
+            'asignaciones_principales': [
+                {'ubicacion': str(estadistica.traceback[0]), 'bytes': estadistica.size}
+                for estadistica in estadisticas
+            ]
+        }
+
+
+def resumir_eventos(eventos: List[Dict]) -> pd.DataFrame:
+    """Agregar eventos por etapa (suma de bloques y particiones) para inspección rápida"""
+    if not eventos:
+        return pd.DataFrame()
+    tabla = pd.DataFrame(eventos)
+    return tabla.groupby('etapa', sort=False).agg(
+        ejecuciones=('etapa', 'size'),
+        segundos=('segundos', 'sum'),
+        segundos_cpu=('segundos_cpu', 'sum'),
+        filas_entrada=('filas_entrada', 'sum'),
+        filas_salida=('filas_salida', 'sum'),
+        delta_memoria_bytes=('delta_memoria_bytes', 'sum')
+    )
@@ -1,21 +1,65 @@
 import pandas as pd
 import numpy as np
 import re
-from datetime import datetime
 import unicodedata
 import os
-from typing import Dict, List, Any, Optional
+import importlib.util
+from typing import Dict, List, Any, Optional, Tuple
+
+from almacenamiento_columnar import detectar_formato, eliminar_salida, escribir_columnar
+from deduplicacion import DeduplicadorFilas
+from inferencia_tipos import InferidorTipos
+from instrumentacion import Instrumentador
+from normalizacion_fechas import NormalizadorFechas
+from normalizacion_texto import NormalizadorTexto
+from reglas_validacion import COLUMNA_REGLAS_INCUMPLIDAS, MotorValidacion
+from representacion_compacta import compactar_dataframe, restaurar_punto_fijo
+from resolucion_geografica import ResolutorGeografico
 
 class LimpiezaAutomatizada:
     """
     Sistema automatizado y reutilizable para limpieza de datos - VERSIÓN OPTIMIZADA
     """
     
-    def __init__(self, archivo_csv: str, config_limpieza: Dict = None):
+    # Disposición posicional de los archivos con columnas desplazadas
+    COLUMNAS_REORGANIZADAS = [
+        'ciudad', 'fecha', 'producto', 'tipo_producto', 'cantidad',
+        'precio_unitario', 'tipo_venta', 'tipo_cliente', 'descuento', 'costo_envio'
+    ]
+    PAIS_REORGANIZADO = 'Colombia'
+    COLUMNAS_NUMERICAS = ['cantidad', 'precio_unitario', 'descuento', 'costo_envio', 'total_ventas']
+    
+    def __init__(self, archivo_csv: str, config_limpieza: Dict = None,
+                 instrumentador: Optional[Instrumentador] = None,
+                 deduplicador: Optional[DeduplicadorFilas] = None):
         self.archivo_csv = archivo_csv
         self.df = None
         self.config_limpieza = config_limpieza or self._configuracion_predeterminada()
+        self.instrumentador = instrumentador or Instrumentador.desde_configuracion(
+            self.config_limpieza.get('instrumentacion')
+        )
         self.estadisticas_limpieza = {}
+        self._resolutor_geografico = None
+        self._normalizador_texto = None
+        self._normalizador_fechas = None
+        self._conteos_fechas = {}
+        # Un deduplicador recibido se comparte entre archivos y lo cierra quien lo creó
+        self._deduplicador = deduplicador
+        self._deduplicador_compartido = deduplicador is not None
+        self._duplicados_bloque = 0
+        self._huellas_bloque = None
+        # Huellas de las filas de `df` calculadas antes de compactar (caché de limpieza)
+        self.huellas_resultado = None
+        # Reglas previas al cálculo de total_ventas y reglas que lo usan
+        self._motores_validacion = None
+        self._resumen_validacion = {}
+        self._cuarentena_escrita = False
+        # Ruta de cuarentena propia (p. ej. una por partición); None = la de la configuración
+        self.archivo_cuarentena = None
+        self.cuarentena = None
+        # False cuando quien llama recoge `cuarentena` de cada bloque (procesos de la canalización)
+        self.cuarentena_en_archivo = True
+        self.plan_ingesta = None
         
     def _configuracion_predeterminada(self) -> Dict:
         """Configuración predeterminada para limpieza"""
@@ -41,129 +85,253 @@ class LimpiezaAutomatizada:
                 'texto': {
                     'min_length': 1,
                     'max_length': 100,
-                    'permitir_numeros': False,
-                    'case': 'title'
+                    'permitir_numeros': True,
+                    'case': 'title',
+                    'accion': 'marcar'
                 },
                 'numero': {
                     'min_value': 0,
                     'max_value': 1000000,
-                    'decimales': 2
+                    'decimales': 2,
+                    # 'cuarentena' requiere archivo_cuarentena
+                    'accion': 'marcar'
                 },
                 'fecha': {
                     'formatos': ['%Y-%m-%d', '%d/%m/%Y', '%m/%d/%Y', '%Y-%m-%d %H:%M:%S'],
                     'rango_min': '2020-01-01',
-                    'rango_max': '2025-12-31'
-                }
+                    'rango_max': '2025-12-31',
+                    'eliminar_invalidas': False,
+                    'formato_salida': '%Y-%m-%d'
+                },
+                # Expresiones vectorizadas sobre las columnas (True = fila válida)
+                'personalizadas': [],
+                'archivo_cuarentena': None
+            },
+            'geografia': {
+                'archivo_mapeo': None,
+                'resolucion_ambiguedades': None,
+                'precedencia_paises': None,
+                'pais_desconocido': 'Desconocido'
+            },
+            'deteccion': {
+                'filas_muestra': 100,
+                'muestreo_completo': False,
+                'tamano_bloque': 100000,
+                'motor_lectura': 'auto'
             },
+            'salida': {
+                'particionar_por_mes': False,
+                'compresion': None,
+                'filas_por_grupo': 100000
+            },
+            'memoria': {
+                'modo_compacto': False,
+                'columnas_enteras': ['cantidad'],
+                'representacion_decimal': 'float32',
+                'umbral_categorias': 0.5
+            },
+            'instrumentacion': {
+                'silencioso': False,
+                'archivo_eventos': None,
+                'perfilar_etapa': None,
+                'directorio_perfiles': 'perfiles'
+            },
+            # Activa por defecto: la salida ya no conserva filas repetidas; 'activa': False reproduce la anterior
+            'deduplicacion': {
+                'activa': True,
+                'columnas_clave': None,
+                'max_huellas_memoria': 4000000,
+                'directorio_temporal': None,
+                'bits_por_huella': 10
+            },
+            'archivo_cache_texto': None,
             'columnas_orden_preferido': [
                 'fecha', 'producto', 'tipo_producto', 'cantidad', 'precio_unitario',
                 'ciudad', 'pais', 'tipo_venta', 'tipo_cliente', 'descuento', 'costo_envio'
             ]
         }
     
+    def _imprimir(self, *mensaje):
+        """Mensaje de progreso en consola (se omite en modo silencioso)"""
+        self.instrumentador.imprimir(*mensaje)
+    
     def _reorganizar_datos_mal_estructurados(self, df: pd.DataFrame) -> pd.DataFrame:
         """Reorganizar datos que están en columnas incorrectas - OPTIMIZADO"""
-        print("🔄 Reorganizando datos mal estructurados...")
+        self._imprimir("🔄 Reorganizando datos mal estructurados...")
         
         columnas_actuales = df.columns.tolist()
         
-        if len(columnas_actuales) >= 10:
+        if len(columnas_actuales) >= len(self.COLUMNAS_REORGANIZADAS):
             try:
-                # USAR OPERACIONES VECTORIZADAS EN LUGAR DE ITERROWS
-                nuevos_datos = {
-                    'ciudad': df.iloc[:, 0].astype(str) if len(df.columns) > 0 else '',
-                    'fecha': df.iloc[:, 1].astype(str) if len(df.columns) > 1 else '',
-                    'producto': df.iloc[:, 2].astype(str) if len(df.columns) > 2 else '',
-                    'tipo_producto': df.iloc[:, 3].astype(str) if len(df.columns) > 3 else '',
-                    'cantidad': df.iloc[:, 4].astype(str) if len(df.columns) > 4 else '',
-                    'precio_unitario': df.iloc[:, 5].astype(str) if len(df.columns) > 5 else '',
-                    'tipo_venta': df.iloc[:, 6].astype(str) if len(df.columns) > 6 else '',
-                    'tipo_cliente': df.iloc[:, 7].astype(str) if len(df.columns) > 7 else '',
-                    'descuento': df.iloc[:, 8].astype(str) if len(df.columns) > 8 else '',
-                    'costo_envio': df.iloc[:, 9].astype(str) if len(df.columns) > 9 else '',
-                    'pais': 'Colombia'
-                }
+                # RENOMBRADO POSICIONAL: SIN CONVERTIR A TEXTO NI COPIAR LOS DATOS
+                df_corregido = df.iloc[:, :len(self.COLUMNAS_REORGANIZADAS)].set_axis(self.COLUMNAS_REORGANIZADAS, axis=1)
+                df_corregido['pais'] = self.PAIS_REORGANIZADO
                 
-                df_corregido = pd.DataFrame(nuevos_datos)
-                print(f"   ✅ Datos reorganizados: {len(df_corregido)} filas")
+                self._imprimir(f"   ✅ Datos reorganizados: {len(df_corregido)} filas")
                 return df_corregido
                 
             except Exception as e:
-                print(f"   ⚠ Error reorganizando datos: {e}")
+                self._imprimir(f"   ⚠ Error reorganizando datos: {e}")
                 return df
         else:
-            print("   ℹ️  Estructura de columnas parece correcta")
+            self._imprimir("   ℹ️  Estructura de columnas parece correcta")
             return df
     
     def _detectar_y_corregir_pais(self, df: pd.DataFrame) -> pd.DataFrame:
         """Detectar y corregir automáticamente el país - OPTIMIZADO"""
-        print("   🗺️  Detectando países basado en ciudades...")
-        
-        mapeo_ciudad_pais = {
-            'bogota': 'Colombia', 'medellin': 'Colombia', 'cali': 'Colombia',
-            'barranquilla': 'Colombia', 'cartagena': 'Colombia', 'cucuta': 'Colombia',
-            'bucaramanga': 'Colombia', 'pereira': 'Colombia', 'santa marta': 'Colombia',
-            'ibague': 'Colombia', 'past': 'Colombia', 'manizales': 'Colombia',
-            'monteria': 'Colombia', 'neiva': 'Colombia', 'villavicencio': 'Colombia',
-            'valledupar': 'Colombia', 'armenia': 'Colombia', 'sincelejo': 'Colombia',
-            'popayan': 'Colombia', 'itagui': 'Colombia', 'santiago': 'Colombia',
-            'cordoba': 'Colombia', 'trujillo': 'Colombia', 'valencia': 'Colombia',
-            'new york': 'Estados Unidos', 'miami': 'Estados Unidos', 'los angeles': 'Estados Unidos',
-            'chicago': 'Estados Unidos', 'houston': 'Estados Unidos',
-            'madrid': 'España', 'barcelona': 'España', 'valencia': 'España',
-            'ciudad de mexico': 'México', 'guadalajara': 'México', 'monterrey': 'México',
-            'buenos aires': 'Argentina', 'cordoba': 'Argentina', 'rosario': 'Argentina',
-            'sao paulo': 'Brasil', 'rio de janeiro': 'Brasil', 'brasilia': 'Brasil',
-            'lima': 'Perú', 'arequipa': 'Perú', 'trujillo': 'Perú',
-            'santiago': 'Chile', 'valparaiso': 'Chile', 'concepcion': 'Chile'
-        }
+        self._imprimir("   🗺️  Detectando países basado en ciudades...")
         
         if 'ciudad' in df.columns:
-            # VECTORIZAR LA OPERACIÓN EN LUGAR DE USAR APPLY
-            ciudades_clean = df['ciudad'].fillna('').astype(str).str.lower().str.strip()
-            
-            def buscar_pais(ciudad):
-                for ciudad_mapeo, pais in mapeo_ciudad_pais.items():
-                    if ciudad_mapeo == ciudad or ciudad_mapeo in ciudad or ciudad in ciudad_mapeo:
-                        return pais
-                return 'Desconocido'
-            
-            # Crear array de países usando list comprehension (más rápido que apply)
-            paises = [buscar_pais(ciudad) for ciudad in ciudades_clean]
-            df['pais'] = paises
+            # RESOLVER CADA CIUDAD DISTINTA UNA SOLA VEZ CON ÍNDICES PRECOMPILADOS
+            df['pais'] = self._obtener_resolutor_geografico().resolver_serie(df['ciudad'])
             
-            print(f"   ✅ Países detectados: {df['pais'].value_counts().to_dict()}")
+            if not self.instrumentador.silencioso:
+                self._imprimir(f"   ✅ Países detectados: {df['pais'].value_counts().to_dict()}")
         
         return df
     
+    def _obtener_resolutor_geografico(self) -> ResolutorGeografico:
+        """Construir (una sola vez) el resolutor ciudad → país según la configuración"""
+        if self._resolutor_geografico is None:
+            config_geo = self.config_limpieza.get('geografia', {})
+            opciones = {
+                'resolucion_ambiguedades': config_geo.get('resolucion_ambiguedades'),
+                'precedencia_paises': config_geo.get('precedencia_paises'),
+                'pais_desconocido': config_geo.get('pais_desconocido', 'Desconocido')
+            }
+            
+            if config_geo.get('archivo_mapeo'):
+                self._resolutor_geografico = ResolutorGeografico.desde_archivo(config_geo['archivo_mapeo'], **opciones)
+            else:
+                self._resolutor_geografico = ResolutorGeografico(**opciones)
+        
+        return self._resolutor_geografico
+    
     def detectar_estructura(self) -> Dict:
         """Detectar automáticamente la estructura del archivo - OPTIMIZADO"""
-        print("🔍 DETECTANDO ESTRUCTURA DEL ARCHIVO...")
+        self._imprimir("🔍 DETECTANDO ESTRUCTURA DEL ARCHIVO...")
         
         try:
-            # Leer solo las necesarias para análisis
-            self.df = pd.read_csv(self.archivo_csv, nrows=100)
-            print(f"📊 Archivo detectado: {self.archivo_csv}")
-            print(f"📏 Dimensiones: {self.df.shape[0]} filas, {self.df.shape[1]} columnas")
-            
-            columnas_originales = self.df.columns.tolist()
-            print(f"📋 Columnas originales: {columnas_originales}")
-            
-            self.df = self._reorganizar_datos_mal_estructurados(self.df)
-            mapeo_automatico = self._mapear_columnas_automatico(self.df.columns.tolist())
-            tipos_datos = self._analizar_tipos_datos()
+            with self.instrumentador.etapa('deteccion') as etapa:
+                # Leer solo las necesarias para análisis
+                config_deteccion = self.config_limpieza.get('deteccion', {})
+                self.df = pd.read_csv(self.archivo_csv, nrows=config_deteccion.get('filas_muestra', 100))
+                self._imprimir(f"📊 Archivo detectado: {self.archivo_csv}")
+                self._imprimir(f"📏 Dimensiones: {self.df.shape[0]} filas, {self.df.shape[1]} columnas")
+                
+                columnas_originales = self.df.columns.tolist()
+                self._imprimir(f"📋 Columnas originales: {columnas_originales}")
+                
+                self.df = self._reorganizar_datos_mal_estructurados(self.df)
+                mapeo_automatico = self._mapear_columnas_automatico(self.df.columns.tolist())
+                tipos_datos = self._analizar_tipos_datos(config_deteccion.get('muestreo_completo', False))
+                self.plan_ingesta = self._construir_plan_ingesta(columnas_originales, mapeo_automatico, tipos_datos)
+                self._imprimir(f"🧭 Plan de ingesta: {len(self.plan_ingesta['usecols'])} columnas, motor '{self.plan_ingesta['motor']}'")
+                etapa.salida(self.df)
             
             return {
                 'columnas_originales': columnas_originales,
                 'mapeo_propuesto': mapeo_automatico,
                 'tipos_datos': tipos_datos,
+                'plan_ingesta': self.plan_ingesta,
                 'muestra_datos': self.df.head(3).to_dict('records')
             }
             
         except Exception as e:
-            print(f"❌ Error detectando estructura: {e}")
+            self._imprimir(f"❌ Error detectando estructura: {e}")
             return {}
     
+    def _construir_plan_ingesta(self, columnas_originales: List[str], mapeo: Dict, tipos_datos: Dict) -> Dict:
+        """
+        Traducir la estructura detectada en un plan de lectura: columnas a leer,
+        renombrado posicional, dtype por columna y motor del parser.
+        """
+        config_deteccion = self.config_limpieza.get('deteccion', {})
+        reorganizado = self.df.columns.tolist()[:len(self.COLUMNAS_REORGANIZADAS)] == self.COLUMNAS_REORGANIZADAS
+        
+        if reorganizado:
+            usecols = list(range(len(self.COLUMNAS_REORGANIZADAS)))
+            nombres_base = list(self.COLUMNAS_REORGANIZADAS)
+            constantes = {'pais': self.PAIS_REORGANIZADO}
+        else:
+            usecols = list(range(len(columnas_originales)))
+            nombres_base = list(columnas_originales)
+            constantes = {}
+        columnas_fuente = [columnas_originales[i] for i in usecols]
+        
+        # dtype por columna de origen; sin entrada = el parser infiere el tipo
+        dtype = {}
+        for fuente, nombre in zip(columnas_fuente, nombres_base):
+            info = tipos_datos.get(nombre, {})
+            destino = mapeo.get(nombre, nombre)
+            if destino in self.COLUMNAS_NUMERICAS:
+                # float64 directo solo si todos los valores observados son numéricos
+                numerica = info.get('confianza', {}).get('numero', 0) == 1.0
+                dtype[fuente] = 'float64' if numerica else 'str'
+            elif destino == 'fecha' or info.get('tipo_probable') in ('texto', 'fecha'):
+                dtype[fuente] = 'str'
+        
+        motor = config_deteccion.get('motor_lectura', 'auto')
+        if motor == 'auto':
+            # pyarrow no renombra encabezados duplicados: solo se usa con nombres únicos
+            cabecera = pd.read_csv(self.archivo_csv, header=None, nrows=1, dtype=str).iloc[0].tolist()
+            unicos = len(set(cabecera)) == len(cabecera)
+            motor = 'pyarrow' if unicos and importlib.util.find_spec('pyarrow') else 'c'
+        
+        return {
+            'usecols': usecols,
+            'columnas_fuente': columnas_fuente,
+            'nombres_base': nombres_base,
+            'mapeo': mapeo,
+            'dtype': dtype,
+            'constantes': constantes,
+            'motor': motor,
+            'muestreo_completo': config_deteccion.get('muestreo_completo', False)
+        }
+    
+    def _leer_con_plan(self, fuente=None, mapeo_personalizado: Dict = None, tolerante: bool = False,
+                       motor: Optional[str] = None, **opciones):
+        """
+        Leer el CSV directamente en la disposición final (columnas, nombres y tipos)
+        según el plan de ingesta. Con `chunksize` devuelve un iterador de bloques.
+        
+        Si una columna numérica trae valores no numéricos, la lectura completa se
+        repite en modo tolerante (texto + conversión posterior con errors='coerce').
+        """
+        plan = self.plan_ingesta
+        motor = motor or plan['motor']
+        dtype = plan['dtype']
+        if tolerante:
+            dtype = {columna: ('str' if tipo == 'float64' else tipo) for columna, tipo in dtype.items()}
+        
+        mapeo = mapeo_personalizado or plan['mapeo']
+        nombres = [mapeo.get(nombre, nombre) for nombre in plan['nombres_base']]
+        constantes = {mapeo.get(nombre, nombre): valor for nombre, valor in plan['constantes'].items()}
+        
+        def aplicar_nombres(df: pd.DataFrame) -> pd.DataFrame:
+            df.columns = nombres
+            for columna, valor in constantes.items():
+                df[columna] = valor
+            return df
+        
+        try:
+            lector = pd.read_csv(
+                fuente if fuente is not None else self.archivo_csv,
+                usecols=plan['columnas_fuente'] if motor == 'pyarrow' else plan['usecols'],
+                dtype=dtype, engine=motor, **opciones
+            )
+        except ValueError as e:
+            if tolerante or 'chunksize' in opciones:
+                raise
+            self._imprimir(f"   ⚠ Lectura tipada no aplicable ({e}); se reintenta en modo tolerante")
+            if hasattr(fuente, 'seek'):
+                fuente.seek(0)
+            return self._leer_con_plan(fuente, mapeo_personalizado, True, motor, **opciones)
+        
+        if 'chunksize' in opciones:
+            return (aplicar_nombres(bloque) for bloque in lector)
+        return aplicar_nombres(lector)
+    
     def _mapear_columnas_automatico(self, columnas_originales: List[str]) -> Dict:
         """Mapear automáticamente columnas - OPTIMIZADO"""
         mapeo = {}
@@ -230,7 +398,7 @@ class LimpiezaAutomatizada:
         
         if columnas_a_eliminar:
             df = df.drop(columns=columnas_a_eliminar)
-            print(f"✅ Eliminadas {len(columnas_a_eliminar)} columnas duplicadas")
+            self._imprimir(f"✅ Eliminadas {len(columnas_a_eliminar)} columnas duplicadas")
         
         return df
     
@@ -244,20 +412,38 @@ class LimpiezaAutomatizada:
         columnas_finales = columnas_ordenadas + sorted(columnas_restantes)
         
         if columnas_finales != columnas_actuales:
-            print("🔄 Reordenando columnas...")
+            self._imprimir("🔄 Reordenando columnas...")
             df = df[columnas_finales]
         
         return df
     
-    def _analizar_tipos_datos(self) -> Dict:
+    def _crear_inferidor_tipos(self) -> InferidorTipos:
+        """Crear el motor de inferencia de tipos con los formatos de fecha configurados"""
+        return InferidorTipos(formatos_fecha=self.config_limpieza['reglas_limpieza']['fecha']['formatos'])
+    
+    def _analizar_tipos_datos(self, muestreo_completo: bool = False) -> Dict:
         """Analizar tipos de datos - OPTIMIZADO"""
+        inferidor = self._crear_inferidor_tipos()
+        
+        if muestreo_completo:
+            # MUESTREO POR STREAMING DEL ARCHIVO COMPLETO (solo se acumulan frecuencias)
+            tamano_bloque = self.config_limpieza.get('deteccion', {}).get('tamano_bloque', 100000)
+            for bloque in pd.read_csv(self.archivo_csv, chunksize=tamano_bloque, low_memory=False):
+                inferidor.acumular(self._reorganizar_datos_mal_estructurados(bloque))
+        else:
+            inferidor.acumular(self.df)
+        
+        inferencia = inferidor.inferir()
+        
         tipos = {}
         for columna in self.df.columns:
             valores_unicos = self.df[columna].dropna().unique()[:5]
-            tipo_probable = self._determinar_tipo_columna(self.df[columna])
+            resultado = inferencia.get(columna, {'tipo': 'desconocido', 'confianza': {}, 'formatos_fecha': []})
             
             tipos[columna] = {
-                'tipo_probable': tipo_probable,
+                'tipo_probable': resultado['tipo'],
+                'confianza': resultado['confianza'],
+                'formatos_fecha': resultado['formatos_fecha'],
                 'valores_unicos': valores_unicos.tolist(),
                 'nulos': self.df[columna].isna().sum(),
                 'ejemplos': valores_unicos.tolist()[:3]
@@ -267,63 +453,7 @@ class LimpiezaAutomatizada:
     
     def _determinar_tipo_columna(self, serie: pd.Series) -> str:
         """Determinar automáticamente el tipo de columna - OPTIMIZADO"""
-        if serie.empty:
-            return 'desconocido'
-            
-        serie_str = serie.dropna().astype(str)
-        
-        if len(serie_str) == 0:
-            return 'desconocido'
-        
-        # MUESTREO PARA ACELERAR (usar solo muestra de datos)
-        if len(serie_str) > 1000:
-            serie_muestra = serie_str.sample(n=1000, random_state=42)
-        else:
-            serie_muestra = serie_str
-        
-        # Usar operaciones vectorizadas para verificación
-        fecha_count = serie_muestra.apply(self._es_fecha_valida).sum()
-        if fecha_count / len(serie_muestra) > 0.5:
-            return 'fecha'
-        
-        numerico_count = serie_muestra.apply(self._es_numerico).sum()
-        if numerico_count / len(serie_muestra) > 0.8:
-            return 'numero'
-        
-        valores_bool = ['true', 'false', '1', '0', 'si', 'no', 'sí', 'yes', 'verdadero', 'falso']
-        bool_count = serie_muestra.str.lower().str.strip().isin(valores_bool).sum()
-        if bool_count / len(serie_muestra) > 0.8:
-            return 'booleano'
-        
-        return 'texto'
-    
-    def _es_fecha_valida(self, valor: str) -> bool:
-        """Verificar si un valor es una fecha válida - OPTIMIZADO"""
-        try:
-            # Intentar parsing directo con pandas primero (más rápido)
-            pd.to_datetime(valor, errors='raise')
-            return True
-        except:
-            # Solo si falla, intentar formatos específicos
-            formatos = ['%Y-%m-%d', '%d/%m/%Y', '%m/%d/%Y', '%Y-%m-%d %H:%M:%S']
-            for formato in formatos:
-                try:
-                    datetime.strptime(str(valor), formato)
-                    return True
-                except ValueError:
-                    continue
-            return False
-    
-    def _es_numerico(self, valor: str) -> bool:
-        """Verificar si un valor es numérico - OPTIMIZADO"""
-        try:
-            valor_str = str(valor).strip()
-            if not valor_str:
-                return False
-            # Verificar patron numérico con regex (más rápido)
-            return bool(re.match(r'^-?\d*\.?\d+$', valor_str))
-        except:
-            return False
+        return self._crear_inferidor_tipos().inferir_serie(serie)['tipo']
     
     def _normalizar_texto(self, texto: str) -> str:
         """Normalizar texto para comparación - OPTIMIZADO"""
@@ -336,92 +466,257 @@ class LimpiezaAutomatizada:
     
     def aplicar_limpieza(self, mapeo_personalizado: Dict = None) -> pd.DataFrame:
         """Aplicar limpieza completa - OPTIMIZADO"""
-        print("\n🧹 APLICANDO LIMPIEZA AUTOMATIZADA...")
+        self._imprimir("\n🧹 APLICANDO LIMPIEZA AUTOMATIZADA...")
         
+        self._iniciar_validacion()
         try:
-            # Cargar datos con tipos optimizados
-            self.df = pd.read_csv(self.archivo_csv, low_memory=False)
+            self._liberar_deduplicador()
+            self.huellas_resultado = None
+            with self.instrumentador.etapa('lectura') as etapa:
+                if self.plan_ingesta:
+                    # LECTURA TIPADA EN UNA SOLA PASADA SEGÚN EL PLAN DE DETECCIÓN
+                    self.df = self._leer_con_plan(mapeo_personalizado=mapeo_personalizado)
+                else:
+                    self.df = pd.read_csv(self.archivo_csv, low_memory=False)
+                etapa.salida(self.df)
             registros_originales = len(self.df)
             
-            self.df = self._reorganizar_datos_mal_estructurados(self.df)
+            self.df = self._procesar_bloque(self.df, mapeo_personalizado, desde_plan=self.plan_ingesta is not None)
+            self.huellas_resultado = self._huellas_bloque
+            self._obtener_normalizador_texto().guardar_cache()
+            with self.instrumentador.etapa('compactacion', self.df) as etapa:
+                self.df, reporte_memoria = self._compactar_memoria(self.df)
+                etapa.salida(self.df)
+            self._calcular_estadisticas_limpieza(registros_originales)
+            if reporte_memoria:
+                self.estadisticas_limpieza['memoria'] = reporte_memoria
+            self._mostrar_resumen_limpieza()
+            self._terminar_cuarentena(True)
             
-            # Aplicar mapeo de columnas
-            mapeo_final = mapeo_personalizado or self._mapear_columnas_automatico(self.df.columns.tolist())
-            self.df = self.df.rename(columns=mapeo_final)
-            print("✅ Columnas renombradas")
+            return self.df
             
-            self.df = self._eliminar_columnas_duplicadas(self.df)
-            self.df = self._detectar_y_corregir_pais(self.df)
+        except Exception as e:
+            self._terminar_cuarentena(False)
+            self._imprimir(f"❌ Error en limpieza: {e}")
+            import traceback
+            traceback.print_exc()
+            return pd.DataFrame()
+        finally:
+            self._liberar_deduplicador()
+    
+    def aplicar_limpieza_por_bloques(self, archivo_salida: str = "datos_limpios.csv",
+                                     tamano_bloque: int = 100000,
+                                     mapeo_personalizado: Dict = None) -> Dict:
+        """Aplicar limpieza en modo streaming: la memoria depende del tamaño de bloque, no del archivo"""
+        self._imprimir(f"\n🧹 APLICANDO LIMPIEZA AUTOMATIZADA POR BLOQUES ({tamano_bloque:,} filas)...")
+        
+        self._iniciar_validacion()
+        try:
+            self._liberar_deduplicador()
+            estadisticas = {}
+            columnas_salida = None
+            formato = detectar_formato(archivo_salida)
+            if formato == 'feather':
+                raise ValueError("La limpieza por bloques escribe CSV o parquet; feather requiere el DataFrame completo")
             
-            # LIMPIEZA POR LOTES EN VEZ DE COLUMNA POR COLUMNA
-            self._aplicar_limpieza_por_lotes()
+            # LEER, LIMPIAR Y ESCRIBIR CADA BLOQUE SIN CARGAR EL ARCHIVO COMPLETO
+            desde_plan = self.plan_ingesta is not None
+            if desde_plan:
+                # Un bloque tardío no puede reintentarse: float64 directo solo si se verificó todo el archivo
+                lector = self._leer_con_plan(
+                    mapeo_personalizado=mapeo_personalizado, motor='c', chunksize=tamano_bloque,
+                    tolerante=not self.plan_ingesta['muestreo_completo']
+                )
+            else:
+                lector = pd.read_csv(self.archivo_csv, chunksize=tamano_bloque, low_memory=False)
             
-            self._calcular_total_ventas()
-            self.df = self._reordenar_columnas(self.df)
-            self._calcular_estadisticas_limpieza(registros_originales)
+            bloques = iter(lector)
+            numero_bloque = 0
+            while True:
+                with self.instrumentador.con_contexto(bloque=numero_bloque + 1):
+                    with self.instrumentador.etapa('lectura') as etapa:
+                        bloque = next(bloques, None)
+                        etapa.salida(bloque)
+                    if bloque is None:
+                        break
+                    numero_bloque += 1
+                    registros_bloque = len(bloque)
+                    bloque = self._eliminar_columnas_duplicadas(
+                        self._procesar_bloque(bloque, mapeo_personalizado, desde_plan=desde_plan)
+                    )
+                    
+                    with self.instrumentador.etapa('guardado', bloque) as etapa:
+                        if columnas_salida is None:
+                            columnas_salida = bloque.columns.tolist()
+                            if formato != 'csv':
+                                eliminar_salida(archivo_salida)
+                        else:
+                            bloque = bloque.reindex(columns=columnas_salida)
+                        
+                        if formato == 'csv':
+                            self._escribir_csv(bloque, archivo_salida, anexar=numero_bloque > 1)
+                        else:
+                            self._escribir_columnar(bloque, archivo_salida, formato,
+                                                    nombre_bloque=f"bloque{numero_bloque:05d}")
+                        etapa.salida(bloque)
+                
+                estadisticas = self._combinar_estadisticas(
+                    estadisticas, self._estadisticas_bloque(bloque, registros_bloque)
+                )
+                self._imprimir(f"   📦 Bloque {numero_bloque}: {len(bloque):,} filas escritas")
+            
+            self._terminar_cuarentena(True)
+            if columnas_salida is None:
+                self._imprimir("⚠ El archivo no contiene registros")
+                return {}
+            
+            # No retener el último bloque: el resultado completo está en disco
+            self.df = None
+            self.cuarentena = None
+            self._obtener_normalizador_texto().guardar_cache()
+            self.estadisticas_limpieza = estadisticas
             self._mostrar_resumen_limpieza()
+            self._imprimir(f"\n💾 Datos guardados en: {archivo_salida}")
             
-            return self.df
+            return self.estadisticas_limpieza
             
         except Exception as e:
-            print(f"❌ Error en limpieza: {e}")
+            self._terminar_cuarentena(False)
+            self._imprimir(f"❌ Error en limpieza por bloques: {e}")
             import traceback
             traceback.print_exc()
-            return pd.DataFrame()
+            return {}
+        finally:
+            self._liberar_deduplicador()
+    
+    def _procesar_bloque(self, df: pd.DataFrame, mapeo_personalizado: Dict = None,
+                         desde_plan: bool = False) -> pd.DataFrame:
+        """Ejecutar todas las etapas de limpieza sobre un DataFrame (archivo completo o bloque)"""
+        etapas = self.instrumentador
+        if desde_plan:
+            # El plan de ingesta ya entregó las columnas reorganizadas, renombradas y tipadas
+            self.df = df
+        else:
+            with etapas.etapa('reorganizacion', df) as etapa:
+                self.df = self._reorganizar_datos_mal_estructurados(df)
+                etapa.salida(self.df)
+            
+            # Aplicar mapeo de columnas
+            with etapas.etapa('mapeo', self.df) as etapa:
+                mapeo_final = mapeo_personalizado or self._mapear_columnas_automatico(self.df.columns.tolist())
+                self.df = self.df.rename(columns=mapeo_final)
+                etapa.salida(self.df)
+            self._imprimir("✅ Columnas renombradas")
+        
+        self.df = self._eliminar_columnas_duplicadas(self.df)
+        with etapas.etapa('pais', self.df) as etapa:
+            self.df = self._detectar_y_corregir_pais(self.df)
+            etapa.salida(self.df)
+        with etapas.etapa('fechas', self.df) as etapa:
+            self._normalizar_fechas()
+            etapa.agregar(conteos_fechas=dict(self._conteos_fechas))
+            etapa.salida(self.df)
+        
+        # LIMPIEZA POR LOTES EN VEZ DE COLUMNA POR COLUMNA
+        with etapas.etapa('limpieza_lotes', self.df) as etapa:
+            self._aplicar_limpieza_por_lotes()
+            etapa.salida(self.df)
+        
+        with etapas.etapa('validacion', self.df) as etapa:
+            resumen = self._validar_reglas()
+            etapa.agregar(**{clave: valor for clave, valor in resumen.items() if clave != 'violaciones'})
+            etapa.salida(self.df)
+        
+        with etapas.etapa('total_ventas', self.df) as etapa:
+            self._calcular_total_ventas()
+            etapa.salida(self.df)
+        
+        # Las reglas que usan total_ventas se evalúan con el total ya calculado
+        with etapas.etapa('validacion_total', self.df) as etapa:
+            resumen = self._validar_reglas(sobre_total=True)
+            etapa.agregar(**{clave: valor for clave, valor in resumen.items() if clave != 'violaciones'})
+            etapa.salida(self.df)
+        self.df = self._reordenar_columnas(self.df)
+        self._entregar_cuarentena()
+        
+        with etapas.etapa('deduplicacion', self.df) as etapa:
+            self._eliminar_filas_duplicadas()
+            etapa.agregar(duplicados_eliminados=self._duplicados_bloque)
+            etapa.salida(self.df)
+        return self.df
     
     def _aplicar_limpieza_por_lotes(self):
         """Aplicar limpieza por lotes en vez de columna por columna - OPTIMIZADO"""
-        print("   🚀 Aplicando limpieza por lotes...")
+        self._imprimir("   🚀 Aplicando limpieza por lotes...")
         
         # Limpiar columnas numéricas críticas en lote
-        columnas_numericas = ['cantidad', 'precio_unitario', 'descuento', 'costo_envio', 'total_ventas']
+        columnas_numericas = self.COLUMNAS_NUMERICAS
         columnas_existentes = [col for col in columnas_numericas if col in self.df.columns]
         
         if columnas_existentes:
             # CONVERTIR MÚLTIPLES COLUMNAS A LA VEZ
             self.df[columnas_existentes] = self.df[columnas_existentes].apply(
-                lambda col: pd.to_numeric(col, errors='coerce')
+                lambda col: pd.to_numeric(col, errors='coerce').astype('float64')
             )
             
-            # Aplicar límites y decimales
-            min_val = self.config_limpieza['reglas_limpieza']['numero']['min_value']
-            max_val = self.config_limpieza['reglas_limpieza']['numero']['max_value']
+            # Aplicar decimales (los límites los valida el motor de reglas)
             decimales = self.config_limpieza['reglas_limpieza']['numero']['decimales']
-            
-            self.df[columnas_existentes] = self.df[columnas_existentes].clip(lower=min_val, upper=max_val)
             if decimales is not None:
                 self.df[columnas_existentes] = self.df[columnas_existentes].round(decimales)
         
         # Limpiar texto en lote para columnas no numéricas
         columnas_texto = [col for col in self.df.columns 
-                         if col not in columnas_numericas and self.df[col].dtype == 'object']
+                         if col not in columnas_numericas
+                         and (self.df[col].dtype == 'object' or pd.api.types.is_string_dtype(self.df[col].dtype))]
         
-        if columnas_texto:
-            self.df[columnas_texto] = self.df[columnas_texto].apply(self._limpiar_texto_vectorizado)
+        for columna in columnas_texto:
+            self.df[columna] = self._limpiar_texto_vectorizado(self.df[columna])
+    
+    def _obtener_normalizador_texto(self) -> NormalizadorTexto:
+        """Construir (una sola vez) el normalizador de texto con caché de valores"""
+        if self._normalizador_texto is None:
+            self._normalizador_texto = NormalizadorTexto(
+                case=self.config_limpieza['reglas_limpieza']['texto']['case'],
+                archivo_cache=self.config_limpieza.get('archivo_cache_texto')
+            )
+        return self._normalizador_texto
     
     def _limpiar_texto_vectorizado(self, serie: pd.Series) -> pd.Series:
-        """Limpiar texto usando operaciones vectorizadas - OPTIMIZADO"""
-        # Operaciones vectorizadas nativas de pandas (mucho más rápidas)
-        serie_limpia = serie.astype(str).str.strip()
-        serie_limpia = serie_limpia.str.replace(r'[^a-zA-Z0-9áéíóúÁÉÍÓÚñÑüÜ\s\-_\.]', ' ', regex=True)
-        serie_limpia = serie_limpia.str.replace(r'\s+', ' ', regex=True).str.strip()
-        serie_limpia = serie_limpia.replace('', np.nan)
-        
-        config_case = self.config_limpieza['reglas_limpieza']['texto']['case']
-        if config_case == 'lower':
-            serie_limpia = serie_limpia.str.lower()
-        elif config_case == 'upper':
-            serie_limpia = serie_limpia.str.upper()
-        elif config_case == 'title':
-            serie_limpia = serie_limpia.str.title()
-        
-        return serie_limpia
+        """Limpiar texto sobre valores distintos y devolver dtype category - OPTIMIZADO"""
+        return self._obtener_normalizador_texto().normalizar_serie(serie)
+    
+    def _obtener_normalizador_fechas(self) -> NormalizadorFechas:
+        """Construir (una sola vez) el normalizador de fechas con los formatos y rango configurados"""
+        if self._normalizador_fechas is None:
+            reglas_fecha = self.config_limpieza['reglas_limpieza']['fecha']
+            self._normalizador_fechas = NormalizadorFechas(
+                formatos=reglas_fecha['formatos'],
+                rango_min=reglas_fecha.get('rango_min'),
+                rango_max=reglas_fecha.get('rango_max')
+            )
+        return self._normalizador_fechas
+    
+    def _normalizar_fechas(self):
+        """Convertir la columna fecha a datetime64 aplicando formatos y rango configurados"""
+        self._conteos_fechas = {}
+        if 'fecha' not in self.df.columns:
+            return
+        
+        self._imprimir("   📅 Normalizando fechas...")
+        self.df['fecha'], self._conteos_fechas = self._obtener_normalizador_fechas().normalizar_serie(self.df['fecha'])
+        
+        if self.config_limpieza['reglas_limpieza']['fecha'].get('eliminar_invalidas', False):
+            self.df = self.df[self.df['fecha'].notna()]
+        
+        conteos = self._conteos_fechas
+        self._imprimir(f"   ✅ Fechas: {conteos['validas']:,} válidas, {conteos['invalidas']:,} inválidas, "
+              f"{conteos['fuera_de_rango']:,} fuera de rango, {conteos['nulas']:,} nulas")
     
     def _calcular_total_ventas(self):
         """Calcular columna total_ventas - OPTIMIZADO"""
         if 'total_ventas' not in self.df.columns:
             if 'cantidad' in self.df.columns and 'precio_unitario' in self.df.columns:
-                print("💰 Calculando columna total_ventas...")
+                self._imprimir("💰 Calculando columna total_ventas...")
                 
                 # Asegurar que sean numéricas (ya deberían estar limpias)
                 if 'cantidad' not in self.df.select_dtypes(include=[np.number]):
@@ -436,65 +731,322 @@ class LimpiezaAutomatizada:
                         self.df['descuento'] = pd.to_numeric(self.df['descuento'], errors='coerce')
                     self.df['total_ventas'] = self.df['total_ventas'] * (1 - self.df['descuento'] / 100)
                 
-                print(f"   ✅ Total_ventas calculado: {len(self.df['total_ventas'].dropna())} registros válidos")
+                if not self.instrumentador.silencioso:
+                    self._imprimir(f"   ✅ Total_ventas calculado: {len(self.df['total_ventas'].dropna())} registros válidos")
+    
+    def _obtener_motores_validacion(self) -> Tuple[MotorValidacion, MotorValidacion]:
+        """Compilar (una sola vez) las reglas: las previas a total_ventas y las que lo usan"""
+        if self._motores_validacion is None:
+            # total_ventas puede no existir aún: se calcula después de la primera pasada
+            columnas_numericas = [c for c in self.COLUMNAS_NUMERICAS if c in self.df.columns or c == 'total_ventas']
+            columnas_texto = [c for c in self.df.columns
+                              if c not in columnas_numericas and c != 'fecha'
+                              and (isinstance(self.df[c].dtype, pd.CategoricalDtype)
+                                   or pd.api.types.is_string_dtype(self.df[c].dtype))]
+            motor = MotorValidacion.desde_configuracion(
+                self.config_limpieza['reglas_limpieza'], columnas_numericas, columnas_texto
+            )
+            self._motores_validacion = motor.particionar(['total_ventas'])
+        return self._motores_validacion
+    
+    def _archivo_cuarentena(self) -> Optional[str]:
+        return self.archivo_cuarentena or self.config_limpieza['reglas_limpieza'].get('archivo_cuarentena')
+    
+    def verificar_cuarentena(self):
+        """Fallar si alguna regla pone filas en cuarentena sin archivo donde guardarlas"""
+        reglas = self.config_limpieza['reglas_limpieza']
+        if 'cuarentena' in MotorValidacion.acciones_configuradas(reglas) and not self._archivo_cuarentena():
+            raise ValueError("Hay reglas con acción 'cuarentena' pero no se configuró "
+                             "reglas_limpieza['archivo_cuarentena']: las filas rechazadas se perderían")
+    
+    def _iniciar_validacion(self):
+        """Verificar la cuarentena, recompilar las reglas y descartar restos de una ejecución interrumpida"""
+        self.verificar_cuarentena()
+        self._motores_validacion = None
+        self._cuarentena_escrita = False
+        archivo = self._archivo_cuarentena()
+        # La cuarentena anterior se conserva hasta que esta ejecución termine bien
+        if archivo and os.path.exists(f"{archivo}.parcial"):
+            os.remove(f"{archivo}.parcial")
+    
+    def _validar_reglas(self, sobre_total: bool = False) -> Dict:
+        """
+        Evaluar en una pasada las reglas previas al cálculo de total_ventas o, con
+        `sobre_total`, las que lo usan. Acumula los conteos y las filas rechazadas
+        del bloque y devuelve los conteos de esta pasada.
+        """
+        previas, posteriores = self._obtener_motores_validacion()
+        motor = posteriores if sobre_total else previas
+        motor.verificar_columnas(self.df.columns)
+        self.df, cuarentena, resumen = motor.aplicar(self.df)
+        
+        if sobre_total:
+            self._resumen_validacion = MotorValidacion.combinar_resumenes(self._resumen_validacion, resumen)
+            if len(cuarentena):
+                partes = [c for c in (self.cuarentena, cuarentena) if c is not None and len(c)]
+                cuarentena = pd.concat(partes, ignore_index=True) if len(partes) > 1 else partes[0]
+            else:
+                cuarentena = self.cuarentena
+        else:
+            self._resumen_validacion = resumen
+        self.cuarentena = cuarentena
+        
+        incumplidas = {regla: n for regla, n in resumen['violaciones'].items() if n}
+        if incumplidas:
+            self._imprimir(f"   🚧 Reglas incumplidas: " + ", ".join(f"{r} ({n:,})" for r, n in incumplidas.items()))
+        return resumen
+    
+    def _entregar_cuarentena(self):
+        """Escribir las filas rechazadas del bloque con las columnas del resultado limpio"""
+        if self.cuarentena is None or not len(self.cuarentena):
+            return
+        self.cuarentena = self.cuarentena.reindex(columns=list(self.df.columns) + [COLUMNA_REGLAS_INCUMPLIDAS])
+        if self.cuarentena_en_archivo:
+            self._escribir_cuarentena(self.cuarentena)
+    
+    def _escribir_cuarentena(self, cuarentena: pd.DataFrame):
+        """Anexar las filas rechazadas al archivo temporal de cuarentena"""
+        archivo = self._archivo_cuarentena()
+        if not archivo:
+            # Nunca descartar filas en silencio: la configuración se verifica al iniciar
+            raise ValueError(f"{len(cuarentena):,} filas en cuarentena sin archivo_cuarentena configurado")
+        temporal = f"{archivo}.parcial"
+        anexar = self._cuarentena_escrita and os.path.exists(temporal)
+        self._escribir_csv(cuarentena, temporal, anexar=anexar)
+        self._cuarentena_escrita = True
+    
+    def _terminar_cuarentena(self, exito: bool):
+        """Reemplazar la cuarentena anterior solo si la ejecución terminó bien; si falló, conservarla"""
+        archivo = self._archivo_cuarentena()
+        if not archivo:
+            return
+        temporal = f"{archivo}.parcial"
+        if exito and os.path.exists(temporal):
+            os.replace(temporal, archivo)
+        elif exito and os.path.exists(archivo):
+            # Sin filas rechazadas en esta ejecución: no dejar las de la anterior
+            os.remove(archivo)
+        elif os.path.exists(temporal):
+            os.remove(temporal)
+    
+    def _obtener_deduplicador(self) -> Optional[DeduplicadorFilas]:
+        """Construir (una sola vez por ejecución) el deduplicador si está activado en la configuración"""
+        if self._deduplicador is None:
+            self._deduplicador = DeduplicadorFilas.desde_configuracion(self.config_limpieza.get('deduplicacion'))
+        return self._deduplicador
+    
+    def _liberar_deduplicador(self):
+        """Cerrar el deduplicador propio para que la siguiente ejecución empiece sin filas vistas"""
+        self._huellas_bloque = None
+        if self._deduplicador is not None and not self._deduplicador_compartido:
+            self._deduplicador.cerrar()
+            self._deduplicador = None
+    
+    def _eliminar_filas_duplicadas(self):
+        """Quitar las filas ya vistas en este bloque o en bloques y archivos anteriores"""
+        self._duplicados_bloque = 0
+        self._huellas_bloque = None
+        deduplicador = self._obtener_deduplicador()
+        if deduplicador is None:
+            return
+        
+        registros = len(self.df)
+        self.df, self._huellas_bloque = deduplicador.filtrar(self.df)
+        self._duplicados_bloque = registros - len(self.df)
+        if self._duplicados_bloque:
+            self._imprimir(f"   🧬 Duplicados eliminados: {self._duplicados_bloque:,}")
+    
+    def _compactar_memoria(self, df: pd.DataFrame):
+        """Aplicar el modo compacto (tipos reducidos y categorías) si está activado en la configuración"""
+        config_memoria = self.config_limpieza.get('memoria', {})
+        if not config_memoria.get('modo_compacto', False):
+            return df, None
+        
+        self._imprimir("   🗜️  Compactando representación en memoria...")
+        columnas_enteras = config_memoria.get('columnas_enteras', ['cantidad'])
+        df, reporte = compactar_dataframe(
+            df,
+            columnas_enteras=columnas_enteras,
+            columnas_decimales=[c for c in self.COLUMNAS_NUMERICAS if c not in columnas_enteras],
+            decimales=self.config_limpieza['reglas_limpieza']['numero']['decimales'],
+            representacion_decimal=config_memoria.get('representacion_decimal', 'float32'),
+            umbral_categorias=config_memoria.get('umbral_categorias', 0.5)
+        )
+        self._imprimir(f"   ✅ Memoria: {reporte['bytes_antes'] / 1024 ** 2:,.1f} MB → "
+              f"{reporte['bytes_despues'] / 1024 ** 2:,.1f} MB (-{reporte['reduccion_porcentaje']:.1f}%)")
+        return df, reporte
     
     def _calcular_estadisticas_limpieza(self, registros_originales: int):
         """Calcular estadísticas - OPTIMIZADO"""
-        nulos_por_columna = self.df.isnull().sum()
-        total_celdas = len(self.df) * len(self.df.columns)
+        self.estadisticas_limpieza = self._estadisticas_bloque(self.df, registros_originales)
+    
+    def _estadisticas_bloque(self, df: pd.DataFrame, registros_originales: int) -> Dict:
+        """Calcular estadísticas de un DataFrame (archivo completo o bloque)"""
+        nulos_por_columna = df.isnull().sum()
+        total_celdas = len(df) * len(df.columns)
+        
+        return {
+            'registros_originales': registros_originales,
+            'registros_finales': len(df),
+            'columnas_finales': len(df.columns),
+            'nulos_por_columna': {columna: int(nulos) for columna, nulos in nulos_por_columna.items()},
+            'registros_eliminados': registros_originales - len(df),
+            'porcentaje_completitud': float((1 - nulos_por_columna.sum() / total_celdas) * 100) if total_celdas > 0 else 0,
+            'fechas': dict(self._conteos_fechas),
+            'duplicados_eliminados': self._duplicados_bloque,
+            'validacion': dict(self._resumen_validacion)
+        }
+    
+    @staticmethod
+    def _combinar_estadisticas(acumuladas: Dict, nuevas: Dict) -> Dict:
+        """Combinar estadísticas de bloques sumando conteos y recalculando la completitud"""
+        if not acumuladas:
+            return dict(nuevas, nulos_por_columna=dict(nuevas['nulos_por_columna']))
+        
+        nulos_por_columna = dict(acumuladas['nulos_por_columna'])
+        for columna, nulos in nuevas['nulos_por_columna'].items():
+            nulos_por_columna[columna] = nulos_por_columna.get(columna, 0) + nulos
+        
+        fechas = dict(acumuladas.get('fechas', {}))
+        for estado, cantidad in nuevas.get('fechas', {}).items():
+            fechas[estado] = fechas.get(estado, 0) + cantidad
         
-        self.estadisticas_limpieza = {
+        registros_originales = acumuladas['registros_originales'] + nuevas['registros_originales']
+        registros_finales = acumuladas['registros_finales'] + nuevas['registros_finales']
+        columnas_finales = len(nulos_por_columna)
+        total_celdas = registros_finales * columnas_finales
+        
+        combinadas = {
             'registros_originales': registros_originales,
-            'registros_finales': len(self.df),
-            'columnas_finales': len(self.df.columns),
-            'nulos_por_columna': nulos_por_columna.to_dict(),
-            'registros_eliminados': registros_originales - len(self.df),
-            'porcentaje_completitud': (1 - nulos_por_columna.sum() / total_celdas) * 100 if total_celdas > 0 else 0
+            'registros_finales': registros_finales,
+            'columnas_finales': columnas_finales,
+            'nulos_por_columna': nulos_por_columna,
+            'registros_eliminados': registros_originales - registros_finales,
+            'porcentaje_completitud': (1 - sum(nulos_por_columna.values()) / total_celdas) * 100 if total_celdas > 0 else 0,
+            'fechas': fechas,
+            'duplicados_eliminados': acumuladas.get('duplicados_eliminados', 0) + nuevas.get('duplicados_eliminados', 0),
+            'validacion': MotorValidacion.combinar_resumenes(acumuladas.get('validacion'), nuevas.get('validacion'))
         }
+        
+        if 'memoria' in acumuladas and 'memoria' in nuevas:
+            bytes_antes = acumuladas['memoria']['bytes_antes'] + nuevas['memoria']['bytes_antes']
+            bytes_despues = acumuladas['memoria']['bytes_despues'] + nuevas['memoria']['bytes_despues']
+            combinadas['memoria'] = dict(
+                nuevas['memoria'], bytes_antes=bytes_antes, bytes_despues=bytes_despues,
+                reduccion_porcentaje=(1 - bytes_despues / bytes_antes) * 100 if bytes_antes > 0 else 0.0
+            )
+        
+        return combinadas
+    
+    @staticmethod
+    def _descontar_duplicados(estadisticas: Dict, eliminadas: pd.DataFrame) -> Dict:
+        """Quitar de las estadísticas de un bloque las filas descartadas después como duplicados"""
+        # Combinar con conteos negativos recalcula eliminados y completitud igual que entre bloques
+        return LimpiezaAutomatizada._combinar_estadisticas(estadisticas, {
+            'registros_originales': 0,
+            'registros_finales': -len(eliminadas),
+            'nulos_por_columna': {columna: -int(nulos) for columna, nulos in eliminadas.isnull().sum().items()},
+            'fechas': {},
+            'duplicados_eliminados': len(eliminadas)
+        })
     
     def _mostrar_resumen_limpieza(self):
         """Mostrar resumen - OPTIMIZADO"""
-        print("\n" + "="*60)
-        print("📊 RESUMEN DE LIMPIEZA AUTOMATIZADA")
-        print("="*60)
+        self._imprimir("\n" + "="*60)
+        self._imprimir("📊 RESUMEN DE LIMPIEZA AUTOMATIZADA")
+        self._imprimir("="*60)
         
         stats = self.estadisticas_limpieza
-        print(f"📈 Registros originales: {stats['registros_originales']:,}")
-        print(f"📈 Registros finales: {stats['registros_finales']:,}")
-        print(f"📊 Columnas finales: {stats['columnas_finales']}")
-        print(f"🗑️  Registros eliminados: {stats['registros_eliminados']:,}")
-        print(f"✅ Completitud: {stats['porcentaje_completitud']:.1f}%")
-        
-        print("\n📋 COLUMNAS FINALES:")
-        for i, columna in enumerate(self.df.columns, 1):
-            nulos = stats['nulos_por_columna'][columna]
-            total = len(self.df)
-            porcentaje_valido = ((total - nulos)/total)*100
-            print(f"   {i:2d}. {columna}: {total - nulos}/{total} válidos ({porcentaje_valido:.1f}%)")
+        self._imprimir(f"📈 Registros originales: {stats['registros_originales']:,}")
+        self._imprimir(f"📈 Registros finales: {stats['registros_finales']:,}")
+        self._imprimir(f"📊 Columnas finales: {stats['columnas_finales']}")
+        self._imprimir(f"🗑️  Registros eliminados: {stats['registros_eliminados']:,}")
+        if stats.get('duplicados_eliminados'):
+            self._imprimir(f"🧬 Duplicados eliminados: {stats['duplicados_eliminados']:,}")
+        validacion = stats.get('validacion') or {}
+        if any(validacion.get('violaciones', {}).values()):
+            self._imprimir(f"🚧 Validación: {validacion['filas_en_cuarentena']:,} filas en cuarentena, "
+                  f"{validacion['celdas_anuladas']:,} celdas anuladas, "
+                  f"{validacion['valores_recortados']:,} valores recortados")
+            for regla, cantidad in validacion['violaciones'].items():
+                if cantidad:
+                    self._imprimir(f"   • {regla}: {cantidad:,}")
+        self._imprimir(f"✅ Completitud: {stats['porcentaje_completitud']:.1f}%")
+        if stats.get('fechas'):
+            self._imprimir(f"📅 Fechas rechazadas: {stats['fechas']['invalidas']:,} inválidas, "
+                  f"{stats['fechas']['fuera_de_rango']:,} fuera de rango")
+        if stats.get('memoria'):
+            self._imprimir(f"🗜️  Memoria: {stats['memoria']['bytes_antes'] / 1024 ** 2:,.1f} MB → "
+                  f"{stats['memoria']['bytes_despues'] / 1024 ** 2:,.1f} MB")
+        
+        self._imprimir("\n📋 COLUMNAS FINALES:")
+        total = stats['registros_finales']
+        for i, (columna, nulos) in enumerate(stats['nulos_por_columna'].items(), 1):
+            porcentaje_valido = ((total - nulos)/total)*100 if total > 0 else 0
+            self._imprimir(f"   {i:2d}. {columna}: {total - nulos}/{total} válidos ({porcentaje_valido:.1f}%)")
+    
+    def _escribir_csv(self, df: pd.DataFrame, archivo_salida: str, anexar: bool = False):
+        """Escribir CSV con formato de fecha fijo para que bloques y archivo completo coincidan"""
+        df.to_csv(
+            archivo_salida, index=False, encoding='utf-8',
+            mode='a' if anexar else 'w', header=not anexar,
+            date_format=self.config_limpieza['reglas_limpieza']['fecha'].get('formato_salida')
+        )
+    
+    def _escribir_columnar(self, df: pd.DataFrame, archivo_salida: str, formato: str,
+                           nombre_bloque: Optional[str] = None):
+        """Escribir en formato columnar (parquet/feather) según la configuración de salida"""
+        config_salida = self.config_limpieza.get('salida', {})
+        escribir_columnar(
+            df, archivo_salida, formato,
+            particionar_por_mes=config_salida.get('particionar_por_mes', False),
+            compresion=config_salida.get('compresion'),
+            filas_por_grupo=config_salida.get('filas_por_grupo', 100000),
+            nombre_bloque=nombre_bloque
+        )
     
     def guardar_datos_limpios(self, archivo_salida: str = "datos_limpios.csv"):
-        """Guardar datos limpios - OPTIMIZADO"""
+        """Guardar datos limpios en CSV, parquet o feather según la extensión - OPTIMIZADO"""
         try:
             self.df = self._eliminar_columnas_duplicadas(self.df)
-            self.df.to_csv(archivo_salida, index=False, encoding='utf-8')
-            print(f"\n💾 Datos guardados en: {archivo_salida}")
+            with self.instrumentador.etapa('guardado', self.df) as etapa:
+                # Las columnas en punto fijo se escriben con su valor decimal
+                df_salida = restaurar_punto_fijo(self.df)
+                formato = detectar_formato(archivo_salida)
+                if formato == 'csv':
+                    self._escribir_csv(df_salida, archivo_salida)
+                else:
+                    eliminar_salida(archivo_salida)
+                    self._escribir_columnar(df_salida, archivo_salida, formato)
+                etapa.agregar(archivo_salida=archivo_salida, formato=formato)
+                etapa.salida(df_salida)
+            self._imprimir(f"\n💾 Datos guardados en: {archivo_salida}")
             return True
         except Exception as e:
-            print(f"❌ Error guardando archivo: {e}")
+            self._imprimir(f"❌ Error guardando archivo: {e}")
             return False
 
 # FUNCIÓN DE USO RÁPIDO OPTIMIZADA
-def limpiar_csv_automatico(archivo_csv: str, archivo_salida: str = "datos_limpios.csv") -> pd.DataFrame:
+def limpiar_csv_automatico(archivo_csv: str, archivo_salida: str = "datos_limpios.csv",
+                           directorio_cache: Optional[str] = None) -> pd.DataFrame:
     """
     Función de uso rápido para limpieza automática - OPTIMIZADA
     """
     limpiador = LimpiezaAutomatizada(archivo_csv)
     
+    if directorio_cache:
+        # Import local: cache_limpieza depende de este módulo
+        from cache_limpieza import CacheLimpieza
+        df_limpio = CacheLimpieza(directorio_cache).limpiar(limpiador)
+        if not df_limpio.empty:
+            limpiador.guardar_datos_limpios(archivo_salida)
+        return df_limpio
+    
     # Detectar estructura con menos datos
     estructura = limpiador.detectar_estructura()
-    print("\n🔍 MAPEO AUTOMÁTICO PROPUESTO:")
+    limpiador._imprimir("\n🔍 MAPEO AUTOMÁTICO PROPUESTO:")
     for orig, nuevo in estructura['mapeo_propuesto'].items():
-        print(f"   '{orig}' → '{nuevo}'")
+        limpiador._imprimir(f"   '{orig}' → '{nuevo}'")
     
     # Aplicar limpieza optimizada
     df_limpio = limpiador.aplicar_limpieza()
@@ -504,12 +1056,22 @@ def limpiar_csv_automatico(archivo_csv: str, archivo_salida: str = "datos_limpio
     
     return df_limpio
 
+def limpiar_csv_por_bloques(archivo_csv: str, archivo_salida: str = "datos_limpios.csv",
+                            tamano_bloque: int = 100000) -> Dict:
+    """
+    Limpieza automática en modo streaming para archivos grandes (memoria acotada)
+    """
+    limpiador = LimpiezaAutomatizada(archivo_csv)
+    # La detección sobre la muestra produce el plan de ingesta tipada de los bloques
+    limpiador.detectar_estructura()
+    return limpiador.aplicar_limpieza_por_bloques(archivo_salida, tamano_bloque)
+
 if __name__ == "__main__":
     archivo = "RWventas.csv"
     
     if os.path.exists(archivo):
         print("🚀 INICIANDO LIMPIEZA AUTOMATIZADA (VERSIÓN OPTIMIZADA)")
-        df_resultado = limpiar_csv_automatico(archivo, "ventas_limpio_auto.csv")
+        df_resultado = limpiar_csv_automatico(archivo, "ventas_limpio_auto.csv", directorio_cache=".cache_limpieza")
         print("\n🎉 PROCESO COMPLETADO!")
     else:
         print(f"❌ Archivo {archivo} no encontrado")
\ No newline at end of file
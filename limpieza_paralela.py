@@ -0,0 +1,266 @@
+import glob
+import io
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from deduplicacion import DeduplicadorFilas
+from instrumentacion import Instrumentador
+from limpieza_automatizada import LimpiezaAutomatizada
+
+
+def _resolver_archivos(entrada: str) -> List[str]:
+    """Resolver un directorio o patrón glob a una lista ordenada de archivos CSV"""
+    if os.path.isdir(entrada):
+        archivos = glob.glob(os.path.join(entrada, '*.csv'))
+    else:
+        archivos = glob.glob(entrada)
+    # ORDEN ESTABLE PARA QUE LA SALIDA SEA DETERMINISTA
+    return sorted(os.path.abspath(a) for a in archivos if os.path.isfile(a))
+
+
+def _leer_encabezado(archivo: str) -> bytes:
+    """Leer la línea de encabezado en bytes (incluye el salto de línea)"""
+    with open(archivo, 'rb') as f:
+        return f.readline()
+
+
+def _calcular_particiones(archivo: str, tamano_particion: int) -> List[Tuple[int, int]]:
+    """Dividir el cuerpo del archivo en rangos de bytes alineados a fin de línea.
+
+    Supone que ningún campo entrecomillado contiene saltos de línea.
+    """
+    tamano_total = os.path.getsize(archivo)
+    with open(archivo, 'rb') as f:
+        f.readline()
+        inicio = f.tell()
+        particiones = []
+
+        while inicio < tamano_total:
+            f.seek(min(inicio + tamano_particion, tamano_total))
+            if f.tell() < tamano_total:
+                # Avanzar hasta el final de la línea actual
+                f.readline()
+            fin = f.tell()
+            particiones.append((inicio, fin))
+            inicio = fin
+
+    return particiones
+
+
+def _ruta_huellas(archivo_parte: str) -> str:
+    return f"{archivo_parte}.huellas.npy"
+
+
+def _ruta_cuarentena(archivo_parte: str) -> str:
+    return f"{archivo_parte}.cuarentena.csv"
+
+
+def _limpiar_particion(tarea: Dict) -> Dict:
+    """Limpiar un rango de bytes de un archivo (se ejecuta en un proceso del pool)"""
+    with open(tarea['archivo'], 'rb') as f:
+        f.seek(tarea['inicio'])
+        contenido = f.read(tarea['fin'] - tarea['inicio'])
+
+    limpiador = LimpiezaAutomatizada(tarea['archivo'], tarea['config_limpieza'])
+    instrumentador = limpiador.instrumentador
+    if limpiador.config_limpieza['reglas_limpieza'].get('archivo_cuarentena'):
+        # Cuarentena por partición: el proceso principal la une en orden
+        limpiador.archivo_cuarentena = _ruta_cuarentena(tarea['archivo_parte'])
+
+    # Silenciar la salida de las etapas para no intercalar mensajes entre procesos
+    instrumentador.silencioso = True
+    with instrumentador.con_contexto(archivo=tarea['archivo'], inicio_bytes=tarea['inicio']):
+        with instrumentador.etapa('lectura') as etapa:
+            fuente = io.BytesIO(tarea['encabezado'] + contenido)
+            if tarea['plan_ingesta']:
+                # Motor 'c' en los workers: el paralelismo ya lo aporta el pool de procesos
+                limpiador.plan_ingesta = tarea['plan_ingesta']
+                df = limpiador._leer_con_plan(fuente, tarea['mapeo'], motor='c')
+            else:
+                df = pd.read_csv(fuente, low_memory=False)
+            etapa.salida(df)
+        registros_originales = len(df)
+        try:
+            df = limpiador._procesar_bloque(df, tarea['mapeo'], desde_plan=limpiador.plan_ingesta is not None)
+            df = limpiador._eliminar_columnas_duplicadas(df)
+
+            with instrumentador.etapa('guardado', df) as etapa:
+                limpiador._escribir_csv(df, tarea['archivo_parte'])
+                etapa.salida(df)
+            limpiador._terminar_cuarentena(True)
+            # Huellas de las filas escritas: el proceso principal quita los duplicados entre particiones
+            if limpiador._huellas_bloque is not None:
+                np.save(_ruta_huellas(tarea['archivo_parte']), limpiador._huellas_bloque)
+        finally:
+            limpiador._liberar_deduplicador()
+
+    instrumentador.cerrar()
+    return limpiador._estadisticas_bloque(df, registros_originales)
+
+
+def _deduplicar_parte(deduplicador: DeduplicadorFilas, archivo_parte: str, estadisticas: Dict) -> Dict:
+    """Quitar de una parte las filas ya vistas en partes anteriores y descontarlas de sus estadísticas"""
+    ruta_huellas = _ruta_huellas(archivo_parte)
+    if not os.path.exists(ruta_huellas):
+        return estadisticas
+    conservar = deduplicador.mascara_nuevas(np.load(ruta_huellas))
+    if conservar.all():
+        return estadisticas
+
+    # Por posición de fila, no por línea física: un texto entre comillas puede contener saltos de línea.
+    # Todo como texto y sin interpretar nulos, para reescribir las filas conservadas tal cual
+    df = pd.read_csv(archivo_parte, dtype=str, keep_default_na=False, na_filter=False, encoding='utf-8')
+    if len(df) != len(conservar):
+        raise ValueError(f"La parte {archivo_parte} tiene {len(df):,} filas y {len(conservar):,} huellas")
+    df[conservar].to_csv(archivo_parte, index=False, encoding='utf-8')
+
+    # En la salida limpia solo los campos vacíos son nulos
+    df_eliminadas = df[~conservar].replace('', np.nan)
+    return LimpiezaAutomatizada._descontar_duplicados(estadisticas, df_eliminadas)
+
+
+def _unir_partes(partes: List[str], archivo_salida: str):
+    """Concatenar los archivos parciales en orden conservando un único encabezado"""
+    with open(archivo_salida, 'wb') as salida:
+        for i, parte in enumerate(partes):
+            with open(parte, 'rb') as f:
+                if i > 0:
+                    f.readline()
+                shutil.copyfileobj(f, salida)
+
+
+def limpiar_lote_paralelo(entrada: str, directorio_salida: str,
+                          num_workers: Optional[int] = None,
+                          tamano_particion: int = 64 * 1024 * 1024,
+                          config_limpieza: Dict = None) -> Dict:
+    """
+    Limpiar en paralelo todos los CSV de un directorio o patrón glob.
+
+    La estructura se detecta una sola vez por cada encabezado distinto y el trabajo
+    se reparte por archivos y particiones de bytes en un pool de procesos. La salida
+    y las estadísticas combinadas son idénticas a las de una ejecución en serie.
+    """
+    # Solo consola: los eventos los emite el instrumentador de cada limpiador
+    config_instrumentacion = (config_limpieza or {}).get('instrumentacion') or {}
+    consola = Instrumentador(silencioso=config_instrumentacion.get('silencioso', False))
+    consola.imprimir("🚀 INICIANDO LIMPIEZA PARALELA POR LOTES")
+
+    archivos = _resolver_archivos(entrada)
+    if not archivos:
+        consola.imprimir(f"❌ No se encontraron archivos CSV en: {entrada}")
+        return {}
+
+    os.makedirs(directorio_salida, exist_ok=True)
+    num_workers = num_workers or os.cpu_count() or 1
+    consola.imprimir(f"📂 Archivos encontrados: {len(archivos)} | 👷 Workers: {num_workers}")
+
+    # DETECTAR ESTRUCTURA UNA VEZ POR DISEÑO DE ENCABEZADO
+    estructuras_por_encabezado = {}
+    config_efectiva = config_limpieza
+    for archivo in archivos:
+        encabezado = _leer_encabezado(archivo)
+        if encabezado not in estructuras_por_encabezado:
+            limpiador = LimpiezaAutomatizada(archivo, config_limpieza)
+            estructuras_por_encabezado[encabezado] = limpiador.detectar_estructura()
+            config_efectiva = limpiador.config_limpieza
+            # Antes de lanzar el pool: en los workers el error llegaría tarde y por partición
+            limpiador.verificar_cuarentena()
+    consola.imprimir(f"🔍 Diseños de encabezado distintos: {len(estructuras_por_encabezado)}")
+
+    directorio_partes = tempfile.mkdtemp(prefix='.partes_', dir=directorio_salida)
+    tareas = []
+    salidas = {}
+    # Un solo conjunto de filas vistas para todo el lote, recorrido en el orden de las tareas
+    deduplicador = DeduplicadorFilas.desde_configuracion(config_efectiva.get('deduplicacion'))
+    archivo_cuarentena = config_efectiva['reglas_limpieza'].get('archivo_cuarentena')
+
+    try:
+        for indice_archivo, archivo in enumerate(archivos):
+            encabezado = _leer_encabezado(archivo)
+            nombre_base = os.path.splitext(os.path.basename(archivo))[0]
+            salidas[archivo] = {
+                'archivo_salida': os.path.join(directorio_salida, f"{nombre_base}_limpio.csv"),
+                'partes': []
+            }
+
+            for indice_parte, (inicio, fin) in enumerate(_calcular_particiones(archivo, tamano_particion)):
+                archivo_parte = os.path.join(directorio_partes, f"{indice_archivo:05d}_{indice_parte:05d}.csv")
+                salidas[archivo]['partes'].append(archivo_parte)
+                tareas.append({
+                    'archivo': archivo,
+                    'inicio': inicio,
+                    'fin': fin,
+                    'encabezado': encabezado,
+                    'mapeo': estructuras_por_encabezado[encabezado].get('mapeo_propuesto'),
+                    'plan_ingesta': estructuras_por_encabezado[encabezado].get('plan_ingesta'),
+                    'config_limpieza': config_limpieza,
+                    'archivo_parte': archivo_parte
+                })
+
+        consola.imprimir(f"📦 Particiones a procesar: {len(tareas)}")
+
+        if num_workers == 1:
+            resultados = [_limpiar_particion(tarea) for tarea in tareas]
+        else:
+            with ProcessPoolExecutor(max_workers=num_workers) as pool:
+                # map conserva el orden de las tareas -> combinación determinista
+                resultados = list(pool.map(_limpiar_particion, tareas))
+
+        estadisticas_por_tarea = iter(resultados)
+        estadisticas_por_archivo = {}
+        estadisticas_totales = {}
+
+        for archivo in archivos:
+            estadisticas_archivo = {}
+            for archivo_parte in salidas[archivo]['partes']:
+                estadisticas_parte = next(estadisticas_por_tarea)
+                if deduplicador is not None:
+                    estadisticas_parte = _deduplicar_parte(deduplicador, archivo_parte, estadisticas_parte)
+                estadisticas_archivo = LimpiezaAutomatizada._combinar_estadisticas(
+                    estadisticas_archivo, estadisticas_parte
+                )
+
+            if salidas[archivo]['partes']:
+                _unir_partes(salidas[archivo]['partes'], salidas[archivo]['archivo_salida'])
+                estadisticas_totales = LimpiezaAutomatizada._combinar_estadisticas(
+                    estadisticas_totales, estadisticas_archivo
+                )
+                consola.imprimir(f"   ✅ {os.path.basename(archivo)} → {salidas[archivo]['archivo_salida']} "
+                                 f"({estadisticas_archivo['registros_finales']:,} filas)")
+            else:
+                consola.imprimir(f"   ℹ️  {os.path.basename(archivo)} no contiene registros")
+
+            estadisticas_por_archivo[archivo] = estadisticas_archivo
+
+        if archivo_cuarentena:
+            # La cuarentena anterior se reemplaza solo cuando la nueva está completa
+            partes_cuarentena = [_ruta_cuarentena(t['archivo_parte']) for t in tareas
+                                 if os.path.exists(_ruta_cuarentena(t['archivo_parte']))]
+            if partes_cuarentena:
+                _unir_partes(partes_cuarentena, f"{archivo_cuarentena}.parcial")
+                os.replace(f"{archivo_cuarentena}.parcial", archivo_cuarentena)
+                consola.imprimir(f"🚧 Filas en cuarentena: {archivo_cuarentena}")
+            elif os.path.exists(archivo_cuarentena):
+                os.remove(archivo_cuarentena)
+
+    finally:
+        shutil.rmtree(directorio_partes, ignore_errors=True)
+        if deduplicador is not None:
+            deduplicador.cerrar()
+
+    if estadisticas_totales:
+        consola.imprimir(f"\n🎉 Lote completado: {estadisticas_totales['registros_finales']:,} registros limpios "
+                         f"({estadisticas_totales['porcentaje_completitud']:.1f}% completitud)")
+        if estadisticas_totales.get('duplicados_eliminados'):
+            consola.imprimir(f"🧬 Duplicados eliminados: {estadisticas_totales['duplicados_eliminados']:,}")
+
+    return {
+        'archivos': estadisticas_por_archivo,
+        'estadisticas_limpieza': estadisticas_totales
+    }
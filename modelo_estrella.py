@@ -0,0 +1,300 @@
+import hashlib
+import json
+import os
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from instrumentacion import Instrumentador
+
+# Dimensiones del modelo: columnas naturales y clave sustituta
+DIMENSIONES = {
+    'dim_producto': (['producto', 'tipo_producto'], 'id_producto'),
+    'dim_geografia': (['ciudad', 'pais'], 'id_geografia'),
+    'dim_canal': (['tipo_venta', 'tipo_cliente'], 'id_canal')
+}
+
+COLUMNAS_HECHOS = [
+    'fecha', 'id_producto', 'id_geografia', 'id_canal', 'cantidad',
+    'precio_unitario', 'descuento', 'costo_envio', 'total_ventas'
+]
+
+
+def huella_archivo(ruta: str, tamano_bloque: int = 1 << 20) -> str:
+    """Calcular la huella SHA-256 del contenido de un archivo"""
+    resumen = hashlib.sha256()
+    with open(ruta, 'rb') as f:
+        for bloque in iter(lambda: f.read(tamano_bloque), b''):
+            resumen.update(bloque)
+    return resumen.hexdigest()
+
+
+def _valor_clave(valor):
+    """Normalizar valores nulos para usarlos como parte de una clave hash"""
+    return None if pd.isna(valor) else str(valor)
+
+
+class ConstructorModeloEstrella:
+    """
+    Construcción incremental del modelo estrella con claves sustitutas persistentes.
+
+    El estado (mapas de claves por dimensión, marca de agua de `fecha` y huellas
+    de archivos ya procesados) se guarda en un JSON. Cada lote solo produce los
+    miembros de dimensión nuevos y los hechos posteriores a la marca de agua, de
+    modo que el coste depende del delta diario y no del histórico.
+
+    En modo 'fecha' los hechos sin fecha (nulas o inválidas tras la limpieza) no se
+    pueden ubicar respecto a la marca de agua y se omiten: cargarlos en cada lote
+    los duplicaría al reprocesar un archivo. Se cuentan en `omitidos_sin_fecha` y
+    se informan en cada lote; el modo 'archivo' sí los carga.
+
+    Un archivo cargado por bloques (`iniciar_archivo` → `cargar_incremental` con
+    `filas_archivo` → `terminar_archivo`) persiste por bloque solo los mapas de
+    claves y su avance en `archivos_en_curso`; la marca de agua y la huella se fijan
+    tras el último bloque, y una ejecución interrumpida se reanuda donde quedó.
+
+    Los mensajes de progreso pasan por `instrumentador` (sin él, por consola).
+    """
+
+    def __init__(self, archivo_estado: str = 'estado_modelo_estrella.json', modo_incremental: str = 'fecha',
+                 instrumentador: Optional[Instrumentador] = None):
+        if modo_incremental not in ('fecha', 'archivo'):
+            raise ValueError("modo_incremental debe ser 'fecha' o 'archivo'")
+
+        self.archivo_estado = archivo_estado
+        self.modo_incremental = modo_incremental
+        self.instrumentador = instrumentador
+        self.mapas_claves: Dict[str, Dict[Tuple, int]] = {nombre: {} for nombre in DIMENSIONES}
+        self.marca_agua_fecha: Optional[pd.Timestamp] = None
+        self.huellas_procesadas: List[str] = []
+        # Archivos a medio cargar: huella → filas entregadas y marcas de agua (ISO)
+        self.archivos_en_curso: Dict[str, Dict] = {}
+        self.omitidos_sin_fecha = 0
+        self._pendiente: Optional[Dict] = None
+
+        if os.path.exists(archivo_estado):
+            self._cargar_estado()
+
+    def _imprimir(self, *mensaje):
+        """Mensaje de progreso en consola (se omite con un instrumentador silencioso)"""
+        if self.instrumentador is None:
+            print(*mensaje)
+        else:
+            self.instrumentador.imprimir(*mensaje)
+
+    def _cargar_estado(self):
+        """Leer mapas de claves y marcas de agua persistidos"""
+        with open(self.archivo_estado, encoding='utf-8') as f:
+            estado = json.load(f)
+
+        for nombre, filas in estado.get('dimensiones', {}).items():
+            self.mapas_claves[nombre] = {tuple(fila[:-1]): int(fila[-1]) for fila in filas}
+        if estado.get('marca_agua_fecha'):
+            self.marca_agua_fecha = pd.Timestamp(estado['marca_agua_fecha'])
+        self.huellas_procesadas = estado.get('huellas_procesadas', [])
+        self.archivos_en_curso = estado.get('archivos_en_curso', {})
+
+    def _guardar_estado(self):
+        """Persistir el estado de forma atómica (escritura temporal + reemplazo)"""
+        estado = {
+            'dimensiones': {
+                nombre: [list(clave) + [identificador] for clave, identificador in mapa.items()]
+                for nombre, mapa in self.mapas_claves.items()
+            },
+            'marca_agua_fecha': self.marca_agua_fecha.isoformat() if self.marca_agua_fecha is not None else None,
+            'huellas_procesadas': self.huellas_procesadas,
+            'archivos_en_curso': self.archivos_en_curso
+        }
+        temporal = f"{self.archivo_estado}.tmp"
+        with open(temporal, 'w', encoding='utf-8') as f:
+            json.dump(estado, f, ensure_ascii=False)
+        os.replace(temporal, self.archivo_estado)
+
+    def inicializar_desde_postgresql(self, conexion):
+        """Reconstruir mapas de claves y marca de agua desde tablas ya cargadas"""
+        conexion = conexion.raw_connection() if hasattr(conexion, 'raw_connection') else conexion
+        with conexion.cursor() as cursor:
+            for nombre, (columnas, clave) in DIMENSIONES.items():
+                columnas_sql = ', '.join(f'"{c}"' for c in columnas)
+                cursor.execute(f'SELECT {columnas_sql}, "{clave}" FROM "{nombre}"')
+                self.mapas_claves[nombre] = {tuple(fila[:-1]): int(fila[-1]) for fila in cursor.fetchall()}
+            cursor.execute('SELECT max(fecha) FROM fact_ventas')
+            maximo = cursor.fetchone()[0]
+            self.marca_agua_fecha = pd.Timestamp(maximo) if maximo is not None else None
+        self._guardar_estado()
+
+    def _asignar_claves(self, df: pd.DataFrame, nombre: str) -> Tuple[np.ndarray, pd.DataFrame]:
+        """Asignar claves sustitutas por búsqueda hash sobre combinaciones distintas"""
+        columnas, clave = DIMENSIONES[nombre]
+        mapa = self.mapas_claves[nombre]
+
+        # Factorizar cada columna y combinar códigos: solo se recorren combinaciones distintas
+        codigos_combinados = np.zeros(len(df), dtype=np.int64)
+        valores_por_columna = []
+        for columna in columnas:
+            codigos, valores = pd.factorize(df[columna], use_na_sentinel=False)
+            codigos_combinados = codigos_combinados * (len(valores) + 1) + codigos
+            valores_por_columna.append((codigos, valores))
+
+        codigos_fila, combinaciones = pd.factorize(codigos_combinados)
+        posiciones = pd.Series(np.arange(len(df))).groupby(codigos_fila).first().to_numpy()
+
+        identificadores = np.empty(len(combinaciones), dtype=np.int64)
+        nuevos = []
+        siguiente = max(mapa.values(), default=0) + 1
+        for i, posicion in enumerate(posiciones):
+            llave = tuple(_valor_clave(valores[codigos[posicion]]) for codigos, valores in valores_por_columna)
+            if llave not in mapa:
+                mapa[llave] = siguiente
+                nuevos.append(list(llave) + [siguiente])
+                siguiente += 1
+            identificadores[i] = mapa[llave]
+
+        miembros_nuevos = pd.DataFrame(nuevos, columns=columnas + [clave])
+        return identificadores[codigos_fila], miembros_nuevos
+
+    def procesar_lote(self, df: pd.DataFrame, huella: Optional[str] = None,
+                      marca_agua: Optional[pd.Timestamp] = None) -> Dict[str, pd.DataFrame]:
+        """
+        Preparar el delta de un lote limpio: miembros de dimensión nuevos y hechos nuevos.
+
+        El estado no se persiste hasta llamar a `confirmar()` tras una carga exitosa.
+        `marca_agua` reemplaza la marca actual como filtro (pd.NaT = sin marca): los
+        bloques de un mismo archivo se filtran con la marca previa al archivo aunque
+        sus fechas lleguen desordenadas.
+        """
+        self._imprimir("\n🔄 Construyendo delta del modelo estrella...")
+        # Trabajar sobre copias para poder descartar el lote si la carga falla
+        respaldo = {nombre: dict(mapa) for nombre, mapa in self.mapas_claves.items()}
+        self.omitidos_sin_fecha = 0
+
+        if self.modo_incremental == 'archivo' and huella in self.huellas_procesadas:
+            self._imprimir(f"   ℹ️  Archivo ya procesado ({huella[:12]}...), no hay filas nuevas")
+            df = df.iloc[0:0]
+        elif self.modo_incremental == 'fecha':
+            fechas = pd.to_datetime(df['fecha'])
+            filtro = fechas.notna()
+            self.omitidos_sin_fecha = int((~filtro).sum())
+            limite = marca_agua if marca_agua is not None else self.marca_agua_fecha
+            if limite is not None and not pd.isna(limite):
+                filtro &= fechas > limite
+            df = df[filtro.to_numpy()]
+
+        resultado = {}
+        hechos = pd.DataFrame(index=df.index)
+        for nombre, (_, clave) in DIMENSIONES.items():
+            identificadores, nuevos = self._asignar_claves(df, nombre)
+            hechos[clave] = identificadores
+            resultado[nombre] = nuevos
+
+        for columna in COLUMNAS_HECHOS:
+            if columna not in hechos.columns:
+                hechos[columna] = df[columna] if columna in df.columns else np.nan
+        resultado['fact_ventas'] = hechos[COLUMNAS_HECHOS].reset_index(drop=True)
+
+        nueva_marca = self.marca_agua_fecha
+        if self.modo_incremental == 'fecha' and len(df):
+            maximo = pd.to_datetime(df['fecha']).max()
+            nueva_marca = maximo if nueva_marca is None else max(nueva_marca, maximo)
+
+        self._pendiente = {'respaldo': respaldo, 'marca_agua_fecha': nueva_marca, 'huella': huella, 'filas': df}
+
+        for nombre in DIMENSIONES:
+            self._imprimir(f"   ➕ {nombre}: {len(resultado[nombre]):,} miembros nuevos")
+        self._imprimir(f"   ➕ fact_ventas: {len(resultado['fact_ventas']):,} hechos nuevos")
+        if self.omitidos_sin_fecha:
+            self._imprimir(f"   ⚠️ {self.omitidos_sin_fecha:,} hechos sin fecha omitidos (el modo 'fecha' "
+                           f"no los ubica respecto a la marca de agua; el modo 'archivo' sí los carga)")
+        return resultado
+
+    def confirmar(self, archivo: Optional[str] = None, filas_archivo: Optional[int] = None):
+        """
+        Persistir mapas de claves y marcas de agua del último lote procesado.
+
+        Con `archivo` (huella de un archivo iniciado con `iniciar_archivo`) el lote es
+        un bloque de ese archivo: solo se persisten los mapas de claves y el avance
+        (`filas_archivo` entregadas hasta este bloque y la marca de agua acumulada).
+        """
+        if self._pendiente is None:
+            return
+        if archivo is None:
+            self.marca_agua_fecha = self._pendiente['marca_agua_fecha']
+            if self._pendiente['huella'] and self._pendiente['huella'] not in self.huellas_procesadas:
+                self.huellas_procesadas.append(self._pendiente['huella'])
+        else:
+            avance = self.archivos_en_curso[archivo]
+            avance['filas'] = filas_archivo
+            marca = self._pendiente['marca_agua_fecha']
+            if marca is not None:
+                acumulada = avance['marca_agua']
+                avance['marca_agua'] = (marca if acumulada is None else max(marca, pd.Timestamp(acumulada))).isoformat()
+        self._pendiente = None
+        self._guardar_estado()
+
+    def iniciar_archivo(self, archivo: str) -> Dict:
+        """
+        Empezar o reanudar la carga por bloques del archivo con huella `archivo`.
+
+        Devuelve su avance: `filas` limpias ya cargadas por una ejecución interrumpida
+        (a saltar al reanudar con la misma configuración) y `marca_previa`, la marca de
+        agua con la que se filtran todos sus bloques.
+        """
+        if archivo not in self.archivos_en_curso:
+            marca = self.marca_agua_fecha
+            self.archivos_en_curso[archivo] = {
+                'filas': 0,
+                'marca_previa': marca.isoformat() if marca is not None else None,
+                'marca_agua': None
+            }
+        elif self.archivos_en_curso[archivo]['filas']:
+            self._imprimir(f"   ↩️  Reanudando archivo ({archivo[:12]}...): "
+                           f"{self.archivos_en_curso[archivo]['filas']:,} filas ya cargadas")
+        return self.archivos_en_curso[archivo]
+
+    def terminar_archivo(self, archivo: str, huella: Optional[str] = None):
+        """Fijar la marca de agua acumulada y la huella tras el último bloque del archivo"""
+        avance = self.archivos_en_curso.pop(archivo, None)
+        if avance and avance['marca_agua']:
+            marca = pd.Timestamp(avance['marca_agua'])
+            self.marca_agua_fecha = marca if self.marca_agua_fecha is None else max(self.marca_agua_fecha, marca)
+        if huella and huella not in self.huellas_procesadas:
+            self.huellas_procesadas.append(huella)
+        self._guardar_estado()
+
+    def descartar(self):
+        """Revertir los mapas de claves si la carga del lote falló"""
+        if self._pendiente is None:
+            return
+        self.mapas_claves = self._pendiente['respaldo']
+        self._pendiente = None
+
+    def cargar_incremental(self, df: pd.DataFrame, cargador, huella: Optional[str] = None,
+                           cubo=None, marca_agua: Optional[pd.Timestamp] = None,
+                           archivo: Optional[str] = None,
+                           filas_archivo: Optional[int] = None) -> Dict[str, pd.DataFrame]:
+        """
+        Procesar un lote y anexarlo en PostgreSQL con un CargadorPostgreSQL.
+
+        Con un CuboVentas, las mismas filas que entraron como hechos se suman a las
+        tablas resumen en la misma transacción que los hechos y, tras confirmar el
+        lote, a los cubos locales. `archivo` y `filas_archivo` se pasan a
+        `confirmar()` cuando el lote es un bloque de un archivo en curso.
+        """
+        delta = self.procesar_lote(df, huella, marca_agua)
+        filas_nuevas = self._pendiente['filas']
+        delta_cubo = cubo.calcular_delta(filas_nuevas) if cubo is not None and len(filas_nuevas) else None
+        try:
+            cargador.anexar_tablas(
+                delta,
+                en_transaccion=(lambda cursor: cubo.fusionar_delta(cursor, cargador, delta_cubo))
+                if delta_cubo is not None else None
+            )
+        except Exception:
+            self.descartar()
+            raise
+        self.confirmar(archivo, filas_archivo)
+
+        if delta_cubo is not None:
+            cubo.sumar_delta(delta_cubo)
+        return delta
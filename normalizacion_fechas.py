@@ -0,0 +1,110 @@
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+VALORES_NULOS_FECHA = {'', 'nan', 'none', 'null', 'nat', 'n/a', 'na'}
+
+ESTADO_VALIDA = 'validas'
+ESTADO_NULA = 'nulas'
+ESTADO_INVALIDA = 'invalidas'
+ESTADO_FUERA_DE_RANGO = 'fuera_de_rango'
+ESTADOS = [ESTADO_VALIDA, ESTADO_NULA, ESTADO_INVALIDA, ESTADO_FUERA_DE_RANGO]
+
+
+class NormalizadorFechas:
+    """
+    Conversión de fechas en varios formatos a datetime64 con control de rango.
+
+    Cada cadena distinta se interpreta una sola vez: se prueban los formatos en
+    orden sobre los valores aún sin resolver (`pd.to_datetime` vectorizado) y el
+    resultado queda en una caché compartida entre bloques. La caché se vacía al
+    superar `max_entradas`: con marcas de tiempo casi todas distintas crecería con
+    el archivo completo en vez de con el bloque.
+    """
+
+    def __init__(self, formatos: List[str], rango_min: str = None, rango_max: str = None,
+                 max_entradas: int = 200000):
+        self.formatos = formatos
+        self.rango_min = pd.Timestamp(rango_min) if rango_min else None
+        # El límite superior incluye el día completo
+        self.rango_max = pd.Timestamp(rango_max) + pd.Timedelta(days=1) if rango_max else None
+        self.max_entradas = max_entradas
+        self.cache: Dict[str, Tuple[np.datetime64, str]] = {}
+
+    def _interpretar_valores(self, valores: List[str]) -> Dict[str, Tuple[np.datetime64, str]]:
+        """Interpretar valores distintos probando cada formato de forma vectorizada"""
+        serie = pd.Series(valores, dtype=object).str.strip()
+        resultado = pd.Series(pd.NaT, index=serie.index, dtype='datetime64[ns]')
+        nulos = serie.str.lower().isin(VALORES_NULOS_FECHA)
+
+        pendientes = ~nulos
+        for formato in self.formatos:
+            if not pendientes.any():
+                break
+            resultado[pendientes] = pd.to_datetime(serie[pendientes], format=formato, errors='coerce')
+            pendientes &= resultado.isna()
+
+        fuera_de_rango = pd.Series(False, index=serie.index)
+        if self.rango_min is not None:
+            fuera_de_rango |= resultado < self.rango_min
+        if self.rango_max is not None:
+            fuera_de_rango |= resultado >= self.rango_max
+
+        estados = np.select(
+            [nulos.to_numpy(), pendientes.to_numpy(), fuera_de_rango.to_numpy()],
+            [ESTADO_NULA, ESTADO_INVALIDA, ESTADO_FUERA_DE_RANGO],
+            default=ESTADO_VALIDA
+        )
+        resultado[fuera_de_rango] = pd.NaT
+
+        return dict(zip(valores, zip(resultado.to_numpy(), estados)))
+
+    def _normalizar_datetime(self, serie: pd.Series) -> Tuple[pd.Series, Dict[str, int]]:
+        """Aplicar solo el control de rango a una serie que ya es datetime64"""
+        if isinstance(serie.dtype, pd.DatetimeTZDtype):
+            serie = serie.dt.tz_localize(None)
+        fechas = serie.astype('datetime64[ns]')
+        nulas = fechas.isna()
+
+        fuera_de_rango = pd.Series(False, index=fechas.index)
+        if self.rango_min is not None:
+            fuera_de_rango |= fechas < self.rango_min
+        if self.rango_max is not None:
+            fuera_de_rango |= fechas >= self.rango_max
+
+        conteos = dict.fromkeys(ESTADOS, 0)
+        conteos[ESTADO_NULA] = int(nulas.sum())
+        conteos[ESTADO_FUERA_DE_RANGO] = int(fuera_de_rango.sum())
+        conteos[ESTADO_VALIDA] = len(fechas) - conteos[ESTADO_NULA] - conteos[ESTADO_FUERA_DE_RANGO]
+        return fechas.mask(fuera_de_rango), conteos
+
+    def normalizar_serie(self, serie: pd.Series) -> Tuple[pd.Series, Dict[str, int]]:
+        """Convertir una serie a datetime64 y devolver los conteos por estado"""
+        if pd.api.types.is_datetime64_any_dtype(serie):
+            # Ya interpretada (p. ej. por el plan de ingesta): no se reinterpreta como texto
+            return self._normalizar_datetime(serie)
+
+        codigos, valores_unicos = pd.factorize(serie)
+        claves = [str(valor) for valor in valores_unicos]
+
+        # INTERPRETAR SOLO LAS CADENAS QUE NO ESTÁN EN CACHÉ
+        pendientes = [clave for clave in claves if clave not in self.cache]
+        nuevos = self._interpretar_valores(pendientes) if pendientes else {}
+        resueltos = [self.cache[c] if c in self.cache else nuevos[c] for c in claves]
+        if nuevos:
+            if len(self.cache) + len(nuevos) > self.max_entradas:
+                self.cache.clear()
+            if len(nuevos) <= self.max_entradas:
+                self.cache.update(nuevos)
+
+        fechas_unicas = np.array([fecha for fecha, _ in resueltos] + [np.datetime64('NaT')],
+                                 dtype='datetime64[ns]')
+        estados_unicos = np.array([estado for _, estado in resueltos] + [ESTADO_NULA])
+
+        # Conteo ponderado por frecuencia: el código -1 (nulo) cae en la última posición
+        presentes = codigos >= 0
+        frecuencias = np.append(np.bincount(codigos[presentes], minlength=len(claves)), (~presentes).sum())
+        conteos = {estado: int(frecuencias[estados_unicos == estado].sum()) for estado in ESTADOS}
+
+        return pd.Series(fechas_unicas[codigos], index=serie.index, name=serie.name), conteos
@@ -0,0 +1,82 @@
+import json
+import os
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+
+class NormalizadorTexto:
+    """
+    Limpieza de texto sobre valores distintos con salida categórica.
+
+    Cada columna se factoriza, solo se limpian los valores crudos que aún no están
+    en la caché y el resultado se reconstruye con los códigos. El coste depende de
+    la cardinalidad de la columna y no del número de filas. La caché se comparte
+    entre bloques y, opcionalmente, entre ejecuciones mediante un archivo JSON.
+    """
+
+    PATRON_CARACTERES_INVALIDOS = r'[^a-zA-Z0-9áéíóúÁÉÍÓÚñÑüÜ\s\-_\.]'
+
+    def __init__(self, case: str = 'title', archivo_cache: Optional[str] = None,
+                 max_entradas: int = 1000000):
+        self.case = case
+        self.archivo_cache = archivo_cache
+        self.max_entradas = max_entradas
+        self.cache: Dict[str, Optional[str]] = {}
+
+        if archivo_cache and os.path.exists(archivo_cache):
+            with open(archivo_cache, encoding='utf-8') as f:
+                datos = json.load(f)
+            # Una caché generada con otra regla de mayúsculas no es válida
+            if datos.get('case') == case:
+                self.cache = datos.get('valores', {})
+
+    def _limpiar_valores(self, valores: pd.Series) -> pd.Series:
+        """Aplicar las reglas de limpieza a un conjunto pequeño de valores distintos"""
+        limpios = valores.astype(str).str.strip()
+        limpios = limpios.str.replace(self.PATRON_CARACTERES_INVALIDOS, ' ', regex=True)
+        limpios = limpios.str.replace(r'\s+', ' ', regex=True).str.strip()
+
+        if self.case == 'lower':
+            limpios = limpios.str.lower()
+        elif self.case == 'upper':
+            limpios = limpios.str.upper()
+        elif self.case == 'title':
+            limpios = limpios.str.title()
+
+        return limpios.where(limpios != '', None)
+
+    def normalizar_serie(self, serie: pd.Series) -> pd.Series:
+        """Normalizar una columna de texto y devolverla como dtype category"""
+        codigos, valores_unicos = pd.factorize(serie)
+        claves = [str(valor) for valor in valores_unicos]
+
+        # LIMPIAR SOLO LOS VALORES QUE NO ESTÁN EN CACHÉ
+        pendientes = [clave for clave in claves if clave not in self.cache]
+        if pendientes:
+            limpios = self._limpiar_valores(pd.Series(pendientes, dtype=object))
+            nuevos = dict(zip(pendientes, limpios.tolist()))
+            if len(self.cache) + len(nuevos) <= self.max_entradas:
+                self.cache.update(nuevos)
+        else:
+            nuevos = {}
+
+        valores_limpios = [self.cache[c] if c in self.cache else nuevos[c] for c in claves]
+
+        # Varios valores crudos pueden converger al mismo valor limpio
+        codigos_limpios, categorias = pd.factorize(pd.Series(valores_limpios, dtype=object))
+        codigos_finales = np.append(codigos_limpios, -1)[codigos]
+
+        return pd.Series(
+            pd.Categorical.from_codes(codigos_finales, categories=categorias),
+            index=serie.index,
+            name=serie.name
+        )
+
+    def guardar_cache(self):
+        """Persistir la caché para reutilizarla en ejecuciones posteriores"""
+        if not self.archivo_cache:
+            return
+        with open(self.archivo_cache, 'w', encoding='utf-8') as f:
+            json.dump({'case': self.case, 'valores': self.cache}, f, ensure_ascii=False)
@@ -0,0 +1,543 @@
+import argparse
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from huellas import PRIMO_FILA, SEMILLA_FILA, factorizar, huellas_por_fila, mezclar
+from representacion_compacta import restaurar_punto_fijo
+
+# Tipo que pandas asigna a una columna de texto al leer un CSV ('object' o 'str' según la versión)
+TIPO_TEXTO = str(pd.Series(['texto']).dtype)
+
+
+def _longitud_bits(valores: np.ndarray) -> np.ndarray:
+    """Posición del bit más alto encendido (0 para el valor 0), vectorizado"""
+    valores = valores.copy()
+    longitud = np.zeros(len(valores), dtype=np.int64)
+    for desplazamiento in (32, 16, 8, 4, 2, 1):
+        altos = valores >= (np.uint64(1) << np.uint64(desplazamiento))
+        longitud += altos * desplazamiento
+        valores = np.where(altos, valores >> np.uint64(desplazamiento), valores)
+    return longitud + (valores > 0)
+
+
+# ------------------------------------------------------------------ bosquejos
+class HyperLogLog:
+    """Conteo aproximado de valores distintos (error típico 1.04 / sqrt(2**precision))"""
+
+    def __init__(self, precision: int = 14):
+        self.precision = precision
+        self.registros = np.zeros(1 << precision, dtype=np.uint8)
+
+    def agregar(self, huellas: np.ndarray):
+        if not len(huellas):
+            return
+        huellas = huellas.astype(np.uint64, copy=False)
+        bits_resto = 64 - self.precision
+        indices = (huellas >> np.uint64(bits_resto)).astype(np.int64)
+        resto = huellas & ((np.uint64(1) << np.uint64(bits_resto)) - np.uint64(1))
+        rangos = (bits_resto - _longitud_bits(resto) + 1).astype(np.uint8)
+        np.maximum.at(self.registros, indices, rangos)
+
+    def combinar(self, otro: 'HyperLogLog'):
+        if otro.precision != self.precision:
+            raise ValueError("Solo se pueden combinar HyperLogLog con la misma precisión")
+        np.maximum(self.registros, otro.registros, out=self.registros)
+
+    def estimar(self) -> int:
+        m = len(self.registros)
+        alfa = 0.7213 / (1 + 1.079 / m)
+        estimacion = alfa * m * m / np.sum(np.power(2.0, -self.registros.astype(np.float64)))
+        vacios = int(np.count_nonzero(self.registros == 0))
+        if estimacion <= 2.5 * m and vacios:
+            # Corrección para cardinalidades pequeñas (conteo lineal)
+            estimacion = m * np.log(m / vacios)
+        return int(round(estimacion))
+
+
+class ConjuntoHuellas:
+    """
+    Huellas distintas: exactas hasta `max_exactas` y estimadas con HyperLogLog después.
+
+    Las huellas nuevas se acumulan y se deduplican por tandas (coste amortizado
+    de una ordenación), de modo que la memoria queda en unas dos veces el límite.
+    """
+
+    TANDA_MINIMA = 1 << 20
+
+    def __init__(self, max_exactas: int, precision_hll: int = 14):
+        self.max_exactas = max_exactas
+        self.hll = HyperLogLog(precision_hll)
+        self.unicas = np.empty(0, dtype=np.uint64)
+        self._pendientes: List[np.ndarray] = []
+        self._cantidad_pendiente = 0
+        self.exacto = True
+
+    def _pendiente(self, huellas: np.ndarray):
+        self._pendientes.append(huellas)
+        self._cantidad_pendiente += len(huellas)
+        if self._cantidad_pendiente > max(len(self.unicas), self.TANDA_MINIMA):
+            self._compactar()
+
+    def _compactar(self):
+        if not self.exacto or not self._pendientes:
+            return
+        self.unicas = np.unique(np.concatenate([self.unicas] + self._pendientes))
+        self._pendientes, self._cantidad_pendiente = [], 0
+        if len(self.unicas) > self.max_exactas:
+            self.exacto = False
+            self.unicas = np.empty(0, dtype=np.uint64)
+
+    def agregar(self, huellas: np.ndarray):
+        self.hll.agregar(huellas)
+        if self.exacto:
+            self._pendiente(huellas)
+
+    def combinar(self, otro: 'ConjuntoHuellas'):
+        self.hll.combinar(otro.hll)
+        if not (self.exacto and otro.exacto):
+            self.exacto = False
+            self.unicas, self._pendientes, self._cantidad_pendiente = np.empty(0, dtype=np.uint64), [], 0
+            return
+        for huellas in [otro.unicas] + otro._pendientes:
+            self._pendiente(huellas)
+
+    def contar(self) -> int:
+        self._compactar()
+        return len(self.unicas) if self.exacto else self.hll.estimar()
+
+
+class FrecuenciasAcotadas:
+    """
+    Frecuencia de valores, exacta mientras haya pocos valores distintos.
+
+    Al superar `max_valores` se conservan los más frecuentes (resumen tipo
+    Misra-Gries) y el conteo de cada valor puede subestimarse como mucho en
+    `error_maximo`.
+    """
+
+    def __init__(self, max_valores: int = 1000):
+        self.max_valores = max_valores
+        self.conteos = pd.Series(dtype='int64')
+        self.exactas = True
+        self.error_maximo = 0
+
+    def _acotar(self):
+        if len(self.conteos) > self.max_valores:
+            self.conteos = self.conteos.sort_values(ascending=False, kind='stable')
+            self.error_maximo += int(self.conteos.iloc[self.max_valores])
+            self.conteos = self.conteos.iloc[:self.max_valores]
+            self.exactas = False
+
+    def _sumar(self, conteos: pd.Series):
+        self.conteos = conteos.copy() if self.conteos.empty else self.conteos.add(conteos, fill_value=0).astype('int64')
+        self._acotar()
+
+    def agregar(self, valores: np.ndarray, conteos: np.ndarray):
+        self._sumar(pd.Series(conteos, index=pd.Index(valores, dtype=object), dtype='int64'))
+
+    def combinar(self, otro: 'FrecuenciasAcotadas'):
+        self.exactas = self.exactas and otro.exactas
+        self.error_maximo += otro.error_maximo
+        self._sumar(otro.conteos)
+
+    def principales(self, n: int = 10) -> pd.Series:
+        return self.conteos.sort_values(ascending=False, kind='stable').head(n)
+
+
+class Momentos:
+    """Conteo, media, varianza (Chan et al.), mínimo y máximo combinables"""
+
+    def __init__(self):
+        self.n = 0
+        self.media = 0.0
+        self.m2 = 0.0
+        self.minimo = np.inf
+        self.maximo = -np.inf
+        self.enteros = True
+
+    def _sumar(self, n: int, media: float, m2: float, minimo: float, maximo: float, enteros: bool):
+        if n == 0:
+            return
+        total = self.n + n
+        delta = media - self.media
+        self.media += delta * n / total
+        self.m2 += m2 + delta * delta * self.n * n / total
+        self.n = total
+        self.minimo = min(self.minimo, minimo)
+        self.maximo = max(self.maximo, maximo)
+        self.enteros = self.enteros and enteros
+
+    def agregar(self, valores: np.ndarray, pesos: np.ndarray):
+        """Agregar valores distintos con el número de veces que aparece cada uno"""
+        n = int(pesos.sum())
+        if n:
+            media = float(np.dot(valores, pesos) / n)
+            self._sumar(n, media, float(np.dot((valores - media) ** 2, pesos)),
+                        float(valores.min()), float(valores.max()), bool(np.all(np.mod(valores, 1) == 0)))
+
+    def combinar(self, otro: 'Momentos'):
+        self._sumar(otro.n, otro.media, otro.m2, otro.minimo, otro.maximo, otro.enteros)
+
+    @property
+    def desviacion(self) -> float:
+        # ddof=1, como pandas
+        return float(np.sqrt(self.m2 / (self.n - 1))) if self.n > 1 else float('nan')
+
+
+class BosquejoCuantiles:
+    """
+    Cuantiles con error relativo acotado (DDSketch).
+
+    Cada valor cae en un cubo logarítmico de ancho relativo `precision`; los
+    cubos se suman al combinar, así que el resultado no depende del reparto en
+    bloques ni en procesos.
+    """
+
+    def __init__(self, precision: float = 0.01):
+        self.precision = precision
+        self.gamma = (1 + precision) / (1 - precision)
+        self._log_gamma = np.log(self.gamma)
+        self.positivos = (np.array([], dtype=np.int64), np.array([], dtype=np.float64))
+        self.negativos = (np.array([], dtype=np.int64), np.array([], dtype=np.float64))
+        self.ceros = 0
+
+    @staticmethod
+    def _sumar_cubos(a, b):
+        indices = np.concatenate([a[0], b[0]])
+        if not len(indices):
+            return a
+        unicos, inversos = np.unique(indices, return_inverse=True)
+        return unicos, np.bincount(inversos, weights=np.concatenate([a[1], b[1]]))
+
+    def _cubos(self, magnitudes: np.ndarray, pesos: np.ndarray):
+        indices = np.ceil(np.log(magnitudes) / self._log_gamma).astype(np.int64)
+        return self._sumar_cubos((indices, pesos.astype(np.float64)), (np.array([], dtype=np.int64), np.array([])))
+
+    def agregar(self, valores: np.ndarray, pesos: np.ndarray):
+        positivos, negativos = valores > 0, valores < 0
+        self.positivos = self._sumar_cubos(self.positivos, self._cubos(valores[positivos], pesos[positivos]))
+        self.negativos = self._sumar_cubos(self.negativos, self._cubos(-valores[negativos], pesos[negativos]))
+        self.ceros += int(pesos[valores == 0].sum())
+
+    def combinar(self, otro: 'BosquejoCuantiles'):
+        self.positivos = self._sumar_cubos(self.positivos, otro.positivos)
+        self.negativos = self._sumar_cubos(self.negativos, otro.negativos)
+        self.ceros += otro.ceros
+
+    def _valores_y_pesos(self):
+        """Valor representativo de cada cubo en orden ascendente y su conteo"""
+        representante = lambda indices: 2 * np.power(self.gamma, indices) / (self.gamma + 1)  # noqa: E731
+        valores = np.concatenate([-representante(self.negativos[0])[::-1], [0.0], representante(self.positivos[0])])
+        pesos = np.concatenate([self.negativos[1][::-1], [self.ceros], self.positivos[1]])
+        return valores, pesos
+
+    def cuantil(self, q: float) -> float:
+        valores, pesos = self._valores_y_pesos()
+        total = pesos.sum()
+        if total == 0:
+            return float('nan')
+        posicion = np.searchsorted(np.cumsum(pesos), q * (total - 1), side='right')
+        return float(valores[min(posicion, len(valores) - 1)])
+
+    def histograma(self, minimo: float, maximo: float, intervalos: int = 20) -> pd.Series:
+        valores, pesos = self._valores_y_pesos()
+        conteos, bordes = np.histogram(np.clip(valores, minimo, maximo), bins=intervalos,
+                                       range=(minimo, maximo), weights=pesos)
+        return pd.Series(conteos.astype(np.int64), index=pd.IntervalIndex.from_breaks(bordes, closed='left'))
+
+
+# -------------------------------------------------------------------- perfiles
+class PerfilColumna:
+    """Bosquejos de una columna: nulos, distintos, frecuencias y estadísticas numéricas"""
+
+    def __init__(self, precision_hll: int, precision_cuantiles: float, max_valores: int, max_distintos_exactos: int):
+        self.total = 0
+        self.nulos = 0
+        self.tipo_origen: Optional[str] = None
+        self.distintos = ConjuntoHuellas(max_distintos_exactos, precision_hll)
+        self.frecuencias = FrecuenciasAcotadas(max_valores)
+        self.momentos = Momentos()
+        self.cuantiles = BosquejoCuantiles(precision_cuantiles)
+        self.no_numericos = 0
+
+    def agregar(self, serie: pd.Series) -> np.ndarray:
+        """Incorporar los valores de un bloque y devolver la huella de cada fila para esta columna"""
+        if self.tipo_origen is None:
+            self.tipo_origen = str(serie.dtype)
+        codigos, unicos, huellas_unicos = factorizar(serie)
+        presentes = codigos >= 0
+        conteos = np.bincount(codigos[presentes], minlength=len(unicos))
+
+        self.total += len(serie)
+        self.nulos += len(serie) - int(presentes.sum())
+        if len(unicos):
+            # Todo se calcula sobre los valores distintos del bloque ponderados por su frecuencia
+            self.distintos.agregar(huellas_unicos)
+            self.frecuencias.agregar(unicos, conteos)
+            self._agregar_numericos(unicos, conteos)
+        return huellas_por_fila(codigos, huellas_unicos)
+
+    def _agregar_numericos(self, unicos: np.ndarray, conteos: np.ndarray):
+        if unicos.dtype.kind == 'M':
+            self.momentos.agregar(unicos.astype('datetime64[ns]').astype(np.int64).astype(np.float64), conteos)
+            return
+        if unicos.dtype.kind == 'b':
+            self.no_numericos += int(conteos.sum())
+            return
+        if unicos.dtype.kind == 'f':
+            valores = unicos
+        else:
+            valores = pd.to_numeric(pd.Series(unicos), errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+            numericos = ~np.isnan(valores)
+            self.no_numericos += int(conteos[~numericos].sum())
+            valores, conteos = valores[numericos], conteos[numericos]
+
+        self.momentos.agregar(valores, conteos)
+        self.cuantiles.agregar(valores, conteos)
+
+    def combinar(self, otro: 'PerfilColumna'):
+        self.total += otro.total
+        self.nulos += otro.nulos
+        self.tipo_origen = self.tipo_origen or otro.tipo_origen
+        self.distintos.combinar(otro.distintos)
+        self.frecuencias.combinar(otro.frecuencias)
+        self.momentos.combinar(otro.momentos)
+        self.cuantiles.combinar(otro.cuantiles)
+        self.no_numericos += otro.no_numericos
+
+    @property
+    def es_fecha(self) -> bool:
+        return self.tipo_origen is not None and self.tipo_origen.startswith('datetime64')
+
+    @property
+    def es_numerica(self) -> bool:
+        # Numérica solo si todos los valores presentes lo son, como la inferencia de read_csv
+        return not self.es_fecha and self.momentos.n > 0 and self.no_numericos == 0
+
+    def tipo_dato(self) -> str:
+        """Tipo que tendría la columna cargada completa en pandas"""
+        if self.tipo_origen not in (None, 'object', 'str', 'string'):
+            return self.tipo_origen
+        if self.es_numerica:
+            return 'int64' if self.momentos.enteros and self.nulos == 0 else 'float64'
+        if self.nulos == self.total:
+            return 'float64'
+        return TIPO_TEXTO
+
+    def valores_unicos(self) -> int:
+        return self.distintos.contar()
+
+
+class PerfiladorCalidad:
+    """
+    Perfil de calidad de datos en una sola pasada y con memoria acotada.
+
+    Produce el mismo reporte que los notebooks (nulos, % nulos, valores únicos,
+    duplicados, mín/máx/media/desviación e histogramas) procesando bloques con
+    `agregar()`. Los perfiles de distintos bloques, archivos o procesos se unen
+    con `combinar()`:
+
+    - valores únicos y filas duplicadas: huellas de 64 bits exactas mientras no
+      superen `max_distintos_exactos` / `max_huellas_duplicados`, después HyperLogLog;
+    - cuantiles: DDSketch con error relativo `precision_cuantiles`;
+    - valores más frecuentes: exactos hasta `max_valores` distintos.
+    """
+
+    def __init__(self, precision_hll: int = 14, precision_cuantiles: float = 0.01, max_valores: int = 1000,
+                 max_distintos_exactos: int = 1_000_000, max_huellas_duplicados: int = 20_000_000):
+        self.precision_hll = precision_hll
+        self.precision_cuantiles = precision_cuantiles
+        self.max_valores = max_valores
+        self.max_distintos_exactos = max_distintos_exactos
+        self.columnas: Dict[str, PerfilColumna] = {}
+        self.filas = 0
+        self.filas_distintas = ConjuntoHuellas(max_huellas_duplicados, precision_hll)
+
+    def _perfil(self, columna: str) -> PerfilColumna:
+        if columna not in self.columnas:
+            self.columnas[columna] = PerfilColumna(
+                self.precision_hll, self.precision_cuantiles, self.max_valores, self.max_distintos_exactos
+            )
+        return self.columnas[columna]
+
+    def agregar(self, df: pd.DataFrame) -> 'PerfiladorCalidad':
+        """Incorporar un bloque de filas"""
+        df = restaurar_punto_fijo(df)
+        huellas = np.full(len(df), SEMILLA_FILA, dtype=np.uint64)
+        for columna in df.columns:
+            huellas = (huellas * PRIMO_FILA) ^ self._perfil(columna).agregar(df[columna])
+        self.filas += len(df)
+        self.filas_distintas.agregar(mezclar(huellas))
+        return self
+
+    def combinar(self, otro: 'PerfiladorCalidad') -> 'PerfiladorCalidad':
+        """Unir el perfil de otro bloque, archivo o proceso"""
+        for columna, perfil in otro.columnas.items():
+            self._perfil(columna).combinar(perfil)
+        self.filas += otro.filas
+        self.filas_distintas.combinar(otro.filas_distintas)
+        return self
+
+    # ----------------------------------------------------------------- reportes
+    def duplicados(self) -> int:
+        """Filas iguales a otra anterior (equivale a df.duplicated().sum())"""
+        return self.filas - min(self.filas_distintas.contar(), self.filas)
+
+    def reporte(self) -> pd.DataFrame:
+        """Tabla de calidad con las mismas columnas que el reporte del notebook"""
+        duplicados = self.duplicados()
+        return pd.DataFrame({
+            'Columna': list(self.columnas),
+            'Tipo_Dato': [p.tipo_dato() for p in self.columnas.values()],
+            'Total_Registros': self.filas,
+            'Valores_Nulos': [p.nulos for p in self.columnas.values()],
+            '%_Nulos': [round(p.nulos / self.filas * 100, 2) if self.filas else 0.0 for p in self.columnas.values()],
+            'Valores_Unicos': [p.valores_unicos() for p in self.columnas.values()],
+            'Duplicados': duplicados
+        })
+
+    def estadisticas(self) -> pd.DataFrame:
+        """Mínimo, máximo, media, desviación y cuartiles de las columnas numéricas y de fecha"""
+        filas = []
+        for columna, perfil in self.columnas.items():
+            momentos = perfil.momentos
+            if perfil.es_numerica:
+                filas.append({
+                    'Columna': columna, 'Minimo': momentos.minimo, 'Maximo': momentos.maximo,
+                    'Media': momentos.media, 'Desviacion': momentos.desviacion,
+                    'P25': perfil.cuantiles.cuantil(0.25), 'Mediana': perfil.cuantiles.cuantil(0.5),
+                    'P75': perfil.cuantiles.cuantil(0.75)
+                })
+            elif perfil.es_fecha and momentos.n:
+                filas.append({
+                    'Columna': columna, 'Minimo': pd.Timestamp(int(momentos.minimo)),
+                    'Maximo': pd.Timestamp(int(momentos.maximo)), 'Media': pd.Timestamp(int(momentos.media))
+                })
+        return pd.DataFrame(filas, columns=['Columna', 'Minimo', 'Maximo', 'Media', 'Desviacion', 'P25', 'Mediana', 'P75'])
+
+    def histograma(self, columna: str, intervalos: int = 20, principales: int = 10) -> pd.Series:
+        """Histograma por intervalos (columnas numéricas) o valores más frecuentes (texto)"""
+        perfil = self.columnas[columna]
+        if perfil.es_numerica:
+            return perfil.cuantiles.histograma(perfil.momentos.minimo, perfil.momentos.maximo, intervalos)
+        return perfil.frecuencias.principales(principales)
+
+    def resumen(self) -> Dict:
+        total_nulos = sum(p.nulos for p in self.columnas.values())
+        total_celdas = self.filas * len(self.columnas)
+        return {
+            'total_registros': self.filas,
+            'total_columnas': len(self.columnas),
+            'registros_duplicados': self.duplicados(),
+            'duplicados_exactos': self.filas_distintas.exacto,
+            'total_nulos': total_nulos,
+            'porcentaje_completitud': (1 - total_nulos / total_celdas) * 100 if total_celdas else 0.0
+        }
+
+    def mostrar(self, titulo: str = "REPORTE DE CALIDAD DE DATOS"):
+        """Imprimir el reporte con el formato del notebook"""
+        print("=" * 80)
+        print(f"📊 {titulo}")
+        print("=" * 80)
+        print("\n📋 Tabla de Calidad de Datos:")
+        print(self.reporte().to_string(index=False))
+
+        estadisticas = self.estadisticas()
+        if not estadisticas.empty:
+            print("\n📐 Estadísticas descriptivas:")
+            print(estadisticas.to_string(index=False))
+
+        resumen = self.resumen()
+        aproximado = '' if resumen['duplicados_exactos'] else ' (estimado)'
+        print("\n📈 RESUMEN:")
+        print(f"   • Total de registros: {resumen['total_registros']:,}")
+        print(f"   • Total de columnas: {resumen['total_columnas']}")
+        print(f"   • Registros duplicados: {resumen['registros_duplicados']:,}{aproximado}")
+        print(f"   • Total de valores nulos: {resumen['total_nulos']:,}")
+        print(f"   • Completitud general: {resumen['porcentaje_completitud']:.2f}%")
+
+
+# --------------------------------------------------------------------- lectura
+def _bloques_archivo(fuente, formato: str, tamano_bloque: int) -> Iterator[pd.DataFrame]:
+    if formato == 'parquet':
+        import pyarrow.parquet as pq
+        for lote in pq.ParquetFile(fuente).iter_batches(batch_size=tamano_bloque):
+            yield lote.to_pandas()
+    else:
+        # Todo como texto: la inferencia de tipos la hace el perfil y los bloques son comparables
+        yield from pd.read_csv(fuente, dtype=str, chunksize=tamano_bloque)
+
+
+def _perfilar_particion(tarea: Dict) -> PerfiladorCalidad:
+    """Perfilar un rango de bytes de un CSV (se ejecuta en un proceso del pool)"""
+    with open(tarea['archivo'], 'rb') as f:
+        f.seek(tarea['inicio'])
+        contenido = f.read(tarea['fin'] - tarea['inicio'])
+    perfilador = PerfiladorCalidad(**tarea['opciones'])
+    for bloque in _bloques_archivo(io.BytesIO(tarea['encabezado'] + contenido), 'csv', tarea['tamano_bloque']):
+        perfilador.agregar(bloque)
+    return perfilador
+
+
+def perfilar_dataframe(df: pd.DataFrame, tamano_bloque: int = 250000, **opciones) -> PerfiladorCalidad:
+    """Perfilar un DataFrame en memoria por bloques"""
+    perfilador = PerfiladorCalidad(**opciones)
+    for inicio in range(0, len(df), tamano_bloque):
+        perfilador.agregar(df.iloc[inicio:inicio + tamano_bloque])
+    return perfilador
+
+
+def perfilar_archivo(ruta: str, tamano_bloque: int = 250000, num_workers: int = 1,
+                     tamano_particion: int = 64 * 1024 * 1024, **opciones) -> PerfiladorCalidad:
+    """
+    Perfilar un CSV o parquet completo (original o limpio) en una pasada.
+
+    Con `num_workers` > 1 el CSV se reparte en rangos de bytes entre procesos y
+    los perfiles parciales se combinan al final.
+    """
+    formato = 'parquet' if ruta.lower().endswith('.parquet') or os.path.isdir(ruta) else 'csv'
+    if formato == 'csv' and num_workers > 1:
+        from limpieza_paralela import _calcular_particiones, _leer_encabezado
+
+        encabezado = _leer_encabezado(ruta)
+        tareas = [
+            {'archivo': ruta, 'inicio': inicio, 'fin': fin, 'encabezado': encabezado,
+             'tamano_bloque': tamano_bloque, 'opciones': opciones}
+            for inicio, fin in _calcular_particiones(ruta, tamano_particion)
+        ]
+        perfilador = PerfiladorCalidad(**opciones)
+        with ProcessPoolExecutor(max_workers=num_workers) as pool:
+            for parcial in pool.map(_perfilar_particion, tareas):
+                perfilador.combinar(parcial)
+        if not tareas:
+            # Archivo sin filas: conservar las columnas del encabezado
+            for bloque in _bloques_archivo(ruta, formato, tamano_bloque):
+                perfilador.agregar(bloque)
+        return perfilador
+
+    perfilador = PerfiladorCalidad(**opciones)
+    for bloque in _bloques_archivo(ruta, formato, tamano_bloque):
+        perfilador.agregar(bloque)
+    return perfilador
+
+
+def _argumentos(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(description="Reporte de calidad de datos en una sola pasada")
+    parser.add_argument('archivos', nargs='+', help="CSV o parquet (original y/o limpio)")
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--tamano-bloque', type=int, default=250000)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    argumentos = _argumentos()
+    for archivo in argumentos.archivos:
+        perfilar_archivo(archivo, argumentos.tamano_bloque, argumentos.workers).mostrar(
+            f"REPORTE DE CALIDAD DE DATOS - {os.path.basename(archivo)}"
+        )
+        print()
@@ -0,0 +1,249 @@
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+ACCIONES = ('marcar', 'anular', 'recortar', 'cuarentena')
+COLUMNA_REGLAS_INCUMPLIDAS = 'reglas_incumplidas'
+
+# Nombres disponibles en las expresiones de las reglas personalizadas (además de las columnas)
+FUNCIONES_EXPRESION = {
+    'abs': np.abs,
+    'isclose': np.isclose,
+    'minimo': np.minimum,
+    'maximo': np.maximum,
+    'where': np.where,
+    'np': np
+}
+
+
+def _por_valores_distintos(serie: pd.Series, condicion: Callable[[pd.Series], pd.Series]) -> np.ndarray:
+    """Evaluar una condición de texto sobre los valores distintos y expandirla con los códigos"""
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        codigos = serie.cat.codes.to_numpy()
+        valores = serie.cat.categories
+    else:
+        codigos, valores = pd.factorize(serie)
+    cumple = condicion(pd.Series(valores, dtype=object).astype(str)).to_numpy(dtype=bool)
+    # Código -1 (nulo): la regla no se aplica
+    return np.append(cumple, True)[codigos]
+
+
+class Regla:
+    """
+    Regla de validación compilada.
+
+    `condicion` recibe el DataFrame y devuelve un arreglo booleano (True = fila
+    válida). La regla solo se aplica a las filas sin nulos en `columnas`; si alguna
+    columna no existe en el bloque la regla no se evalúa.
+    """
+
+    def __init__(self, nombre: str, columnas: Sequence[str], condicion: Callable[[pd.DataFrame], np.ndarray],
+                 accion: str = 'marcar', limites: Optional[Tuple[Optional[float], Optional[float]]] = None):
+        if accion not in ACCIONES:
+            raise ValueError(f"Acción desconocida para la regla '{nombre}': {accion} (opciones: {ACCIONES})")
+        if accion == 'recortar' and limites is None:
+            raise ValueError(f"La regla '{nombre}' no es un rango: solo los rangos numéricos se pueden recortar")
+        self.nombre = nombre
+        self.columnas = list(columnas)
+        self.condicion = condicion
+        self.accion = accion
+        self.limites = limites
+
+    def violaciones(self, df: pd.DataFrame) -> np.ndarray:
+        if any(columna not in df.columns for columna in self.columnas):
+            return np.zeros(len(df), dtype=bool)
+        aplicable = df[self.columnas].notna().to_numpy().all(axis=1)
+        valida = np.broadcast_to(np.asarray(self.condicion(df), dtype=bool), (len(df),))
+        return aplicable & ~valida
+
+    # ----------------------------------------------------------- constructores
+    @classmethod
+    def rango(cls, columna: str, minimo: Optional[float], maximo: Optional[float],
+              accion: str = 'marcar') -> 'Regla':
+        def condicion(df: pd.DataFrame) -> np.ndarray:
+            valores = df[columna].to_numpy(dtype='float64', na_value=np.nan)
+            valida = np.ones(len(valores), dtype=bool)
+            if minimo is not None:
+                valida &= valores >= minimo
+            if maximo is not None:
+                valida &= valores <= maximo
+            return valida
+        return cls(f"{columna}_fuera_de_rango", [columna], condicion, accion, limites=(minimo, maximo))
+
+    @classmethod
+    def longitud_texto(cls, columna: str, minimo: Optional[int], maximo: Optional[int],
+                       accion: str = 'marcar') -> 'Regla':
+        def cumple(valores: pd.Series) -> pd.Series:
+            longitudes = valores.str.len()
+            return longitudes.between(minimo if minimo is not None else 0,
+                                      maximo if maximo is not None else np.inf)
+        return cls(f"{columna}_longitud", [columna],
+                   lambda df: _por_valores_distintos(df[columna], cumple), accion)
+
+    @classmethod
+    def sin_numeros(cls, columna: str, accion: str = 'marcar') -> 'Regla':
+        return cls(f"{columna}_con_numeros", [columna],
+                   lambda df: _por_valores_distintos(df[columna], lambda v: ~v.str.contains(r'\d', regex=True)),
+                   accion)
+
+    @classmethod
+    def expresion(cls, nombre: str, expresion: str, accion: str = 'marcar') -> 'Regla':
+        """
+        Regla personalizada como expresión vectorizada sobre las columnas, p. ej.
+        'isclose(total_ventas, cantidad * precio_unitario * (1 - descuento / 100), rtol=0.01)'.
+
+        La expresión se compila una sola vez y se evalúa con arreglos NumPy completos.
+        """
+        codigo = compile(expresion, f"<regla {nombre}>", 'eval')
+        columnas = [n for n in codigo.co_names if n not in FUNCIONES_EXPRESION]
+
+        def condicion(df: pd.DataFrame) -> np.ndarray:
+            entorno = dict(FUNCIONES_EXPRESION)
+            for columna in columnas:
+                serie = df[columna]
+                numerica = pd.api.types.is_numeric_dtype(serie.dtype) and not pd.api.types.is_bool_dtype(serie.dtype)
+                entorno[columna] = serie.to_numpy(dtype='float64', na_value=np.nan) if numerica else serie.to_numpy()
+            return eval(codigo, {'__builtins__': {}}, entorno)
+        return cls(nombre, columnas, condicion, accion)
+
+
+class MotorValidacion:
+    """
+    Reglas de `reglas_limpieza` compiladas a máscaras booleanas vectorizadas.
+
+    Todas las reglas se evalúan sobre el bloque tal como llega (una pasada) y sus
+    violaciones forman una matriz reglas x filas. Después se aplica la acción de
+    cada regla: 'marcar' solo cuenta, 'anular' deja nulas las celdas, 'recortar'
+    lleva el valor al límite del rango y 'cuarentena' retira la fila del resultado
+    y la devuelve aparte con la lista de reglas incumplidas.
+    """
+
+    def __init__(self, reglas: List[Regla]):
+        nombres = [regla.nombre for regla in reglas]
+        repetidos = sorted({n for n in nombres if nombres.count(n) > 1})
+        if repetidos:
+            raise ValueError(f"Reglas de validación con nombre repetido: {repetidos}")
+        self.reglas = reglas
+
+    @classmethod
+    def desde_configuracion(cls, reglas_limpieza: Dict, columnas_numericas: Sequence[str],
+                            columnas_texto: Sequence[str]) -> 'MotorValidacion':
+        """Compilar las reglas de número, texto y personalizadas para las columnas de un bloque"""
+        reglas = []
+
+        numero = reglas_limpieza.get('numero', {})
+        if numero.get('min_value') is not None or numero.get('max_value') is not None:
+            accion = numero.get('accion', 'marcar')
+            reglas += [Regla.rango(c, numero.get('min_value'), numero.get('max_value'), accion)
+                       for c in columnas_numericas]
+
+        texto = reglas_limpieza.get('texto', {})
+        accion = texto.get('accion', 'marcar')
+        for columna in columnas_texto:
+            if texto.get('min_length') is not None or texto.get('max_length') is not None:
+                reglas.append(Regla.longitud_texto(columna, texto.get('min_length'), texto.get('max_length'), accion))
+            if not texto.get('permitir_numeros', True):
+                reglas.append(Regla.sin_numeros(columna, accion))
+
+        for personalizada in reglas_limpieza.get('personalizadas', []):
+            reglas.append(Regla.expresion(
+                personalizada['nombre'], personalizada['expresion'], personalizada.get('accion', 'marcar')
+            ))
+
+        return cls(reglas)
+
+    @staticmethod
+    def acciones_configuradas(reglas_limpieza: Dict) -> Set[str]:
+        """Acciones que usarán las reglas de la configuración, sin compilarlas"""
+        acciones = set()
+        numero = reglas_limpieza.get('numero', {})
+        if numero.get('min_value') is not None or numero.get('max_value') is not None:
+            acciones.add(numero.get('accion', 'marcar'))
+        texto = reglas_limpieza.get('texto', {})
+        if (texto.get('min_length') is not None or texto.get('max_length') is not None
+                or not texto.get('permitir_numeros', True)):
+            acciones.add(texto.get('accion', 'marcar'))
+        acciones.update(p.get('accion', 'marcar') for p in reglas_limpieza.get('personalizadas', []))
+        return acciones
+
+    def particionar(self, columnas: Sequence[str]) -> Tuple['MotorValidacion', 'MotorValidacion']:
+        """Separar las reglas que no usan `columnas` de las que sí (p. ej. columnas calculadas después)"""
+        usan = [regla for regla in self.reglas if set(regla.columnas) & set(columnas)]
+        return MotorValidacion([r for r in self.reglas if r not in usan]), MotorValidacion(usan)
+
+    def verificar_columnas(self, columnas: Sequence[str]):
+        """Fallar si alguna regla usa columnas que no existen: nunca se evaluaría y pasaría siempre"""
+        faltantes = {regla.nombre: [c for c in regla.columnas if c not in columnas] for regla in self.reglas}
+        faltantes = {nombre: cols for nombre, cols in faltantes.items() if cols}
+        if faltantes:
+            detalle = "; ".join(f"{nombre}: {', '.join(cols)}" for nombre, cols in faltantes.items())
+            raise ValueError(f"Reglas de validación con columnas inexistentes en los datos ({detalle})")
+
+    def evaluar(self, df: pd.DataFrame) -> np.ndarray:
+        """Matriz de violaciones (una fila por regla, una columna por registro)"""
+        if not self.reglas:
+            return np.zeros((0, len(df)), dtype=bool)
+        return np.vstack([regla.violaciones(df) for regla in self.reglas])
+
+    def aplicar(self, df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame, Dict]:
+        """Evaluar y aplicar las acciones; devuelve (válidas, cuarentena, conteos)"""
+        violaciones = self.evaluar(df)
+        acciones = np.array([regla.accion for regla in self.reglas])
+
+        en_cuarentena = violaciones[acciones == 'cuarentena'].any(axis=0)
+        resumen = {
+            'violaciones': {regla.nombre: int(n) for regla, n in zip(self.reglas, violaciones.sum(axis=1))},
+            'filas_en_cuarentena': int(en_cuarentena.sum()),
+            'celdas_anuladas': 0,
+            'valores_recortados': 0
+        }
+
+        cuarentena = df.iloc[np.flatnonzero(en_cuarentena)].copy()
+        if len(cuarentena):
+            cuarentena[COLUMNA_REGLAS_INCUMPLIDAS] = self._nombres_incumplidas(violaciones[:, en_cuarentena])
+
+        # Anular y recortar solo en las filas que siguen en el resultado
+        modificar = violaciones & ~en_cuarentena
+        if modificar.any():
+            df = df.copy()
+            for regla, filas in zip(self.reglas, modificar):
+                if regla.accion not in ('anular', 'recortar') or not filas.any():
+                    continue
+                columna = regla.columnas[0]
+                if regla.accion == 'anular':
+                    for columna in regla.columnas:
+                        df[columna] = df[columna].mask(filas)
+                        if isinstance(df[columna].dtype, pd.CategoricalDtype):
+                            df[columna] = df[columna].cat.remove_unused_categories()
+                    resumen['celdas_anuladas'] += int(filas.sum()) * len(regla.columnas)
+                else:
+                    minimo, maximo = regla.limites
+                    df[columna] = df[columna].mask(filas, df[columna].clip(lower=minimo, upper=maximo))
+                    resumen['valores_recortados'] += int(filas.sum())
+
+        if en_cuarentena.any():
+            df = df[~en_cuarentena]
+        return df, cuarentena, resumen
+
+    def _nombres_incumplidas(self, violaciones: np.ndarray) -> np.ndarray:
+        """Lista de reglas incumplidas por fila, construida una vez por combinación distinta"""
+        claves = np.packbits(violaciones, axis=0).T
+        combinaciones, inversa = np.unique(claves, axis=0, return_inverse=True)
+        nombres = np.array([
+            ', '.join(r.nombre for r, incumple in zip(self.reglas, np.unpackbits(c)[:len(self.reglas)]) if incumple)
+            for c in combinaciones
+        ], dtype=object)
+        return nombres[inversa.ravel()]
+
+    @staticmethod
+    def combinar_resumenes(acumulado: Optional[Dict], nuevo: Optional[Dict]) -> Dict:
+        """Sumar conteos de validación de bloques o particiones"""
+        acumulado, nuevo = acumulado or {}, nuevo or {}
+        violaciones = dict(acumulado.get('violaciones', {}))
+        for nombre, cantidad in nuevo.get('violaciones', {}).items():
+            violaciones[nombre] = violaciones.get(nombre, 0) + cantidad
+        combinado = {'violaciones': violaciones}
+        for clave in ('filas_en_cuarentena', 'celdas_anuladas', 'valores_recortados'):
+            combinado[clave] = acumulado.get(clave, 0) + nuevo.get(clave, 0)
+        return combinado
@@ -0,0 +1,131 @@
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Atributo del DataFrame con la escala de las columnas guardadas en punto fijo
+ATRIBUTO_ESCALAS = 'escalas_punto_fijo'
+
+TIPOS_ENTEROS = [np.int8, np.int16, np.int32, np.int64]
+TIPOS_ENTEROS_ANULABLES = {
+    np.int8: pd.Int8Dtype(), np.int16: pd.Int16Dtype(),
+    np.int32: pd.Int32Dtype(), np.int64: pd.Int64Dtype()
+}
+
+
+def memoria_dataframe(df: pd.DataFrame) -> int:
+    """Bytes ocupados por el DataFrame, incluido el contenido de las cadenas"""
+    return int(df.memory_usage(deep=True, index=True).sum())
+
+
+def tipo_entero_minimo(minimo: float, maximo: float, anulable: bool = False):
+    """Menor tipo entero que representa el rango [minimo, maximo]"""
+    for tipo in TIPOS_ENTEROS:
+        limites = np.iinfo(tipo)
+        if limites.min <= minimo and maximo <= limites.max:
+            return TIPOS_ENTEROS_ANULABLES[tipo] if anulable else tipo
+    return None
+
+
+def _a_entero(serie: pd.Series, escala: int = 1) -> Optional[pd.Series]:
+    """Convertir a entero (opcionalmente escalado) si todos los valores son exactos"""
+    valores = serie.to_numpy(dtype='float64', na_value=np.nan) * escala
+    presentes = ~np.isnan(valores)
+    enteros = np.round(valores[presentes])
+    # Con escala se tolera el error de representación binaria de los decimales
+    tolerancia = 0 if escala == 1 else 1e-6
+    if np.abs(enteros - valores[presentes]).max(initial=0) > tolerancia:
+        return None
+
+    tipo = tipo_entero_minimo(enteros.min(initial=0), enteros.max(initial=0), anulable=not presentes.all())
+    if tipo is None:
+        return None
+
+    if presentes.all():
+        return pd.Series(enteros.astype(tipo), index=serie.index, name=serie.name)
+    resultado = np.zeros(len(valores), dtype=tipo.numpy_dtype)
+    resultado[presentes] = enteros
+    return pd.Series(pd.arrays.IntegerArray(resultado, ~presentes), index=serie.index, name=serie.name)
+
+
+def _a_float32(serie: pd.Series, decimales: Optional[int]) -> Optional[pd.Series]:
+    """Convertir a float32 si conserva los valores con la precisión configurada"""
+    valores = serie.to_numpy(dtype='float64', na_value=np.nan)
+    compactos = valores.astype(np.float32)
+    recuperados = compactos.astype(np.float64)
+    if decimales is not None:
+        valores, recuperados = np.round(valores, decimales), np.round(recuperados, decimales)
+    if not np.array_equal(valores, recuperados, equal_nan=True):
+        return None
+    return pd.Series(compactos, index=serie.index, name=serie.name)
+
+
+def compactar_dataframe(df: pd.DataFrame, columnas_enteras: List[str], columnas_decimales: List[str],
+                        decimales: Optional[int] = 2, representacion_decimal: str = 'float32',
+                        umbral_categorias: float = 0.5) -> Tuple[pd.DataFrame, Dict]:
+    """
+    Reducir la memoria del DataFrame sin perder información a la precisión configurada.
+
+    - Columnas enteras: menor entero con o sin nulos (Int8/Int16/...) si todos los valores son exactos.
+    - Columnas decimales: float32 si coincide con el original redondeado a `decimales`,
+      o punto fijo (entero escalado por 10**decimales) si no tiene más decimales que esos.
+    - Columnas de texto con pocos valores distintos (proporción <= umbral_categorias): category.
+
+    Una columna que no supera la comprobación conserva su tipo original.
+    """
+    if representacion_decimal not in ('float32', 'punto_fijo'):
+        raise ValueError("representacion_decimal debe ser 'float32' o 'punto_fijo'")
+
+    bytes_antes = memoria_dataframe(df)
+    df = df.copy(deep=False)
+    escalas = dict(df.attrs.get(ATRIBUTO_ESCALAS, {}))
+
+    for columna in df.columns:
+        serie = df[columna]
+        nueva = None
+
+        if pd.api.types.is_float_dtype(serie.dtype) or pd.api.types.is_integer_dtype(serie.dtype):
+            if columna in columnas_enteras:
+                nueva = _a_entero(serie)
+            elif columna in columnas_decimales:
+                if representacion_decimal == 'punto_fijo' and decimales is not None:
+                    nueva = _a_entero(serie, escala=10 ** decimales)
+                    if nueva is not None:
+                        escalas[columna] = decimales
+                else:
+                    nueva = _a_float32(serie, decimales)
+        elif serie.dtype == 'object' or pd.api.types.is_string_dtype(serie.dtype):
+            if len(serie) and serie.nunique(dropna=True) / len(serie) <= umbral_categorias:
+                nueva = serie.astype('category')
+        elif isinstance(serie.dtype, pd.CategoricalDtype):
+            nueva = serie.cat.remove_unused_categories()
+
+        if nueva is not None:
+            df[columna] = nueva
+
+    if escalas:
+        df.attrs[ATRIBUTO_ESCALAS] = escalas
+
+    bytes_despues = memoria_dataframe(df)
+    reporte = {
+        'bytes_antes': bytes_antes,
+        'bytes_despues': bytes_despues,
+        'reduccion_porcentaje': float((1 - bytes_despues / bytes_antes) * 100) if bytes_antes > 0 else 0.0,
+        'tipos': {columna: str(tipo) for columna, tipo in df.dtypes.items()},
+        'punto_fijo': escalas
+    }
+    return df, reporte
+
+
+def restaurar_punto_fijo(df: pd.DataFrame) -> pd.DataFrame:
+    """Volver a float64 las columnas guardadas como enteros escalados"""
+    escalas = df.attrs.get(ATRIBUTO_ESCALAS)
+    if not escalas:
+        return df
+
+    df = df.copy(deep=False)
+    for columna, decimales in escalas.items():
+        if columna in df.columns:
+            df[columna] = df[columna].astype('float64') / 10 ** decimales
+    df.attrs = {clave: valor for clave, valor in df.attrs.items() if clave != ATRIBUTO_ESCALAS}
+    return df
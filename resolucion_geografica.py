@@ -0,0 +1,192 @@
+import json
+import os
+import unicodedata
+from collections import deque
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Tabla ciudad → país. Se guarda como lista de pares para conservar las ciudades
+# ambiguas (mismo nombre en varios países) en lugar de perderlas en un dict.
+MAPEO_CIUDAD_PAIS_PREDETERMINADO: List[Tuple[str, str]] = [
+    ('bogota', 'Colombia'), ('medellin', 'Colombia'), ('cali', 'Colombia'),
+    ('barranquilla', 'Colombia'), ('cartagena', 'Colombia'), ('cucuta', 'Colombia'),
+    ('bucaramanga', 'Colombia'), ('pereira', 'Colombia'), ('santa marta', 'Colombia'),
+    ('ibague', 'Colombia'), ('past', 'Colombia'), ('manizales', 'Colombia'),
+    ('monteria', 'Colombia'), ('neiva', 'Colombia'), ('villavicencio', 'Colombia'),
+    ('valledupar', 'Colombia'), ('armenia', 'Colombia'), ('sincelejo', 'Colombia'),
+    ('popayan', 'Colombia'), ('itagui', 'Colombia'), ('santiago', 'Colombia'),
+    ('cordoba', 'Colombia'), ('trujillo', 'Colombia'), ('valencia', 'Colombia'),
+    ('new york', 'Estados Unidos'), ('miami', 'Estados Unidos'), ('los angeles', 'Estados Unidos'),
+    ('chicago', 'Estados Unidos'), ('houston', 'Estados Unidos'),
+    ('madrid', 'España'), ('barcelona', 'España'), ('valencia', 'España'),
+    ('ciudad de mexico', 'México'), ('guadalajara', 'México'), ('monterrey', 'México'),
+    ('buenos aires', 'Argentina'), ('cordoba', 'Argentina'), ('rosario', 'Argentina'),
+    ('sao paulo', 'Brasil'), ('rio de janeiro', 'Brasil'), ('brasilia', 'Brasil'),
+    ('lima', 'Perú'), ('arequipa', 'Perú'), ('trujillo', 'Perú'),
+    ('santiago', 'Chile'), ('valparaiso', 'Chile'), ('concepcion', 'Chile')
+]
+
+# Resolución explícita de ciudades ambiguas (conserva el resultado histórico)
+RESOLUCION_AMBIGUEDADES_PREDETERMINADA: Dict[str, str] = {
+    'valencia': 'España', 'cordoba': 'Argentina', 'trujillo': 'Perú', 'santiago': 'Chile'
+}
+
+
+def normalizar_ciudad(texto) -> str:
+    """Normalizar nombre de ciudad: minúsculas, sin acentos y espacios simples"""
+    if pd.isna(texto):
+        return ""
+    texto = unicodedata.normalize('NFKD', str(texto).lower()).encode('ASCII', 'ignore').decode('ASCII')
+    return ' '.join(texto.split())
+
+
+class _AutomataAhoCorasick:
+    """Buscador multi-patrón precompilado (trie con enlaces de fallo)"""
+
+    def __init__(self, patrones: Iterable[str]):
+        self.transiciones: List[Dict[str, int]] = [{}]
+        self.fallo: List[int] = [0]
+        self.salidas: List[List[str]] = [[]]
+
+        for patron in patrones:
+            estado = 0
+            for caracter in patron:
+                siguiente = self.transiciones[estado].get(caracter)
+                if siguiente is None:
+                    siguiente = len(self.transiciones)
+                    self.transiciones[estado][caracter] = siguiente
+                    self.transiciones.append({})
+                    self.fallo.append(0)
+                    self.salidas.append([])
+                estado = siguiente
+            self.salidas[estado].append(patron)
+
+        # Construir enlaces de fallo por recorrido en anchura
+        cola = deque(self.transiciones[0].values())
+        while cola:
+            estado = cola.popleft()
+            for caracter, siguiente in self.transiciones[estado].items():
+                cola.append(siguiente)
+                fallo = self.fallo[estado]
+                while fallo and caracter not in self.transiciones[fallo]:
+                    fallo = self.fallo[fallo]
+                destino = self.transiciones[fallo].get(caracter, 0)
+                self.fallo[siguiente] = destino if destino != siguiente else 0
+                self.salidas[siguiente] = self.salidas[siguiente] + self.salidas[self.fallo[siguiente]]
+
+    def buscar(self, texto: str) -> List[str]:
+        """Devolver todos los patrones contenidos en el texto (una sola pasada)"""
+        encontrados = []
+        estado = 0
+        for caracter in texto:
+            while estado and caracter not in self.transiciones[estado]:
+                estado = self.fallo[estado]
+            estado = self.transiciones[estado].get(caracter, 0)
+            encontrados.extend(self.salidas[estado])
+        return encontrados
+
+
+class ResolutorGeografico:
+    """
+    Resolución indexada ciudad → país.
+
+    Reglas de precedencia:
+      1. Coincidencia exacta (índice hash).
+      2. Ciudad de la tabla contenida en el texto: gana la más larga y, a igual
+         longitud, la que aparece primero en la tabla (Aho-Corasick).
+      3. Texto contenido en una ciudad de la tabla (índice de subcadenas), solo
+         si el texto tiene al menos `longitud_minima_parcial` caracteres.
+    Las ciudades presentes en varios países se resuelven con
+    `resolucion_ambiguedades`, luego con `precedencia_paises` y por último con
+    el orden de la tabla.
+    """
+
+    def __init__(self, mapeo: Iterable[Tuple[str, str]] = None,
+                 resolucion_ambiguedades: Dict[str, str] = None,
+                 precedencia_paises: List[str] = None,
+                 pais_desconocido: str = 'Desconocido',
+                 longitud_minima_parcial: int = 3):
+        mapeo = MAPEO_CIUDAD_PAIS_PREDETERMINADO if mapeo is None else mapeo
+        if resolucion_ambiguedades is None:
+            resolucion_ambiguedades = RESOLUCION_AMBIGUEDADES_PREDETERMINADA
+
+        self.pais_desconocido = pais_desconocido
+        self.longitud_minima_parcial = longitud_minima_parcial
+
+        # Agrupar países candidatos por ciudad conservando el orden de la tabla
+        candidatos: Dict[str, List[str]] = {}
+        for ciudad, pais in mapeo:
+            ciudad_normalizada = normalizar_ciudad(ciudad)
+            if ciudad_normalizada and pais not in candidatos.setdefault(ciudad_normalizada, []):
+                candidatos[ciudad_normalizada].append(pais)
+
+        resolucion_normalizada = {normalizar_ciudad(c): p for c, p in resolucion_ambiguedades.items()}
+        orden_paises = {pais: i for i, pais in enumerate(precedencia_paises or [])}
+
+        # ÍNDICE EXACTO: ciudad normalizada → país ya desambiguado
+        self.indice_exacto: Dict[str, str] = {}
+        for ciudad, paises in candidatos.items():
+            if ciudad in resolucion_normalizada:
+                self.indice_exacto[ciudad] = resolucion_normalizada[ciudad]
+            else:
+                self.indice_exacto[ciudad] = min(paises, key=lambda p: orden_paises.get(p, len(orden_paises)))
+
+        self.orden_ciudades = {ciudad: i for i, ciudad in enumerate(self.indice_exacto)}
+        self.automata = _AutomataAhoCorasick(self.indice_exacto)
+
+        # ÍNDICE DE SUBCADENAS: fragmento → primera ciudad de la tabla que lo contiene
+        self.indice_subcadenas: Dict[str, str] = {}
+        for ciudad in self.indice_exacto:
+            for inicio in range(len(ciudad)):
+                for fin in range(inicio + max(longitud_minima_parcial, 1), len(ciudad) + 1):
+                    self.indice_subcadenas.setdefault(ciudad[inicio:fin], ciudad)
+
+        # Caché texto normalizado → país, compartida entre bloques
+        self._cache: Dict[str, str] = {}
+
+    @classmethod
+    def desde_archivo(cls, ruta: str, **kwargs) -> 'ResolutorGeografico':
+        """Crear un resolutor desde un CSV (columnas ciudad, pais) o un JSON {ciudad: pais | [paises]}"""
+        if os.path.splitext(ruta)[1].lower() == '.json':
+            with open(ruta, encoding='utf-8') as f:
+                datos = json.load(f)
+            mapeo = []
+            for ciudad, paises in datos.items():
+                for pais in ([paises] if isinstance(paises, str) else paises):
+                    mapeo.append((ciudad, pais))
+        else:
+            tabla = pd.read_csv(ruta, dtype=str, usecols=['ciudad', 'pais']).dropna()
+            mapeo = list(zip(tabla['ciudad'], tabla['pais']))
+
+        return cls(mapeo, **kwargs)
+
+    def resolver(self, ciudad) -> str:
+        """Resolver el país de un único valor de ciudad"""
+        texto = normalizar_ciudad(ciudad)
+        if texto in self._cache:
+            return self._cache[texto]
+
+        pais = self.indice_exacto.get(texto)
+
+        if pais is None and texto:
+            contenidas = self.automata.buscar(texto)
+            if contenidas:
+                mejor = min(contenidas, key=lambda c: (-len(c), self.orden_ciudades[c]))
+                pais = self.indice_exacto[mejor]
+            elif len(texto) >= self.longitud_minima_parcial and texto in self.indice_subcadenas:
+                pais = self.indice_exacto[self.indice_subcadenas[texto]]
+
+        pais = pais or self.pais_desconocido
+        self._cache[texto] = pais
+        return pais
+
+    def resolver_serie(self, serie: pd.Series) -> pd.Series:
+        """Resolver una serie completa evaluando cada ciudad distinta una sola vez"""
+        codigos, ciudades_unicas = pd.factorize(serie)
+        paises_unicos = [self.resolver(ciudad) for ciudad in ciudades_unicas]
+
+        # El código -1 (nulo) apunta al último elemento: el país desconocido
+        paises = np.array(paises_unicos + [self.pais_desconocido], dtype=object)[codigos]
+        return pd.Series(paises, index=serie.index, name='pais')
@@ -0,0 +1,39 @@
+-- Diseño físico de fact_ventas para consultas de Power BI (DirectQuery).
+-- Alternativa a la definición de fact_ventas en Riwi_Ventas_Script_PostgreSQL.sql:
+-- particiones mensuales por fecha, BRIN sobre fecha y B-tree sobre las claves foráneas.
+-- Las particiones de cada mes las crea la carga (diseno_fisico.DisenoFisicoVentas);
+-- aquí se muestra una como ejemplo.
+BEGIN;
+
+
+CREATE TABLE IF NOT EXISTS public.fact_ventas
+(
+    fecha timestamp without time zone,
+    id_producto bigint,
+    id_geografia bigint,
+    id_canal bigint,
+    cantidad double precision,
+    precio_unitario double precision,
+    descuento double precision,
+    costo_envio double precision,
+    total_ventas double precision
+) PARTITION BY RANGE (fecha);
+
+-- Filas sin fecha; el CHECK evita recorrer esta partición al crear meses nuevos
+CREATE TABLE IF NOT EXISTS public.fact_ventas_sin_fecha PARTITION OF public.fact_ventas
+(
+    CONSTRAINT fact_ventas_sin_fecha_solo_nulos CHECK (fecha IS NULL)
+) DEFAULT;
+
+CREATE TABLE IF NOT EXISTS public.fact_ventas_p2024_01 PARTITION OF public.fact_ventas
+    FOR VALUES FROM ('2024-01-01') TO ('2024-02-01');
+
+-- Los índices de la tabla padre se crean también en cada partición
+CREATE INDEX IF NOT EXISTS fact_ventas_fecha_brin ON public.fact_ventas USING brin (fecha) WITH (pages_per_range = 32);
+CREATE INDEX IF NOT EXISTS fact_ventas_id_producto_idx ON public.fact_ventas USING btree (id_producto);
+CREATE INDEX IF NOT EXISTS fact_ventas_id_geografia_idx ON public.fact_ventas USING btree (id_geografia);
+CREATE INDEX IF NOT EXISTS fact_ventas_id_canal_idx ON public.fact_ventas USING btree (id_canal);
+
+-- Las claves foráneas fk_producto, fk_geografia y fk_canal se definen igual que en el script original
+
+END;
@@ -0,0 +1,38 @@
+import os
+import sys
+import uuid
+
+import pytest
+
+# Los módulos del proyecto están en la raíz del repositorio
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Cadena de conexión de una instancia PostgreSQL local de pruebas, p. ej.
+# PG_DSN_PRUEBAS="postgresql://postgres@localhost:5432/postgres"
+VARIABLE_DSN = 'PG_DSN_PRUEBAS'
+
+
+@pytest.fixture
+def conexion_pg():
+    """Conexión psycopg2 a la instancia de pruebas (se omite la prueba sin DSN)"""
+    dsn = os.getenv(VARIABLE_DSN)
+    if not dsn:
+        pytest.skip(f"{VARIABLE_DSN} no está definida")
+    psycopg2 = pytest.importorskip('psycopg2')
+    conexion = psycopg2.connect(dsn)
+    yield conexion
+    conexion.close()
+
+
+@pytest.fixture
+def esquema_pg(conexion_pg):
+    """Esquema temporal exclusivo de la prueba, eliminado al terminar"""
+    esquema = f"prueba_{uuid.uuid4().hex[:12]}"
+    with conexion_pg.cursor() as cursor:
+        cursor.execute(f'CREATE SCHEMA "{esquema}"')
+    conexion_pg.commit()
+    yield esquema
+    conexion_pg.rollback()
+    with conexion_pg.cursor() as cursor:
+        cursor.execute(f'DROP SCHEMA "{esquema}" CASCADE')
+    conexion_pg.commit()
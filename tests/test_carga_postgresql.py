@@ -0,0 +1,135 @@
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from carga_postgresql import CargadorPostgreSQL, _FlujoCSV
+from diseno_fisico import DisenoFisicoVentas
+
+
+def _modelo_pequeno():
+    """Dimensiones y hechos mínimos: dos meses con datos y un hecho sin fecha"""
+    dim_producto = pd.DataFrame({'producto': ['Arroz', 'Café'], 'tipo_producto': ['Granos', 'Granos'],
+                                 'id_producto': [1, 2]})
+    dim_geografia = pd.DataFrame({'ciudad': ['Lima', 'Cali'], 'pais': ['Perú', 'Colombia'],
+                                  'id_geografia': [1, 2]})
+    dim_canal = pd.DataFrame({'tipo_venta': ['Online'], 'tipo_cliente': ['Minorista'], 'id_canal': [1]})
+    fact_ventas = pd.DataFrame({
+        'fecha': pd.to_datetime(['2023-01-05', '2023-01-20', '2023-02-11', None]),
+        'id_producto': [1, 2, 1, 2],
+        'id_geografia': [1, 2, 2, 1],
+        'id_canal': [1, 1, 1, 1],
+        'cantidad': [2.0, 1.0, 3.0, 4.0],
+        'precio_unitario': [10.0, 20.0, 5.0, 1.5],
+        'descuento': [0.0, 10.0, 0.0, np.nan],
+        'costo_envio': [1.0, 2.0, 0.0, 0.5],
+        'total_ventas': [20.0, 18.0, 15.0, 6.0]
+    })
+    return dim_producto, dim_geografia, dim_canal, fact_ventas
+
+
+def _consultar(conexion, sql, parametros=None):
+    with conexion.cursor() as cursor:
+        cursor.execute(sql, parametros)
+        return cursor.fetchall()
+
+
+def _conteos(conexion, esquema):
+    return {tabla: _consultar(conexion, f'SELECT count(*) FROM "{esquema}"."{tabla}"')[0][0]
+            for tabla in ('dim_producto', 'dim_geografia', 'dim_canal', 'fact_ventas')}
+
+
+def _claves_foraneas(conexion, esquema):
+    filas = _consultar(
+        conexion,
+        "SELECT c.conname FROM pg_constraint c JOIN pg_class t ON t.oid = c.conrelid "
+        "JOIN pg_namespace n ON n.oid = t.relnamespace "
+        "WHERE n.nspname = %s AND t.relname = 'fact_ventas' AND c.contype = 'f'",
+        (esquema,)
+    )
+    return sorted(nombre for (nombre,) in filas)
+
+
+def _particiones(conexion, esquema):
+    filas = _consultar(
+        conexion,
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = to_regclass(%s)",
+        (f'"{esquema}"."fact_ventas"',)
+    )
+    return sorted(nombre for (nombre,) in filas)
+
+
+def _tipo_relacion(conexion, esquema, tabla):
+    return _consultar(conexion, "SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)",
+                      (f'"{esquema}"."{tabla}"',))[0][0]
+
+
+def test_flujo_csv_genera_todas_las_filas_por_bloques():
+    df = _modelo_pequeno()[3]
+    flujo = io.BufferedReader(_FlujoCSV(df, filas_por_bloque=3), buffer_size=7)
+    leido = pd.read_csv(io.BytesIO(flujo.read()), header=None, names=df.columns, parse_dates=['fecha'])
+    pd.testing.assert_frame_equal(leido, df, check_dtype=False)
+
+
+def test_carga_e_intercambio_conservan_filas_y_claves_foraneas(conexion_pg, esquema_pg):
+    cargador = CargadorPostgreSQL(conexion_pg, esquema=esquema_pg)
+    tablas = _modelo_pequeno()
+    esperados = {'dim_producto': 2, 'dim_geografia': 2, 'dim_canal': 1, 'fact_ventas': 4}
+
+    cargador.cargar_modelo_estrella(*tablas)
+    assert _conteos(conexion_pg, esquema_pg) == esperados
+    assert _claves_foraneas(conexion_pg, esquema_pg) == ['fk_canal', 'fk_geografia', 'fk_producto']
+
+    # Segunda carga: el intercambio de staging reemplaza las tablas sin duplicar filas
+    cargador.cargar_modelo_estrella(*tablas)
+    assert _conteos(conexion_pg, esquema_pg) == esperados
+    assert _claves_foraneas(conexion_pg, esquema_pg) == ['fk_canal', 'fk_geografia', 'fk_producto']
+    sobrantes = _consultar(conexion_pg, "SELECT count(*) FROM pg_tables WHERE schemaname = %s "
+                                        "AND tablename NOT IN ('dim_producto', 'dim_geografia', "
+                                        "'dim_canal', 'fact_ventas')", (esquema_pg,))[0][0]
+    assert sobrantes == 0
+
+
+def test_fallo_en_una_tabla_no_reemplaza_ninguna(conexion_pg, esquema_pg):
+    cargador = CargadorPostgreSQL(conexion_pg, esquema=esquema_pg)
+    dim_producto, dim_geografia, dim_canal, fact_ventas = _modelo_pequeno()
+    cargador.cargar_modelo_estrella(dim_producto, dim_geografia, dim_canal, fact_ventas)
+
+    with pytest.raises(Exception):
+        cargador.cargar_modelo_estrella(dim_producto.iloc[:1], dim_geografia, dim_canal,
+                                        fact_ventas.drop(columns=['id_canal']))
+    assert _conteos(conexion_pg, esquema_pg)['dim_producto'] == 2
+
+
+def test_carga_particionada_crea_particiones_mensuales(conexion_pg, esquema_pg):
+    cargador = CargadorPostgreSQL(conexion_pg, esquema=esquema_pg, diseno_fisico=DisenoFisicoVentas())
+    tablas = _modelo_pequeno()
+    esperadas = ['fact_ventas_p2023_01', 'fact_ventas_p2023_02', 'fact_ventas_sin_fecha']
+
+    cargador.cargar_modelo_estrella(*tablas)
+    cargador.cargar_modelo_estrella(*tablas)
+    assert _tipo_relacion(conexion_pg, esquema_pg, 'fact_ventas') == 'p'
+    assert _particiones(conexion_pg, esquema_pg) == esperadas
+    assert _conteos(conexion_pg, esquema_pg)['fact_ventas'] == 4
+    assert _consultar(conexion_pg, f'SELECT count(*) FROM "{esquema_pg}"."fact_ventas_sin_fecha"')[0][0] == 1
+    assert _claves_foraneas(conexion_pg, esquema_pg) == ['fk_canal', 'fk_geografia', 'fk_producto']
+
+
+def test_migracion_a_particiones_conserva_filas_y_recrea_claves_foraneas(conexion_pg, esquema_pg):
+    tablas = _modelo_pequeno()
+    CargadorPostgreSQL(conexion_pg, esquema=esquema_pg).cargar_modelo_estrella(*tablas)
+    assert _tipo_relacion(conexion_pg, esquema_pg, 'fact_ventas') == 'r'
+
+    cargador = CargadorPostgreSQL(conexion_pg, esquema=esquema_pg, diseno_fisico=DisenoFisicoVentas())
+    assert cargador.particionar_fact_ventas() == 4
+    assert _tipo_relacion(conexion_pg, esquema_pg, 'fact_ventas') == 'p'
+    assert _particiones(conexion_pg, esquema_pg) == [
+        'fact_ventas_p2023_01', 'fact_ventas_p2023_02', 'fact_ventas_sin_fecha'
+    ]
+    assert _conteos(conexion_pg, esquema_pg)['fact_ventas'] == 4
+    assert _claves_foraneas(conexion_pg, esquema_pg) == ['fk_canal', 'fk_geografia', 'fk_producto']
+
+    # Una segunda migración no hace nada
+    assert cargador.particionar_fact_ventas() is None